@@ -0,0 +1,60 @@
+import pandas as pd
+
+import rangos
+
+# -----------------------------------------------------------
+# Agregaciones de las secciones (motor pandas)
+# -----------------------------------------------------------
+# Mismas consultas que motor_sql.SqlBackend; ejercicios.py elige uno u otro.
+# Ninguna función modifica el DataFrame recibido.
+
+# Rangos de reparto: [0-2], 3-5, 6-10, 11-20, 21-50, 50+ (ver rangos.py)
+CAST_EDGES = rangos.DEFAULT_EDGES
+CAST_LABELS = rangos.labels_for(CAST_EDGES)
+
+
+# (g) Ganancia total por género (en millones)
+def genre_profit(df):
+    genres = df["genres"].fillna("").str.split("|")
+    profit = df["profit_millions"]
+    return (
+        pd.DataFrame({"genres": genres, "profit_millions": profit})
+          .explode("genres")
+          .groupby("genres")["profit_millions"]
+          .sum()
+          .sort_values(ascending=False)
+    )
+
+
+# (i) Promedios de popularidad e ingresos por rango de actrices / actores
+#     (con los mismos bordes que la tabla cruzada, ver RANGOS_REPARTO)
+def cast_range_means(df, women_edges=CAST_EDGES, men_edges=CAST_EDGES):
+    out = {}
+    for prefix, column, edges in (("women", "castWomenAmount", women_edges), ("men", "castMenAmount", men_edges)):
+        labels = rangos.labels_for(edges)
+        codes = rangos.assign_bins(df[column].to_numpy(dtype=float), edges)
+        index = pd.CategoricalIndex(labels, categories=labels, ordered=True,
+                                    name=f"cast{prefix.title()}Range")
+        for target, name in (("popularity", "popularity"), ("revenue_millions", "revenue")):
+            means = rangos.range_means(codes, df[target].to_numpy(dtype=float), len(labels))
+            out[f"{prefix}_{name}_mean"] = pd.Series(means, index=index, name=target)
+    return out
+
+
+# (l) y (m) Promedio de una columna por mes de lanzamiento
+def monthly_mean(df, column):
+    return df.groupby("month")[column].mean().sort_index()
+
+
+# (o) Promedios según video promocional, página oficial y su combinación
+def marketing_means(df):
+    has_homepage = df["homePage"].notna().rename("has_homepage")
+
+    return {
+        "video_revenue_mean": df.groupby("video")["revenue_millions"].mean(),
+        "video_popularity_mean": df.groupby("video")["popularity"].mean(),
+        "homepage_revenue_mean": df.groupby(has_homepage)["revenue_millions"].mean(),
+        "homepage_popularity_mean": df.groupby(has_homepage)["popularity"].mean(),
+        "combo_revenue_mean": df.groupby(["video", has_homepage])["revenue_millions"].mean(),
+        "combo_popularity_mean": df.groupby(["video", has_homepage])["popularity"].mean(),
+    }
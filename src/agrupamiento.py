@@ -0,0 +1,317 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from bloques import map_chunks
+from exportar import register_table, register_value, write_sqlite
+from ingesta import dataset_encoding
+from modelo import genre_matrix, genre_vocabulary
+from perfilado import stage, write_report
+from preparacion import DATA_DIR, clean_data_path
+
+# -----------------------------------------------------------
+# Segmentación del catálogo con k-means por minilotes
+# -----------------------------------------------------------
+# Variables: log(1 + budget), log(1 + revenue), log(1 + popularity),
+# runtime y voteAvg estandarizados, más los géneros en multi-hot.
+#   1. Una pasada por bloques (en paralelo) acumula sumas para estandarizar
+#      y una muestra uniforme de filas (cada fila recibe una clave
+#      aleatoria y se conservan las SAMPLE_SIZE claves menores; las muestras
+#      de cada bloque se combinan igual).
+#   2. Varios reinicios de k-means por minilotes (k-means++ + actualizaciones
+#      de Sculley) sobre la muestra, en procesos distintos; se queda el de
+#      menor inercia.
+#   3. Pasadas por bloques para asignar cada película al centro más cercano,
+#      refinar los centros con las sumas completas y acumular los perfiles
+#      de cada grupo. Las etiquetas se guardan en movies_clean.clusters.csv.
+#   4. Opcional: resumen jerárquico (Ward) de los centros.
+# Ninguna etapa necesita el catálogo completo en memoria.
+#
+# Uso: python src/agrupamiento.py [carpeta_de_datos] [--k 8] [--reinicios 4] [--jerarquia 3]
+
+NUMERIC_FEATURES = ["budget", "revenue", "popularity", "runtime", "voteAvg"]
+LOG_FEATURES = ["budget", "revenue", "popularity"]
+CHUNK_ROWS = 100_000
+SAMPLE_SIZE = 200_000
+BATCH_SIZE = 1024
+N_ITER = 300
+
+
+def clusters_path(clean_path):
+    return os.path.splitext(clean_path)[0] + ".clusters.csv"
+
+
+def read_chunks(csv_path, chunk_rows, columns=NUMERIC_FEATURES):
+    return pd.read_csv(csv_path, usecols=["id", "genres"] + list(columns), chunksize=chunk_rows,
+                       encoding=dataset_encoding(csv_path))
+
+
+def raw_features(chunk):
+    # Variables numéricas (log en montos y popularidad) sin estandarizar
+    columns = []
+    for col in NUMERIC_FEATURES:
+        values = pd.to_numeric(chunk[col], errors="coerce").to_numpy(dtype=float)
+        if col in LOG_FEATURES:
+            values = np.log1p(np.clip(values, 0, None))
+        columns.append(values)
+    return np.column_stack(columns)
+
+
+def _pass_stats(chunk, genres, sample_size, seed, features=raw_features):
+    x = features(chunk)
+    valid = ~np.isnan(x)
+    # Clave aleatoria por fila, determinista para cada bloque
+    rng = np.random.default_rng([seed, int(chunk.index[0]) if len(chunk) else 0])
+    keys = rng.random(len(chunk))
+    keep = np.argsort(keys)[:sample_size]
+    return {
+        "rows": len(chunk),
+        "count": valid.sum(axis=0),
+        "sum": np.where(valid, x, 0).sum(axis=0),
+        "sumsq": np.where(valid, x * x, 0).sum(axis=0),
+        "keys": keys[keep],
+        "sample": x[keep],
+        "genres": genre_matrix(chunk["genres"], genres)[keep],
+    }
+
+
+def _merge_sample(total, part, sample_size):
+    keys = np.concatenate([total["keys"], part["keys"]])
+    keep = np.argsort(keys)[:sample_size]
+    total["keys"] = keys[keep]
+    total["sample"] = np.concatenate([total["sample"], part["sample"]])[keep]
+    total["genres"] = np.concatenate([total["genres"], part["genres"]])[keep]
+    for key in ("rows", "count", "sum", "sumsq"):
+        total[key] = total[key] + part[key]
+    return total
+
+
+def sample_pass(csv_path, genres, workers=None, chunk_rows=CHUNK_ROWS, sample_size=SAMPLE_SIZE, seed=0,
+                features=raw_features, columns=NUMERIC_FEATURES):
+    # Sumas para estandarizar + muestra uniforme de filas, en una pasada por bloques
+    total = None
+    for part in map_chunks(_pass_stats, read_chunks(csv_path, chunk_rows, columns), workers,
+                           args=(genres, sample_size, seed, features)):
+        total = part if total is None else _merge_sample(total, part, sample_size)
+    return total
+
+
+class Standardizer:
+    def __init__(self, count, total, sumsq, genre_weight=1.0):
+        count = np.maximum(count, 1)
+        self.mean = total / count
+        self.std = np.sqrt(np.clip(sumsq / count - self.mean ** 2, 0, None))
+        self.std[self.std < 1e-12] = 1.0
+        self.genre_weight = genre_weight
+
+    @classmethod
+    def from_moments(cls, mean, std, genre_weight=1.0):
+        scaler = cls(np.ones(len(mean)), np.asarray(mean, dtype=float), np.zeros(len(mean)), genre_weight)
+        scaler.std = np.asarray(std, dtype=float)
+        return scaler
+
+    def transform(self, raw, genres):
+        x = np.nan_to_num((raw - self.mean) / self.std, nan=0.0)
+        return np.hstack([x, genres * self.genre_weight])
+
+
+# -----------------------------------------------------------
+# k-means por minilotes (un reinicio)
+# -----------------------------------------------------------
+def sq_distances(x, centers):
+    # |x - c|² = |x|² + |c|² - 2 x·c
+    d = (x * x).sum(axis=1)[:, None] + (centers * centers).sum(axis=1)[None, :] - 2.0 * x @ centers.T
+    return np.maximum(d, 0)
+
+
+def kmeans_pp(x, k, rng):
+    centers = np.empty((k, x.shape[1]))
+    centers[0] = x[rng.integers(len(x))]
+    closest = sq_distances(x, centers[:1])[:, 0]
+    for i in range(1, k):
+        total = closest.sum()
+        idx = rng.choice(len(x), p=closest / total) if total > 0 else rng.integers(len(x))
+        centers[i] = x[idx]
+        closest = np.minimum(closest, sq_distances(x, centers[i:i + 1])[:, 0])
+    return centers
+
+
+def minibatch_kmeans(x, k, seed, batch_size=BATCH_SIZE, n_iter=N_ITER, init="k-means++"):
+    rng = np.random.default_rng(seed)
+    # Con miles de centros (índice IVF) k-means++ es demasiado lento: filas al azar
+    centers = kmeans_pp(x, k, rng) if init == "k-means++" else x[rng.choice(len(x), k, replace=False)].astype(float)
+    counts = np.zeros(k)
+    for _ in range(n_iter):
+        batch = x[rng.integers(0, len(x), size=min(batch_size, len(x)))]
+        labels = sq_distances(batch, centers).argmin(axis=1)
+        # Actualización de Sculley: tasa de aprendizaje 1 / (veces que se movió el centro)
+        batch_counts = np.bincount(labels, minlength=k)
+        sums = np.zeros_like(centers)
+        np.add.at(sums, labels, batch)
+        moved = batch_counts > 0
+        counts[moved] += batch_counts[moved]
+        rate = batch_counts[moved] / counts[moved]
+        centers[moved] += rate[:, None] * (sums[moved] / batch_counts[moved][:, None] - centers[moved])
+    # Inercia por tramos: con miles de centros la matriz completa no entra en memoria
+    step = max(1, (1 << 22) // k)
+    inertia = sum(sq_distances(x[i:i + step], centers).min(axis=1).sum() for i in range(0, len(x), step))
+    return centers, float(inertia)
+
+
+def _restart(seed, x, k, batch_size, n_iter):
+    return minibatch_kmeans(x, k, seed, batch_size, n_iter)
+
+
+# -----------------------------------------------------------
+# Asignación y perfiles por bloques
+# -----------------------------------------------------------
+def _assign_chunk(chunk, genres, scaler, centers):
+    raw = raw_features(chunk)
+    g = genre_matrix(chunk["genres"], genres)
+    x = scaler.transform(raw, g)
+    d = sq_distances(x, centers)
+    labels = d.argmin(axis=1)
+    k = len(centers)
+
+    original = np.column_stack([pd.to_numeric(chunk[c], errors="coerce").to_numpy(dtype=float)
+                                for c in NUMERIC_FEATURES])
+    valid = ~np.isnan(original)
+    value_sums = np.zeros((k, len(NUMERIC_FEATURES)))
+    value_counts = np.zeros((k, len(NUMERIC_FEATURES)))
+    np.add.at(value_sums, labels, np.where(valid, original, 0))
+    np.add.at(value_counts, labels, valid)
+    x_sums = np.zeros_like(centers)
+    np.add.at(x_sums, labels, x)
+    genre_counts = np.zeros((k, len(genres)))
+    np.add.at(genre_counts, labels, g)
+
+    return {
+        "ids": chunk["id"].to_numpy(),
+        "labels": labels,
+        "counts": np.bincount(labels, minlength=k),
+        "inertia": float(d[np.arange(len(labels)), labels].sum()),
+        "x_sums": x_sums,
+        "value_sums": value_sums,
+        "value_counts": value_counts,
+        "genre_counts": genre_counts,
+    }
+
+
+def assign_pass(csv_path, genres, scaler, centers, workers, chunk_rows, labels_path=None):
+    k = len(centers)
+    total = {
+        "counts": np.zeros(k), "inertia": 0.0, "x_sums": np.zeros_like(centers),
+        "value_sums": np.zeros((k, len(NUMERIC_FEATURES))), "value_counts": np.zeros((k, len(NUMERIC_FEATURES))),
+        "genre_counts": np.zeros((k, len(genres))),
+    }
+    out = None
+    if labels_path:
+        out = open(labels_path + ".tmp", "w", encoding="utf-8")
+        out.write("id,cluster\n")
+    try:
+        for part in map_chunks(_assign_chunk, read_chunks(csv_path, chunk_rows), workers,
+                               args=(genres, scaler, centers)):
+            if out is not None:
+                pd.DataFrame({"id": part["ids"], "cluster": part["labels"]}).to_csv(out, header=False, index=False)
+            for key in total:
+                total[key] = total[key] + part[key]
+    finally:
+        if out is not None:
+            out.close()
+    if labels_path:
+        os.replace(labels_path + ".tmp", labels_path)
+    return total
+
+
+def cluster_profiles(totals, genres, top_genres=3):
+    counts = totals["counts"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = totals["value_sums"] / totals["value_counts"]
+        genre_share = totals["genre_counts"] / counts[:, None]
+    profiles = pd.DataFrame(means, columns=[f"{c}_mean" for c in NUMERIC_FEATURES])
+    profiles.insert(0, "movies", counts.astype(np.int64))
+    profiles.insert(1, "share", counts / counts.sum())
+    profiles["top_genres"] = [
+        "|".join(f"{genres[j]} {share[j]:.0%}" for j in np.argsort(-share)[:top_genres] if share[j] > 0)
+        for share in np.nan_to_num(genre_share)
+    ]
+    profiles.index.name = "cluster"
+    return profiles.reset_index()
+
+
+def hierarchy_summary(centers, n_groups):
+    # Ward sobre los centros: orden de fusión y grupo de nivel superior
+    from scipy.cluster.hierarchy import fcluster, linkage
+
+    merges = linkage(centers, method="ward")
+    table = pd.DataFrame(merges, columns=["cluster_a", "cluster_b", "distance", "size"])
+    table[["cluster_a", "cluster_b", "size"]] = table[["cluster_a", "cluster_b", "size"]].astype(np.int64)
+    table.insert(0, "step", np.arange(len(table)))
+    groups = fcluster(merges, t=n_groups, criterion="maxclust")
+    return table, groups
+
+
+def cluster_catalog(data_dir=DATA_DIR, k=8, restarts=4, workers=None, hierarchy_groups=None,
+                    chunk_rows=CHUNK_ROWS, sample_size=SAMPLE_SIZE, refine_passes=1, seed=0):
+    csv_path = clean_data_path(data_dir)
+
+    with stage("cluster:genres"):
+        genres = genre_vocabulary(csv_path)
+
+    with stage("cluster:sample") as info:
+        total = sample_pass(csv_path, genres, workers, chunk_rows, sample_size, seed)
+        info["rows"] = len(total["keys"])
+    scaler = Standardizer(total["count"], total["sum"], total["sumsq"])
+    sample = scaler.transform(total["sample"], total["genres"])
+    k = min(k, len(sample))
+
+    with stage("cluster:restarts", rows=len(sample)):
+        seeds = np.random.SeedSequence(seed).generate_state(restarts)
+        runs = list(map_chunks(_restart, [int(s) for s in seeds], workers, args=(sample, k, BATCH_SIZE, N_ITER)))
+    centers, sample_inertia = min(runs, key=lambda run: run[1])
+
+    # Refinamiento con el catálogo completo: centros = promedio de sus películas
+    for _ in range(refine_passes):
+        with stage("cluster:refine"):
+            totals = assign_pass(csv_path, genres, scaler, centers, workers, chunk_rows)
+        nonempty = totals["counts"] > 0
+        centers[nonempty] = totals["x_sums"][nonempty] / totals["counts"][nonempty][:, None]
+
+    with stage("cluster:assign") as info:
+        totals = assign_pass(csv_path, genres, scaler, centers, workers, chunk_rows,
+                             labels_path=clusters_path(csv_path))
+        info["rows"] = int(totals["counts"].sum())
+
+    profiles = cluster_profiles(totals, genres)
+    if hierarchy_groups and k > 1:
+        merges, groups = hierarchy_summary(centers, hierarchy_groups)
+        profiles.insert(1, "group", groups)
+        register_table("cluster", "cluster_hierarchy", merges)
+    register_table("cluster", "cluster_profiles", profiles)
+    register_table("cluster", "cluster_restarts",
+                   pd.DataFrame({"restart": range(len(runs)), "sample_inertia": [r[1] for r in runs]}))
+    register_value("cluster", "cluster_inertia", totals["inertia"])
+
+    print(f"\n🧩 {k} grupos sobre {int(totals['counts'].sum()):,} películas "
+          f"(mejor de {restarts} reinicios, inercia en la muestra {sample_inertia:,.1f})")
+    print(profiles.to_string(index=False, float_format=lambda x: f"{x:,.2f}"))
+    print(f"\n✅ Etiquetas guardadas en: {clusters_path(csv_path)}")
+    return profiles, centers
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Agrupa el catálogo con k-means por minilotes.")
+    parser.add_argument("datos", nargs="?", default=DATA_DIR, help="carpeta con movies_clean.csv")
+    parser.add_argument("--k", type=int, default=8, help="cantidad de grupos")
+    parser.add_argument("--reinicios", type=int, default=4, help="reinicios en paralelo")
+    parser.add_argument("--jerarquia", type=int, default=None,
+                        help="agrupa los centros en N grupos superiores (Ward)")
+    parser.add_argument("--procesos", type=int, default=None)
+    args = parser.parse_args()
+
+    cluster_catalog(args.datos, k=args.k, restarts=args.reinicios, workers=args.procesos,
+                    hierarchy_groups=args.jerarquia)
+    write_sqlite(os.path.join(args.datos, "resultados.sqlite"), source="agrupamiento")
+    write_report("agrupamiento", args.datos)
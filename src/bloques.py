@@ -0,0 +1,34 @@
+import itertools
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# -----------------------------------------------------------
+# Procesamiento de bloques en paralelo
+# -----------------------------------------------------------
+# map_chunks(func, bloques) aplica func a cada bloque (p. ej. los bloques
+# de pd.read_csv(chunksize=...)) en procesos distintos y devuelve los
+# resultados en el mismo orden. Como mucho hay 2 bloques por proceso en
+# vuelo, así que la memoria no crece con el tamaño del archivo. Con un solo
+# bloque (o workers=1) no se crean procesos.
+
+
+def map_chunks(func, chunks, workers=None, args=()):
+    workers = workers or os.cpu_count() or 1
+    chunks = iter(chunks)
+    head = list(itertools.islice(chunks, 2))
+    chunks = itertools.chain(head, chunks)
+
+    if len(head) < 2 or workers == 1:
+        for chunk in chunks:
+            yield func(chunk, *args)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        for chunk in chunks:
+            in_flight.append(pool.submit(func, chunk, *args))
+            if len(in_flight) >= 2 * workers:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
@@ -0,0 +1,141 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# -----------------------------------------------------------
+# Calificación ponderada por cantidad de votos
+# -----------------------------------------------------------
+# voteAvg de una película con 1 o 2 votos no es comparable con el de una
+# con miles. weightedRating corrige eso y se calcula al cargar los datos:
+#   - bayes (por defecto): promedio bayesiano
+#       (v * R + m * C) / (v + m)
+#     v = voteCount, R = voteAvg, C = media a priori (por defecto, la media
+#     de todos los votos del catálogo) y m = votos a priori.
+#   - wilson: cota inferior del intervalo de Wilson para R / 10 con v votos.
+# Los rankings de (d) y (j) usan weightedRating y solo consideran películas
+# con al menos min_votes votos.
+#
+# Configuración (variables de entorno):
+#   CALIFICACION=bayes|wilson
+#   CALIFICACION_MEDIA=<C>          media a priori fija
+#   CALIFICACION_VOTOS=<m>          votos a priori (por defecto 100)
+#   CALIFICACION_MIN_VOTOS=<n>      mínimo de votos para los rankings (10)
+
+RATING_SCALE = 10.0
+WILSON_Z = 1.96
+
+
+def config_from_env():
+    prior_mean = os.environ.get("CALIFICACION_MEDIA")
+    return {
+        "method": os.environ.get("CALIFICACION", "bayes"),
+        "prior_mean": float(prior_mean) if prior_mean else None,
+        "prior_votes": float(os.environ.get("CALIFICACION_VOTOS", 100)),
+        "min_votes": int(os.environ.get("CALIFICACION_MIN_VOTOS", 10)),
+    }
+
+
+def known_votes(avg, count):
+    # Votos que cuentan: sin promedio (NaN) no hay votos utilizables
+    return np.where(np.isnan(avg), 0.0, np.nan_to_num(count, nan=0.0))
+
+
+def bayesian_average(avg, count, prior_mean, prior_votes):
+    avg = np.asarray(avg, dtype=float)
+    count = known_votes(avg, np.asarray(count, dtype=float))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (count * np.nan_to_num(avg, nan=0.0) + prior_votes * prior_mean) / (count + prior_votes)
+
+
+def wilson_lower_bound(avg, count, z=WILSON_Z, scale=RATING_SCALE):
+    p = np.clip(np.asarray(avg, dtype=float) / scale, 0.0, 1.0)
+    n = known_votes(p, np.asarray(count, dtype=float))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z2 = z * z
+        center = p + z2 / (2 * n)
+        margin = z * np.sqrt(p * (1 - p) / n + z2 / (4 * n * n))
+        bound = (center - margin) / (1 + z2 / n)
+    return np.where(n > 0, bound * scale, 0.0)
+
+
+class RatingModel:
+    # Guarda las sumas del catálogo (votos y puntos) para que la media a
+    # priori y las calificaciones se actualicen en O(películas modificadas)
+    def __init__(self, method="bayes", prior_mean=None, prior_votes=100.0, min_votes=10):
+        if method not in ("bayes", "wilson"):
+            raise ValueError(f"Método de calificación desconocido: {method}")
+        self.method = method
+        self.fixed_prior_mean = prior_mean
+        self.prior_votes = prior_votes
+        self.min_votes = min_votes
+        self.total_votes = 0.0
+        self.total_points = 0.0
+
+    @classmethod
+    def from_env(cls):
+        return cls(**config_from_env())
+
+    def key(self):
+        # Identifica la configuración (invalida instantáneas si cambia)
+        return (self.method, self.fixed_prior_mean, self.prior_votes, self.min_votes)
+
+    @property
+    def prior_mean(self):
+        if self.fixed_prior_mean is not None:
+            return self.fixed_prior_mean
+        return self.total_points / self.total_votes if self.total_votes else RATING_SCALE / 2
+
+    def score(self, avg, count):
+        if self.method == "wilson":
+            return wilson_lower_bound(avg, count)
+        return bayesian_average(avg, count, self.prior_mean, self.prior_votes)
+
+    def fit(self, df):
+        # Sumas del catálogo para la media a priori (sin modificar df)
+        avg = pd.to_numeric(df["voteAvg"], errors="coerce").to_numpy(dtype=float)
+        count = pd.to_numeric(df["voteCount"], errors="coerce").to_numpy(dtype=float)
+        valid = ~np.isnan(avg) & ~np.isnan(count)
+        self.total_votes = float(count[valid].sum())
+        self.total_points = float((avg[valid] * count[valid]).sum())
+        return self
+
+    def rating_column(self, df):
+        avg = pd.to_numeric(df["voteAvg"], errors="coerce")
+        count = pd.to_numeric(df["voteCount"], errors="coerce")
+        return pd.Series(self.score(avg, count), index=df.index, name="weightedRating")
+
+    def add_votes(self, df, positions, new_points, new_votes):
+        # Incorpora votos nuevos (suma de puntos y cantidad por película) y
+        # recalcula solo las filas afectadas. La media a priori se actualiza
+        # con las sumas; las demás filas se refrescan con refresh() o al recargar.
+        positions = np.asarray(positions)
+        new_points = np.asarray(new_points, dtype=float)
+        new_votes = np.asarray(new_votes, dtype=float)
+        cols = [df.columns.get_loc(c) for c in ("voteAvg", "voteCount", "weightedRating")]
+
+        avg = df.iloc[positions, cols[0]].to_numpy(dtype=float)
+        count = known_votes(avg, df.iloc[positions, cols[1]].to_numpy(dtype=float))
+        points = np.nan_to_num(avg, nan=0.0) * count + new_points
+        count = count + new_votes
+        with np.errstate(invalid="ignore", divide="ignore"):
+            avg = points / count
+
+        self.total_votes += float(new_votes.sum())
+        self.total_points += float(new_points.sum())
+        df.iloc[positions, cols[0]] = avg
+        count_dtype = df.dtypes.iloc[cols[1]]
+        df.iloc[positions, cols[1]] = count.astype(count_dtype) if count_dtype.kind in "iu" else count
+        df.iloc[positions, cols[2]] = self.score(avg, count)
+        return df
+
+    def refresh(self, df):
+        df["weightedRating"] = self.rating_column(df)
+        return df
+
+    def top(self, df, k, columns, ascending=False):
+        # Top-K por weightedRating entre las películas con suficientes votos
+        eligible = df[pd.to_numeric(df["voteCount"], errors="coerce") >= self.min_votes]
+        if ascending:
+            return eligible.nsmallest(k, "weightedRating")[columns]
+        return eligible.nlargest(k, "weightedRating")[columns]
@@ -0,0 +1,251 @@
+import cmd
+import shlex
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from entidades import build_entities
+from exportar import format_number
+from imputacion import IMPUTED_COLS, indicator
+from preparacion import clean_data_path, load_data
+from resumen import DIMENSIONS, SummaryCube
+from similares import NPROBE, SimilarIndex
+
+# -----------------------------------------------------------
+# Servicio de consultas sobre el dataset limpio (REPL local)
+# -----------------------------------------------------------
+# Carga movies_clean.csv una sola vez, construye índices por año, género e
+# idioma, y responde versiones parametrizadas de las secciones de
+# ejercicios.py sin volver a ejecutar el análisis completo.
+#
+# Ejemplos:
+#   top 10 revenue year=2015
+#   group sum profit_millions by genre lang=es
+#   group mean popularity by month genre=Drama
+#   corr voteAvg revenue year=2000-2010
+#   count genre=Horror lang=en
+#   top 5 voteAvg director="Pedro Almodóvar"
+#   describe budget by genre lang=en
+#   similar 550 10   (requiere python src/similares.py construir)
+#
+# Uso: python src/consultas.py [comando ...]   (sin argumentos abre el REPL)
+
+FILTER_KEYS = ["year", "month", "genre", "lang", "video", "homepage", "director", "company", "country"]
+GROUP_DIMS = ["year", "month", "genre", "genre_main", "lang", "video", "homepage"]
+
+
+class MovieQueries:
+    def __init__(self, df):
+        self.df = df.reset_index(drop=True)
+        self.n = len(self.df)
+
+        # Columnas derivadas que usan las secciones (f) y (o)
+        genres = self.df["genres"].fillna("")
+        self.df["genre_main"] = genres.str.split("|").str[0].replace("", np.nan)
+        self.df["has_homepage"] = self.df["homePage"].notna()
+
+        # Índice invertido género -> filas (la lista de géneros se separa una sola vez)
+        exploded = genres.str.split("|").explode()
+        exploded = exploded[exploded != ""]
+        self.genre_rows = exploded.index.to_numpy()
+        self.genre_codes, self.genre_names = pd.factorize(exploded.to_numpy())
+        self.genre_index = {
+            name: self.genre_rows[self.genre_codes == code]
+            for code, name in enumerate(self.genre_names)
+        }
+
+        # Índices por año e idioma (posiciones de fila)
+        self.year_index = {int(k): v for k, v in self.df.groupby("year").indices.items()}
+        self.lang_index = self.df.groupby("originalLanguage").indices
+
+        # Directores, productoras y países (listas "|") como índices invertidos
+        self.entities = build_entities(self.df)
+        self.similar_index = None
+
+    # ---------------- filtros ----------------
+    def mask(self, filters):
+        mask = np.ones(self.n, dtype=bool)
+        for key, value in filters.items():
+            if key == "year":
+                if "-" in value:
+                    start, end = (int(v) for v in value.split("-"))
+                else:
+                    start = end = int(value)
+                rows = [self.year_index.get(y, np.empty(0, dtype=np.int64)) for y in range(start, end + 1)]
+                mask &= self._rows_to_mask(np.concatenate(rows))
+            elif key == "genre":
+                mask &= self._rows_to_mask(self.genre_index.get(value, np.empty(0, dtype=np.int64)))
+            elif key == "lang":
+                mask &= self._rows_to_mask(self.lang_index.get(value, np.empty(0, dtype=np.int64)))
+            elif key in self.entities:
+                mask &= self.entities[key].movie_mask(value)
+            elif key == "month":
+                mask &= (self.df["month"] == int(value)).to_numpy()
+            elif key == "video":
+                mask &= (self.df["video"].astype(str).str.lower() == value.lower()).to_numpy()
+            elif key == "homepage":
+                mask &= self.df["has_homepage"].to_numpy() == (value.lower() == "true")
+            else:
+                raise ValueError(f"Filtro desconocido '{key}'. Opciones: {', '.join(FILTER_KEYS)}")
+        return mask
+
+    def _rows_to_mask(self, rows):
+        mask = np.zeros(self.n, dtype=bool)
+        mask[rows] = True
+        return mask
+
+    # ---------------- consultas ----------------
+    def top(self, k, column, filters, ascending=False):
+        # Como en (a), (b) y (m): los rankings de montos usan solo valores reportados
+        mask = self.mask(filters)
+        for col in IMPUTED_COLS:
+            if column.startswith(col) and indicator(col) in self.df.columns:
+                mask &= ~self.df[indicator(col)].astype(bool).to_numpy()
+        subset = self.df[mask]
+        columns = [c for c in ["title", column, "year", "originalLanguage"] if c in subset.columns]
+        if ascending:
+            return subset.nsmallest(k, column)[columns]
+        return subset.nlargest(k, column)[columns]
+
+    def group(self, agg, column, dim, filters):
+        mask = self.mask(filters)
+        if dim == "genre":
+            # Agregación sobre el índice invertido: equivalente a explode + groupby
+            selected = mask[self.genre_rows]
+            codes = self.genre_codes[selected]
+            values = self.df[column].to_numpy(dtype=float)[self.genre_rows[selected]]
+            valid = ~np.isnan(values)
+            counts = np.bincount(codes[valid], minlength=len(self.genre_names))
+            sums = np.bincount(codes[valid], weights=values[valid], minlength=len(self.genre_names))
+            with np.errstate(invalid="ignore", divide="ignore"):
+                result = {"sum": sums, "count": counts, "mean": sums / counts}[agg]
+            series = pd.Series(result, index=self.genre_names, name=f"{column}_{agg}")
+            return series[counts > 0].sort_values(ascending=False)
+
+        key = {"lang": "originalLanguage", "homepage": "has_homepage"}.get(dim, dim)
+        grouped = self.df[mask].groupby(key)[column].agg(agg)
+        if dim in ("year", "month"):
+            return grouped.sort_index()
+        return grouped.sort_values(ascending=False)
+
+    def corr(self, col_a, col_b, filters):
+        subset = self.df[self.mask(filters)]
+        return subset[col_a].corr(subset[col_b]), len(subset)
+
+    def count(self, filters):
+        return int(self.mask(filters).sum())
+
+    def describe(self, column, dim, filters):
+        cube = SummaryCube([column], ["all", dim] if dim != "all" else ["all"])
+        return cube.update(self.df[self.mask(filters)]).table().drop(columns="column")
+
+    def similar(self, movie_id, k, nprobe=NPROBE):
+        # El índice de similares se abre (mmap) la primera vez que se usa
+        if self.similar_index is None:
+            self.similar_index = SimilarIndex.open()
+        result = self.similar_index.similar_to([movie_id], k, nprobe)
+        titles = self.df.set_index("id")["title"]
+        result["title"] = result["similar_id"].map(titles)
+        return result[["rank", "similar_id", "title", "distance"]]
+
+
+def parse_args(tokens):
+    positional, filters = [], {}
+    for token in tokens:
+        if "=" in token:
+            key, value = token.split("=", 1)
+            filters[key] = value
+        else:
+            positional.append(token)
+    return positional, filters
+
+
+class QueryShell(cmd.Cmd):
+    intro = "\n🔎 Servicio de consultas listo. Escribe 'help' para ver los comandos."
+    prompt = "movies> "
+
+    def __init__(self, queries):
+        super().__init__()
+        self.queries = queries
+
+    def onecmd(self, line):
+        start = time.perf_counter()
+        try:
+            stop = super().onecmd(line)
+        except (ValueError, KeyError, IndexError, FileNotFoundError) as e:
+            print(f"⚠️ Error en la consulta: {e}")
+            return False
+        if line.strip() and not stop:
+            print(f"⏱️  {(time.perf_counter() - start) * 1000:.1f} ms")
+        return stop
+
+    def emptyline(self):
+        return False
+
+    def do_top(self, arg):
+        "top <k> <columna> [asc] [year=2015|1990-2000] [genre=Drama] [lang=es] [month=5] [video=True] [homepage=True] [director=...] [company=...] [country=...]"
+        positional, filters = parse_args(shlex.split(arg))
+        k, column = int(positional[0]), positional[1]
+        ascending = "asc" in positional[2:]
+        print(self.queries.top(k, column, filters, ascending).to_string(index=False, float_format=format_number))
+
+    def do_group(self, arg):
+        "group <mean|sum|count> <columna> by <year|month|genre|genre_main|lang|video|homepage> [filtros]"
+        positional, filters = parse_args(shlex.split(arg))
+        agg, column, by, dim = positional[:4]
+        if by != "by" or dim not in GROUP_DIMS:
+            raise ValueError(f"Uso: group <agg> <columna> by <{'|'.join(GROUP_DIMS)}>")
+        print(self.queries.group(agg, column, dim, filters).to_string(float_format=format_number))
+
+    def do_corr(self, arg):
+        "corr <columna_a> <columna_b> [filtros]"
+        positional, filters = parse_args(shlex.split(arg))
+        value, n = self.queries.corr(positional[0], positional[1], filters)
+        print(f"📊 Correlación {positional[0]} vs {positional[1]}: {value:.3f} (n = {n:,})")
+
+    def do_count(self, arg):
+        "count [filtros]"
+        _, filters = parse_args(shlex.split(arg))
+        print(f"🎬 Películas: {self.queries.count(filters):,}")
+
+    def do_describe(self, arg):
+        "describe <columna> [by <genre|language|decade>] [filtros]: count/mean/std/min/cuartiles/max por grupo"
+        positional, filters = parse_args(shlex.split(arg))
+        dim = positional[2] if len(positional) > 2 and positional[1] == "by" else "all"
+        if dim not in DIMENSIONS:
+            raise ValueError(f"Uso: describe <columna> by <{'|'.join(DIMENSIONS[1:])}>")
+        print(self.queries.describe(positional[0], dim, filters).to_string(index=False, float_format=format_number))
+
+    def do_similar(self, arg):
+        "similar <id> [k] [nprobe=8]: películas más parecidas (índice de similares.py)"
+        positional, options = parse_args(shlex.split(arg))
+        k = int(positional[1]) if len(positional) > 1 else 10
+        result = self.queries.similar(int(positional[0]), k, int(options.get("nprobe", NPROBE)))
+        print(result.to_string(index=False, float_format=format_number))
+
+    def do_columns(self, arg):
+        "columns: lista las columnas disponibles"
+        print(", ".join(self.queries.df.columns))
+
+    def do_quit(self, arg):
+        "quit: salir"
+        return True
+
+    do_exit = do_quit
+    do_EOF = do_quit
+
+
+if __name__ == "__main__":
+    print("📂 Cargando datos e índices...")
+    queries = MovieQueries(load_data(clean_data_path()))
+    shell = QueryShell(queries)
+
+    if len(sys.argv) > 1:
+        # Modo no interactivo: cada argumento es un comando
+        for command in sys.argv[1:]:
+            print(f"\nmovies> {command}")
+            shell.onecmd(command)
+    else:
+        shell.cmdloop()
@@ -1,540 +1,731 @@
-import pandas as pd
-import matplotlib.pyplot as plt
+import hashlib
+import inspect
+import os
+import sys
+import time
+
 import numpy as np
-import seaborn as sns
 
-# -----------------------------------------------------------
-# Cargar el dataset limpio
-# -----------------------------------------------------------
-data_path = "data/movies_clean.csv"
-df = pd.read_csv(data_path)
+import agregaciones
+import exportar
+import graficos
+import muestreo
+import rangos
+from entidades import EntityIndex, build_entities
+from exportar import format_currency, format_number, register_table, register_value, write_sqlite
+from graficos import ChartSpec, flush, plot
+from imputacion import reported_only
+from perfilado import stage, write_report
+from preparacion import DATA_DIR, clean_data_path, enriched_path, load_data, rating_model
+from puntos_control import EJERCICIOS_CODE, Checkpoints, code_signature, env_signature, file_signature, src_paths
 
-# Convertir 'releaseDate' a tipo fecha
-df["releaseDate"] = pd.to_datetime(df["releaseDate"], errors="coerce")
+# Motor de agregaciones para (g), (i), (l), (m) y (o):
+#   MOTOR=pandas (por defecto) o MOTOR=sql (SQLite, ver motor_sql.py)
+sql_backend = None
 
-# -----------------------------------------------------------
-# Conversión de tipos para evitar errores en cálculos
-# -----------------------------------------------------------
-numeric_cols = ["budget", "revenue", "voteCount", "popularity",
-                "castWomenAmount", "castMenAmount", "actorsAmount"]
-for col in numeric_cols:
-    df[col] = pd.to_numeric(df[col], errors="coerce")
+# MUESTRA (ver muestreo.py): las secciones corren sobre una muestra y los
+# top-K de (a), (b), (c), (d), (f), (j) y (m) sobre las filas candidatas
+# exactas de todo el catálogo
+ranking_rows = None
+
+# Etiquetas del eje X en (l)
+MONTH_NAMES = ["Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio", "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"]
+
+# Mínimo de películas por director para el ranking de promedio de votos en (j)
+ENTITY_MIN_MOVIES = 3
+
+# Bordes de rangos para la tabla cruzada de (i): default, quantile o data
+CAST_EDGE_MODE = os.environ.get("RANGOS_REPARTO", "default")
+
+
+def aggregate(name, df, *args):
+    if sql_backend is not None:
+        return getattr(sql_backend, name)(*args)
+    return getattr(agregaciones, name)(df, *args)
+
+
+# Tablas exactas también en modo muestra (top-K sobre las filas candidatas)
+EXACT_TABLES = {"top_budget_movies", "top_revenue_movies", "top_voted_movies", "worst_movies", "longest_movies",
+                "top_rated_movies", "top_rated_director_counts", "top50_revenue_month_counts"}
 
-# Crear columna adicional para el año y el mes de lanzamiento
-df["year"] = df["releaseDate"].dt.year
-df["month"] = df["releaseDate"].dt.month  # 1 = Enero, 12 = Diciembre
 
-df["profit"] = df["revenue"] - df["budget"]
+def ranking_frame(df):
+    # Filas sobre las que se calculan los top-K: df o, con MUESTRA, las candidatas exactas
+    return df if ranking_rows is None else ranking_rows
+
+
+def enriched_columns(df, columns):
+    # Columnas de enriquecimiento.py presentes en df (ninguna si no se corrió)
+    return [col for col in columns if col in df.columns]
 
-# Para mostrar todos los valores monetarios en millones
-df["budget_millions"] = df["budget"] / 1_000_000
-df["revenue_millions"] = df["revenue"] / 1_000_000
-df["profit_millions"] = df["profit"] / 1_000_000
 
 # -----------------------------------------------------------
 # (a) Las 10 películas con mayor presupuesto
 # -----------------------------------------------------------
-top_budget_movies = df.nlargest(10, "budget_millions")[["title", "budget_millions"]].dropna()
+def section_a(df):
+    # Los rankings usan solo montos reportados (no imputados)
+    ranked = ranking_frame(df)
+    reported = ranked[~ranked["budget_imputed"]]
+    top_budget_movies = reported.nlargest(10, "budget_millions")[["title", "budget_millions"]].dropna()
+
+    register_table("a", "top_budget_movies", top_budget_movies)
 
-print("\n(a) 🎬 Top 10 películas con mayor presupuesto (en millones):")
-print(top_budget_movies)
+    print("\n(a) 🎬 Top 10 películas con mayor presupuesto (en millones):")
+    print(top_budget_movies)
+
+    # Gráfico de barras horizontales
+    plot(ChartSpec(
+        "a_top_budget", "barh", top_budget_movies, x="title", y="budget_millions",
+        title="Top 10 películas con mayor presupuesto (millones)",
+        xlabel="Presupuesto (Millones USD)", color="skyblue",
+        options={"invert_y": True},
+    ))
 
-# Gráfico de barras horizontales
-plt.figure(figsize=(8, 6))
-plt.barh(top_budget_movies["title"], top_budget_movies["budget_millions"], color="skyblue")
-plt.xlabel("Presupuesto (Millones USD)")
-plt.title("Top 10 películas con mayor presupuesto (millones)")
-plt.gca().invert_yaxis()
-plt.tight_layout()
-plt.show()
 
 # -----------------------------------------------------------
 # (b) Las 10 películas con mayor ingreso (revenue)
 # -----------------------------------------------------------
-top_revenue_movies = df.nlargest(10, "revenue")[["title", "revenue"]].dropna()
+def section_b(df):
+    ranked = ranking_frame(df)
+    reported = ranked[~ranked["revenue_imputed"]]
+    columns = ["title", "revenue"] + enriched_columns(ranked, ["boxOfficeGross", "boxOfficeOpeningGross"])
+    top_revenue_movies = reported.nlargest(10, "revenue")[columns].dropna(subset=["title", "revenue"])
+
+    register_table("b", "top_revenue_movies", top_revenue_movies)
 
-top_revenue_movies["revenue"] = top_revenue_movies["revenue"].apply(lambda x: f"${x:,.0f}")
+    print("\n(b) 💰 Top 10 películas con mayor ingreso:")
+    print(top_revenue_movies.to_string(index=False, formatters=dict.fromkeys(columns[1:], format_currency)))
 
-print("\n(b) 💰 Top 10 películas con mayor ingreso:")
-print(top_revenue_movies.to_string(index=False))
+    # Gráfico de barras horizontales
+    plot(ChartSpec(
+        "b_top_revenue", "barh", top_revenue_movies, x="title", y="revenue",
+        title="Top 10 películas con mayor ingreso",
+        xlabel="Ingresos (Billones de USD)", color="gold",
+        options={"invert_y": True},
+    ))
 
-# Gráfico de barras horizontales
-plt.figure(figsize=(8, 6))
-plt.barh(top_revenue_movies["title"], df.nlargest(10, "revenue")["revenue"], color="gold")
-plt.xlabel("Ingresos (Billones de USD)")
-plt.title("Top 10 películas con mayor ingreso")
-plt.gca().invert_yaxis()
-plt.tight_layout()
-plt.show()
 
 # -----------------------------------------------------------
 # (c) La película con más votos
 # -----------------------------------------------------------
-# Obtenemos el índice de la fila con la máxima 'voteCount'
-most_voted_movie = df.loc[df["voteCount"].idxmax(), ["title", "voteCount"]]
-print("\n(c) 🏆 Película con más votos:")
-print(most_voted_movie)
-
-# mostrar también el top 5
-top_5_voted = df.nlargest(5, "voteCount")[["title", "voteCount"]]
-print("\nTop 5 películas con más votos:")
-print(top_5_voted)
-
-plt.figure(figsize=(8, 5))
-plt.bar(top_5_voted["title"], top_5_voted["voteCount"], color="orange")
-plt.xticks(rotation=45, ha="right")
-plt.xlabel("Título")
-plt.ylabel("Cantidad de votos")
-plt.title("Top 5 películas con más votos")
-plt.tight_layout()
-plt.show()
+def section_c(df):
+    # Obtenemos el índice de la fila con la máxima 'voteCount'
+    ranked = ranking_frame(df)
+    most_voted_movie = ranked.loc[ranked["voteCount"].idxmax(), ["title", "voteCount"]]
+    print("\n(c) 🏆 Película con más votos:")
+    print(most_voted_movie)
+
+    # mostrar también el top 5
+    columns = ["title", "voteCount"] + enriched_columns(ranked, ["externalRatingCount", "externalRatingMean"])
+    top_5_voted = ranked.nlargest(5, "voteCount")[columns]
+    register_table("c", "top_voted_movies", top_5_voted)
+    print("\nTop 5 películas con más votos:")
+    print(top_5_voted)
+
+    plot(ChartSpec(
+        "c_top_voted", "bar", top_5_voted, x="title", y="voteCount",
+        title="Top 5 películas con más votos",
+        xlabel="Título", ylabel="Cantidad de votos", color="orange", figsize=(8, 5),
+        options={"rotation": 45, "ha": "right"},
+    ))
+
 
 # -----------------------------------------------------------
 # (d) Peor película de acuerdo a los votos de los usuarios
 # -----------------------------------------------------------
-worst_movies = df.nsmallest(10, "voteAvg")[["title", "voteAvg", "voteCount"]]
-
-print("\n(d) ❌ Top 10 peores películas según los votos de los usuarios:")
-print(worst_movies)
-
-# Gráfico de barras horizontales
-plt.figure(figsize=(7, 4)) 
-plt.barh(worst_movies["title"], worst_movies["voteAvg"], color="red")
-plt.xlabel("Promedio de Votos")
-plt.title("Top 10 peores películas según los usuarios")
-plt.xlim(0, 5)
-plt.gca().invert_yaxis()
-plt.xticks(fontsize=9)
-plt.yticks(fontsize=7)
-plt.tight_layout()
-plt.show()
+def section_d(df):
+    # Ranking por calificación ponderada: las películas con pocos votos no dominan
+    worst_movies = rating_model.top(ranking_frame(df), 10, ["title", "voteAvg", "voteCount", "weightedRating"], ascending=True)
+    register_table("d", "worst_movies", worst_movies)
+
+    print(f"\n(d) ❌ Top 10 peores películas según los votos de los usuarios (mínimo {rating_model.min_votes} votos):")
+    print(worst_movies)
+
+    # Gráfico de barras horizontales
+    plot(ChartSpec(
+        "d_worst_movies", "barh", worst_movies, x="title", y="weightedRating",
+        title="Top 10 peores películas según los usuarios",
+        xlabel="Calificación ponderada por votos", color="red", figsize=(7, 4),
+        options={"invert_y": True, "xlim": (0, 10), "xtick_fontsize": 9, "ytick_fontsize": 7},
+    ))
+
 
 # -----------------------------------------------------------
 # (e) Cuántas películas se hicieron por año (gráfico de barras)
 # -----------------------------------------------------------
-df_1960 = df[df["year"] >= 1960].copy()
+def section_e(df):
+    df_1960 = df[df["year"] >= 1960].copy()
+
+    movies_per_year_1960 = df_1960["year"].value_counts().sort_index()
+    register_table("e", "movies_per_year", movies_per_year_1960)
+    print("\n(e) 📅 Número de películas por año (desde 1960):")
+    print(movies_per_year_1960)
 
-movies_per_year_1960 = df_1960["year"].value_counts().sort_index()
-print("\n(e) 📅 Número de películas por año (desde 1960):")
-print(movies_per_year_1960)
+    plot(ChartSpec(
+        "e_movies_per_year", "bar", movies_per_year_1960,
+        title="Número de películas producidas por año (desde 1960)",
+        xlabel="Año (>= 1960)", ylabel="Número de películas", color="lightgreen", figsize=(12, 6),
+    ))
 
-plt.figure(figsize=(12, 6))
-plt.bar(movies_per_year_1960.index, movies_per_year_1960.values, color="lightgreen")
-plt.xlabel("Año (>= 1960)")
-plt.ylabel("Número de películas")
-plt.title("Número de películas producidas por año (desde 1960)")
-plt.tight_layout()
-plt.show()
 
 # -----------------------------------------------------------
 # (f) Género principal de las 20 películas más recientes
 # -----------------------------------------------------------
-recent_movies = df.sort_values(by="releaseDate", ascending=False).head(20)
-recent_movies["genre_main"] = recent_movies["genres"].str.split("|").str[0]
+def section_f(df):
+    recent_movies = df.sort_values(by="releaseDate", ascending=False).head(20)
+    recent_movies["genre_main"] = recent_movies["genres"].str.split("|").str[0]
 
-print("\n(f) 🎬 Género de las 20 películas más recientes:")
-print(recent_movies[["title", "releaseDate", "genre_main"]])
+    register_table("f", "recent_movies_genre", recent_movies[["title", "releaseDate", "genre_main"]])
 
-# -----------------------------------------------------------
-# (f) Género principal que predomina en el conjunto de datos
-# -----------------------------------------------------------
-df["genre_main"] = df["genres"].str.split("|").str[0]
-genre_counts = df["genre_main"].value_counts()
-
-print("\n📊 Género principal más frecuente en todo el dataset:")
-print(genre_counts.head(10))
-
-# Gráfico de barras de la distribución de géneros
-plt.figure(figsize=(10, 5))
-genre_counts.head(10).plot(kind="bar", color="skyblue")
-plt.xlabel("Género")
-plt.ylabel("Cantidad de Películas")
-plt.title("Top 10 Géneros más frecuentes en el dataset")
-plt.xticks(rotation=45, ha="right")
-plt.tight_layout()
-plt.show()
+    print("\n(f) 🎬 Género de las 20 películas más recientes:")
+    print(recent_movies[["title", "releaseDate", "genre_main"]])
+
+    # -----------------------------------------------------------
+    # (f) Género principal que predomina en el conjunto de datos
+    # -----------------------------------------------------------
+    df["genre_main"] = df["genres"].str.split("|").str[0]
+    genre_counts = df["genre_main"].value_counts()
+    register_table("f", "main_genre_counts", genre_counts)
+
+    print("\n📊 Género principal más frecuente en todo el dataset:")
+    print(genre_counts.head(10))
+
+    # Gráfico de barras de la distribución de géneros
+    plot(ChartSpec(
+        "f_main_genres", "bar", genre_counts.head(10),
+        title="Top 10 Géneros más frecuentes en el dataset",
+        xlabel="Género", ylabel="Cantidad de Películas", color="skyblue", figsize=(10, 5),
+        options={"categorical": True, "rotation": 45, "ha": "right"},
+    ))
+
+    # -----------------------------------------------------------
+    # (f) Género de las películas más largas
+    # -----------------------------------------------------------
+    longest_movies = ranking_frame(df).nlargest(10, "runtime")[["title", "runtime", "genre_main"]]
+    register_table("f", "longest_movies", longest_movies)
+    print("\n🎥 Género principal de las películas más largas:")
+    print(longest_movies)
+
+    # Gráfico de barras horizontales
+    plot(ChartSpec(
+        "f_longest_movies", "barh", longest_movies, x="title", y="runtime",
+        title="Top 10 Películas más largas",
+        xlabel="Duración (minutos)", color="lightcoral", figsize=(8, 5),
+        options={"invert_y": True},
+    ))
 
-# -----------------------------------------------------------
-# (f) Género de las películas más largas
-# -----------------------------------------------------------
-longest_movies = df.nlargest(10, "runtime")[["title", "runtime", "genre_main"]]
-print("\n🎥 Género principal de las películas más largas:")
-print(longest_movies)
-
-# Gráfico de barras horizontales
-plt.figure(figsize=(8, 5))
-plt.barh(longest_movies["title"], longest_movies["runtime"], color="lightcoral")
-plt.xlabel("Duración (minutos)")
-plt.title("Top 10 Películas más largas")
-plt.gca().invert_yaxis()
-plt.tight_layout()
-plt.show()
 
 # -----------------------------------------------------------
 # (g) Los géneros que generaron más ganancias
 # -----------------------------------------------------------
-df["genres"] = df["genres"].fillna("")
-df["genres"] = df["genres"].apply(lambda x: x.split("|") if isinstance(x, str) else [])
-
-genres_profit = (
-    df.explode("genres")
-      .groupby("genres")["profit_millions"]
-      .sum()
-      .sort_values(ascending=False)
-)
-
-print("\n(g) 💰 Géneros con más ganancias (totales, en millones):")
-print(genres_profit.head(10))
-
-# Gráfico de barras para los 10 géneros con mayores ganancias
-plt.figure(figsize=(10, 6))
-genres_profit.head(10).plot(kind='bar', color="green")
-plt.xlabel("Género")
-plt.ylabel("Ganancia total (Millones USD)")
-plt.title("Top 10 géneros con más ganancias (en millones)")
-plt.xticks(rotation=45, ha="right")
-plt.tight_layout()
-plt.show()
+def section_g(df):
+    genres_profit = aggregate("genre_profit", df)
+
+    register_table("g", "genres_profit", genres_profit)
+
+    print("\n(g) 💰 Géneros con más ganancias (totales, en millones):")
+    print(genres_profit.head(10))
+
+    # Gráfico de barras para los 10 géneros con mayores ganancias
+    plot(ChartSpec(
+        "g_genres_profit", "bar", genres_profit.head(10),
+        title="Top 10 géneros con más ganancias (en millones)",
+        xlabel="Género", ylabel="Ganancia total (Millones USD)", color="green", figsize=(10, 6),
+        options={"categorical": True, "rotation": 45, "ha": "right"},
+    ))
+
 
 # -----------------------------------------------------------
 # (h) ¿La cantidad de actores influye en los ingresos?
 # -----------------------------------------------------------
-plt.figure(figsize=(8, 6))
-sns.scatterplot(data=df, x="actorsAmount", y="revenue", alpha=0.5)
-plt.xlabel("Cantidad de Actores")
-plt.ylabel("Ingresos (USD)")
-plt.title("Relación entre la cantidad de actores y los ingresos")
-plt.show()
+def section_h(df):
+    plot(ChartSpec(
+        "h_actors_vs_revenue", "scatter", df[["actorsAmount", "revenue"]], x="actorsAmount", y="revenue",
+        title="Relación entre la cantidad de actores y los ingresos",
+        xlabel="Cantidad de Actores", ylabel="Ingresos (USD)",
+        options={"alpha": 0.5, "tight": False},
+    ))
 
-# Calcular correlación entre actores y ingresos
-correlation = df[["actorsAmount", "revenue"]].corr().iloc[0, 1]
-print(f"\n📊 Correlación entre cantidad de actores e ingresos: {correlation:.2f}")
+    # Calcular correlación entre actores y ingresos
+    correlation = df[["actorsAmount", "revenue"]].corr().iloc[0, 1]
+    register_value("h", "corr_actors_revenue", correlation)
+    print(f"\n📊 Correlación entre cantidad de actores e ingresos: {correlation:.2f}")
 
-# -----------------------------------------------------------
-# (h) ¿Se han hecho películas con más actores en los últimos años?
-# -----------------------------------------------------------
-avg_actors_per_year = df.groupby("year")["actorsAmount"].mean()
+    # -----------------------------------------------------------
+    # (h) ¿Se han hecho películas con más actores en los últimos años?
+    # -----------------------------------------------------------
+    avg_actors_per_year = df.groupby("year")["actorsAmount"].mean()
+    register_table("h", "avg_actors_per_year", avg_actors_per_year)
+
+    plot(ChartSpec(
+        "h_actors_per_year", "line", avg_actors_per_year,
+        title="Evolución del número de actores en las películas",
+        xlabel="Año", ylabel="Promedio de Actores por Película", color="purple", figsize=(10, 5),
+        options={"grid": True, "tight": False},
+    ))
 
-plt.figure(figsize=(10, 5))
-plt.plot(avg_actors_per_year.index, avg_actors_per_year.values, marker="o", linestyle="-", color="purple")
-plt.xlabel("Año")
-plt.ylabel("Promedio de Actores por Película")
-plt.title("Evolución del número de actores en las películas")
-plt.grid()
-plt.show()
 
 # -----------------------------------------------------------
 # (i) Influencia del reparto (hombres/mujeres) en popularidad e ingresos
 # -----------------------------------------------------------
+def section_i(df):
+    # ------------------------------------------------------------------------------
+    # 1) Y 2) AGRUPAR POR RANGOS (RANGOS_REPARTO, los mismos en toda la sección) Y CALCULAR PROMEDIOS
+    # ------------------------------------------------------------------------------
+    women = df["castWomenAmount"].to_numpy(dtype=float)
+    men = df["castMenAmount"].to_numpy(dtype=float)
+    women_edges = rangos.resolve_edges(women, CAST_EDGE_MODE)
+    men_edges = rangos.resolve_edges(men, CAST_EDGE_MODE)
+    cast_means = aggregate("cast_range_means", df, women_edges, men_edges)
+    women_popularity_mean = cast_means["women_popularity_mean"]
+    women_revenue_mean = cast_means["women_revenue_mean"]
+
+    men_popularity_mean = cast_means["men_popularity_mean"]
+    men_revenue_mean = cast_means["men_revenue_mean"]
+
+    register_table("i", "women_popularity_mean", women_popularity_mean)
+    register_table("i", "women_revenue_mean", women_revenue_mean)
+    register_table("i", "men_popularity_mean", men_popularity_mean)
+    register_table("i", "men_revenue_mean", men_revenue_mean)
+
+    print("Promedio de popularidad por rango de actrices:\n", women_popularity_mean, "\n")
+    print("Promedio de ingresos por rango de actrices:\n", women_revenue_mean, "\n")
+
+    print("Promedio de popularidad por rango de actores:\n", men_popularity_mean, "\n")
+    print("Promedio de ingresos por rango de actores:\n", men_revenue_mean, "\n")
+
+    # ------------------------------------------------------------------------------
+    # 3) GRÁFICOS DE BARRAS PARA VISUALIZAR ESOS PROMEDIOS
+    # ------------------------------------------------------------------------------
+    plot(ChartSpec("i_cast_ranges", "grid", [
+        # (a) Popularidad por rango de actrices
+        ChartSpec("", "bar", women_popularity_mean, palette="Blues",
+                  title="Popularidad promedio por rango de actrices",
+                  xlabel="Rango de actrices", ylabel="Popularidad promedio", options={"categorical": True}),
+        # (b) Ingresos por rango de actrices
+        ChartSpec("", "bar", women_revenue_mean, palette="Greens",
+                  title="Ingresos promedio (millones) por rango de actrices",
+                  xlabel="Rango de actrices", ylabel="Ingresos promedio (M USD)", options={"categorical": True}),
+        # (c) Popularidad por rango de actores
+        ChartSpec("", "bar", men_popularity_mean, palette="Blues",
+                  title="Popularidad promedio por rango de actores",
+                  xlabel="Rango de actores", ylabel="Popularidad promedio", options={"categorical": True}),
+        # (d) Ingresos por rango de actores
+        ChartSpec("", "bar", men_revenue_mean, palette="Greens",
+                  title="Ingresos promedio (millones) por rango de actores",
+                  xlabel="Rango de actores", ylabel="Ingresos promedio (M USD)", options={"categorical": True}),
+    ], figsize=(14, 10)))
+
+    # ------------------------------------------------------------------------------
+    # 4) CALCULAR CORRELACIONES
+    # ------------------------------------------------------------------------------
+
+    corr_women_popularity = df["castWomenAmount"].corr(df["popularity"])
+    corr_women_revenue = df["castWomenAmount"].corr(df["revenue_millions"])
+
+    corr_men_popularity = df["castMenAmount"].corr(df["popularity"])
+    corr_men_revenue = df["castMenAmount"].corr(df["revenue_millions"])
+
+    register_value("i", "corr_women_popularity", corr_women_popularity)
+    register_value("i", "corr_women_revenue", corr_women_revenue)
+    register_value("i", "corr_men_popularity", corr_men_popularity)
+    register_value("i", "corr_men_revenue", corr_men_revenue)
+
+    print(f"Correlación (cantidad de actrices vs. popularidad): {corr_women_popularity:.3f}")
+    print(f"Correlación (cantidad de actrices vs. ingresos MUSD): {corr_women_revenue:.3f}")
+    print(f"Correlación (cantidad de actores vs. popularidad): {corr_men_popularity:.3f}")
+    print(f"Correlación (cantidad de actores vs. ingresos MUSD): {corr_men_revenue:.3f}")
+
+    # ------------------------------------------------------------------------------
+    # 5) TABLA CRUZADA (RANGO DE ACTRICES x RANGO DE ACTORES)
+    # ------------------------------------------------------------------------------
+    contingency = rangos.cast_contingency(
+        women, men,
+        df["popularity"].to_numpy(dtype=float),
+        df["revenue_millions"].to_numpy(dtype=float),
+        women_edges, men_edges,
+    )
+
+    for name, table in contingency.items():
+        register_table("i", f"cast_contingency_{name}", table)
+
+    print("\nCantidad de películas por (rango de actrices x rango de actores):\n", contingency["count"])
+    print("\nIngresos promedio (M USD) por (rango de actrices x rango de actores):\n",
+          contingency["revenue_mean"].round(2))
 
-# 1) DEFINIR RANGOS PARA AGRUPAR
-women_bins = [0, 2, 5, 10, 20, 50, 200]  
-women_labels = ["0-2", "3-5", "6-10", "11-20", "21-50", "50+"]
-
-men_bins = [0, 2, 5, 10, 20, 50, 200]
-men_labels = ["0-2", "3-5", "6-10", "11-20", "21-50", "50+"]
-
-df["castWomenRange"] = pd.cut(df["castWomenAmount"], bins=women_bins, labels=women_labels)
-df["castMenRange"] = pd.cut(df["castMenAmount"], bins=men_bins, labels=men_labels)
-
-# ------------------------------------------------------------------------------
-# 2) CALCULAR PROMEDIOS DE POPULARIDAD E INGRESOS POR CADA RANGO
-# ------------------------------------------------------------------------------
-women_popularity_mean = df.groupby("castWomenRange")["popularity"].mean()
-women_revenue_mean = df.groupby("castWomenRange")["revenue_millions"].mean()
-
-men_popularity_mean = df.groupby("castMenRange")["popularity"].mean()
-men_revenue_mean = df.groupby("castMenRange")["revenue_millions"].mean()
-
-print("Promedio de popularidad por rango de actrices:\n", women_popularity_mean, "\n")
-print("Promedio de ingresos por rango de actrices:\n", women_revenue_mean, "\n")
-
-print("Promedio de popularidad por rango de actores:\n", men_popularity_mean, "\n")
-print("Promedio de ingresos por rango de actores:\n", men_revenue_mean, "\n")
-
-# ------------------------------------------------------------------------------
-# 3) GRÁFICOS DE BARRAS PARA VISUALIZAR ESOS PROMEDIOS
-# ------------------------------------------------------------------------------
-fig, axes = plt.subplots(2, 2, figsize=(14, 10))
-
-# (a) Popularidad por rango de actrices
-sns.barplot(
-    ax=axes[0, 0],
-    x=women_popularity_mean.index,
-    y=women_popularity_mean.values,
-    palette="Blues"
-)
-axes[0, 0].set_title("Popularidad promedio por rango de actrices")
-axes[0, 0].set_xlabel("Rango de actrices")
-axes[0, 0].set_ylabel("Popularidad promedio")
-
-# (b) Ingresos por rango de actrices
-sns.barplot(
-    ax=axes[0, 1],
-    x=women_revenue_mean.index,
-    y=women_revenue_mean.values,
-    palette="Greens"
-)
-axes[0, 1].set_title("Ingresos promedio (millones) por rango de actrices")
-axes[0, 1].set_xlabel("Rango de actrices")
-axes[0, 1].set_ylabel("Ingresos promedio (M USD)")
-
-# (c) Popularidad por rango de actores
-sns.barplot(
-    ax=axes[1, 0],
-    x=men_popularity_mean.index,
-    y=men_popularity_mean.values,
-    palette="Blues"
-)
-axes[1, 0].set_title("Popularidad promedio por rango de actores")
-axes[1, 0].set_xlabel("Rango de actores")
-axes[1, 0].set_ylabel("Popularidad promedio")
-
-# (d) Ingresos por rango de actores
-sns.barplot(
-    ax=axes[1, 1],
-    x=men_revenue_mean.index,
-    y=men_revenue_mean.values,
-    palette="Greens"
-)
-axes[1, 1].set_title("Ingresos promedio (millones) por rango de actores")
-axes[1, 1].set_xlabel("Rango de actores")
-axes[1, 1].set_ylabel("Ingresos promedio (M USD)")
-
-plt.tight_layout()
-plt.show()
-
-# ------------------------------------------------------------------------------
-# 4) CALCULAR CORRELACIONES
-# ------------------------------------------------------------------------------
-
-corr_women_popularity = df["castWomenAmount"].corr(df["popularity"])
-corr_women_revenue = df["castWomenAmount"].corr(df["revenue_millions"])
-
-corr_men_popularity = df["castMenAmount"].corr(df["popularity"])
-corr_men_revenue = df["castMenAmount"].corr(df["revenue_millions"])
-
-print(f"Correlación (cantidad de actrices vs. popularidad): {corr_women_popularity:.3f}")
-print(f"Correlación (cantidad de actrices vs. ingresos MUSD): {corr_women_revenue:.3f}")
-print(f"Correlación (cantidad de actores vs. popularidad): {corr_men_popularity:.3f}")
-print(f"Correlación (cantidad de actores vs. ingresos MUSD): {corr_men_revenue:.3f}")
 
 # -----------------------------------------------------------
 # (j) Obtener las 20 películas mejor calificadas
 # -----------------------------------------------------------
-top_rated_movies = df.nlargest(20, "voteAvg")[["title", "voteAvg", "director"]].dropna()
-top_rated_movies["director"] = top_rated_movies["director"].apply(lambda x: x if len(x) <= 30 else x[:27] + "...")
+def section_j(df):
+    ranked = ranking_frame(df)
+    top_rated_movies = rating_model.top(
+        ranked[ranked["director"].notna()], 20, ["title", "voteAvg", "voteCount", "weightedRating", "director"])
+
+    print(f"\n(g) 🎬 Directores de las 20 películas mejor calificadas (mínimo {rating_model.min_votes} votos):")
+    print(top_rated_movies.to_string(index=False))
+
+    # Conteo por director con el índice de entidades: nombres completos (sin
+    # truncar) y las películas con varios directores cuentan para cada uno.
+    # Se indexan solo las películas del Top 20: los empates quedan en el orden
+    # del ranking, igual con o sin MUESTRA
+    top_directors = EntityIndex(top_rated_movies["director"].to_numpy(), name="director")
+    director_counts = top_directors.count_in(np.ones(len(top_rated_movies), dtype=bool))
 
-print("\n(g) 🎬 Directores de las 20 películas mejor calificadas:")
-print(top_rated_movies.to_string(index=False))
+    register_table("j", "top_rated_movies", top_rated_movies)
+    register_table("j", "top_rated_director_counts", director_counts)
 
-director_counts = top_rated_movies["director"].value_counts()
+    # Rankings sobre todo el catálogo
+    entities = build_entities(df)
+    director_ranking = entities["director"].ranking(
+        df["weightedRating"].to_numpy(dtype=float), by="mean", k=10, min_movies=ENTITY_MIN_MOVIES)
+    company_ranking = entities["company"].ranking(
+        df["revenue_millions"].to_numpy(dtype=float), by="sum", k=10)
+    register_table("j", "director_rating_ranking", director_ranking)
+    register_table("j", "company_revenue_ranking", company_ranking)
+
+    print(f"\n🎬 Directores con mejor calificación ponderada promedio (mínimo {ENTITY_MIN_MOVIES} películas):")
+    print(director_ranking[["movies", "mean"]].to_string(float_format=lambda x: f"{x:.2f}"))
+    print("\n🏢 Productoras con mayores ingresos totales (millones):")
+    print(company_ranking[["movies", "sum"]].to_string(float_format=format_number))
+
+    # Gráfico de los directores con más películas en el Top 20
+    plot(ChartSpec(
+        "j_top_rated_directors", "bar", director_counts,
+        title="Directores con más películas mejor calificadas",
+        xlabel="Director", ylabel="Cantidad de películas en el Top 20", color="royalblue", figsize=(8, 4),
+        options={"categorical": True, "rotation": 45, "ha": "right", "xtick_fontsize": 9},
+    ))
 
-# Gráfico de los directores con más películas en el Top 20
-plt.figure(figsize=(8, 4))
-director_counts.plot(kind="bar", color="royalblue")
-plt.xlabel("Director")
-plt.ylabel("Cantidad de películas en el Top 20")
-plt.title("Directores con más películas mejor calificadas")
-plt.xticks(rotation=45, ha="right", fontsize=9)
-plt.tight_layout()
-plt.show()
 
 # -----------------------------------------------------------
 # (k) Relación entre presupuesto e ingresos (histograma y diagrama de dispersión)
 # -----------------------------------------------------------
+def section_k(df):
+    df["budget_millions"] = df["budget"] / 1_000_000
+    df["revenue_millions"] = df["revenue"] / 1_000_000
+
+    # 1) Diagrama de dispersión
+    plot(ChartSpec(
+        "k_budget_vs_revenue", "scatter", df[["budget_millions", "revenue_millions"]],
+        x="budget_millions", y="revenue_millions",
+        title="Relación entre Presupuesto e Ingresos (en millones)",
+        xlabel="Presupuesto (Millones USD)", ylabel="Ingresos (Millones USD)", color="purple",
+        options={"alpha": 0.5},
+    ))
+
+    # 2) Histograma de la diferencia (o de la propia variable)
+    plot(ChartSpec(
+        "k_budget_hist", "hist", df["budget_millions"],
+        title="Distribución del Presupuesto (en millones)",
+        xlabel="Presupuesto (Millones USD)", ylabel="Frecuencia", color="teal", figsize=(8, 5),
+        options={"bins": 50, "edgecolor": "black", "xlim": (0, 200)},
+    ))
 
-df["budget_millions"] = df["budget"] / 1_000_000
-df["revenue_millions"] = df["revenue"] / 1_000_000
-
-# 1) Diagrama de dispersión
-plt.figure(figsize=(8, 6))
-plt.scatter(df["budget_millions"], df["revenue_millions"], alpha=0.5, color="purple")
-plt.xlabel("Presupuesto (Millones USD)")
-plt.ylabel("Ingresos (Millones USD)")
-plt.title("Relación entre Presupuesto e Ingresos (en millones)")
-plt.tight_layout()
-plt.show()
-
-# 2) Histograma de la diferencia (o de la propia variable)
-plt.figure(figsize=(8, 5))
-plt.hist(df["budget_millions"].dropna(), bins=50, color="teal", edgecolor="black")
-plt.xlim(0, 200)  
-plt.xlabel("Presupuesto (Millones USD)")
-plt.ylabel("Frecuencia")
-plt.title("Distribución del Presupuesto (en millones)")
-plt.tight_layout()
-plt.show()
 
 # -----------------------------------------------------------
 # (l) ¿Se asocian ciertos meses de lanzamiento con mejores ingresos?
 # -----------------------------------------------------------
+def section_l(df):
+    monthly_revenue = aggregate("monthly_mean", df, "revenue")
+    register_table("l", "monthly_revenue", monthly_revenue)
 
-monthly_revenue = df.groupby("month")["revenue"].mean().sort_index()
-formatted_revenue = monthly_revenue.apply(lambda x: f"${x:,.0f}")
+    print("\n📅 Promedio de ingresos por mes:")
+    print(monthly_revenue.to_string(float_format=format_currency))
 
-print("\n📅 Promedio de ingresos por mes:")
-print(formatted_revenue)
+    # Gráfico de barras
+    plot(ChartSpec(
+        "l_monthly_revenue", "bar", monthly_revenue,
+        title="Promedio de ingresos por mes de lanzamiento",
+        xlabel="Mes de lanzamiento", ylabel="Ingreso promedio (Millones de USD)",
+        color="royalblue", figsize=(10, 5),
+        options={"xticks": list(range(1, 13)), "xticklabels": MONTH_NAMES, "rotation": 45},
+    ))
 
-# Gráfico de barras
-plt.figure(figsize=(10, 5))
-plt.bar(monthly_revenue.index, monthly_revenue.values, color="royalblue")
-plt.xlabel("Mes de lanzamiento")
-plt.ylabel("Ingreso promedio (Millones de USD)")
-plt.xticks(range(1, 13), ["Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio", "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"], rotation=45)
-plt.title("Promedio de ingresos por mes de lanzamiento")
-plt.tight_layout()
-plt.show()
 
 # -----------------------------------------------------------
 # (m) En qué meses se lanzaron las películas con mayores ingresos
 #     y el promedio de ingresos por mes
 # -----------------------------------------------------------
-# 1) Calculamos el total o el promedio de ingresos por mes
-revenue_by_month = df.groupby("month")["revenue_millions"].mean().sort_values(ascending=False)
-print("\n(m) Meses con mayores ingresos (PROMEDIO, en millones):")
-print(revenue_by_month)
-
-# 2) Gráfico de barras para ver el promedio de ingresos por mes
-plt.figure(figsize=(8, 5))
-plt.bar(revenue_by_month.index, revenue_by_month.values, color="gold")
-plt.xlabel("Mes de lanzamiento")
-plt.ylabel("Ingresos promedio (Millones USD)")
-plt.title("Promedio de ingresos (millones) por mes de lanzamiento")
-plt.xticks(range(1, 13))
-plt.tight_layout()
-plt.show()
-
-top_income_movies = df.nlargest(50, "revenue_millions").dropna(subset=["month"])
-count_month_top = top_income_movies["month"].value_counts()
-
-plt.figure(figsize=(8, 5))
-plt.bar(count_month_top.index, count_month_top.values, color="tomato")
-plt.xlabel("Mes de lanzamiento")
-plt.ylabel("Nº de películas (top 50 en ingresos)")
-plt.title("Distribución de meses de lanzamiento en el top 50 de ingresos")
-plt.xticks(range(1, 13))
-plt.tight_layout()
-plt.show()
+def section_m(df):
+    # 1) Calculamos el total o el promedio de ingresos por mes
+    revenue_by_month = aggregate("monthly_mean", df, "revenue_millions").sort_values(ascending=False)
+    register_table("m", "revenue_by_month", revenue_by_month)
+    print("\n(m) Meses con mayores ingresos (PROMEDIO, en millones):")
+    print(revenue_by_month)
+
+    # 2) Gráfico de barras para ver el promedio de ingresos por mes
+    plot(ChartSpec(
+        "m_revenue_by_month", "bar", revenue_by_month,
+        title="Promedio de ingresos (millones) por mes de lanzamiento",
+        xlabel="Mes de lanzamiento", ylabel="Ingresos promedio (Millones USD)",
+        color="gold", figsize=(8, 5), options={"xticks": list(range(1, 13))},
+    ))
+
+    ranked = ranking_frame(df)
+    top_income_movies = ranked[~ranked["revenue_imputed"]].nlargest(50, "revenue_millions").dropna(subset=["month"])
+    count_month_top = top_income_movies["month"].value_counts()
+    register_table("m", "top50_revenue_month_counts", count_month_top)
+
+    plot(ChartSpec(
+        "m_top50_months", "bar", count_month_top,
+        title="Distribución de meses de lanzamiento en el top 50 de ingresos",
+        xlabel="Mes de lanzamiento", ylabel="Nº de películas (top 50 en ingresos)",
+        color="tomato", figsize=(8, 5), options={"xticks": list(range(1, 13))},
+    ))
+
+    # 3) Con taquilla externa: recaudación promedio de la semana de estreno por mes
+    if "boxOfficeOpeningGross" in df.columns:
+        opening = df.assign(opening_millions=df["boxOfficeOpeningGross"] / 1_000_000)
+        opening_by_month = agregaciones.monthly_mean(opening, "opening_millions").dropna()
+        register_table("m", "opening_gross_by_month", opening_by_month)
+        print("\nRecaudación promedio de la semana de estreno por mes (en millones):")
+        print(opening_by_month)
+
 
 # -----------------------------------------------------------
 # (n) Correlación entre calificaciones y éxito comercial
 # -----------------------------------------------------------
-correlation = df[["voteAvg", "revenue"]].corr().iloc[0, 1]
+def section_n(df):
+    correlation = df[["voteAvg", "revenue"]].corr().iloc[0, 1]
+    register_value("n", "corr_voteavg_revenue", correlation)
+
+    print(f"\n⭐ Correlación entre calificaciones y éxito comercial: {correlation:.2f}")
 
-print(f"\n⭐ Correlación entre calificaciones y éxito comercial: {correlation:.2f}")
+    # Con las fuentes externas: taquilla vs revenue y calificación externa vs voteAvg
+    for name, pair in (("corr_revenue_box_office", ["revenue", "boxOfficeGross"]),
+                       ("corr_voteavg_external_rating", ["voteAvg", "externalRatingMean"])):
+        if pair[1] in df.columns:
+            value = df[pair].corr().iloc[0, 1]
+            register_value("n", name, value)
+            print(f"   Correlación {pair[0]} / {pair[1]}: {value:.2f}")
 
-# Gráfico de dispersión
-plt.figure(figsize=(8, 6))
-plt.scatter(df["voteAvg"], df["revenue"], alpha=0.5)
-plt.xlabel("Calificación Promedio (voteAvg)")
-plt.ylabel("Ingresos (USD)")
-plt.title("Relación entre Calificaciones y Éxito Comercial")
-plt.grid(True)
-plt.show()
+    # Gráfico de dispersión
+    plot(ChartSpec(
+        "n_votes_vs_revenue", "scatter", df[["voteAvg", "revenue"]], x="voteAvg", y="revenue",
+        title="Relación entre Calificaciones y Éxito Comercial",
+        xlabel="Calificación Promedio (voteAvg)", ylabel="Ingresos (USD)",
+        options={"alpha": 0.5, "grid": True, "tight": False},
+    ))
 
 
 # -----------------------------------------------------------
 # (o) Estrategias de marketing (videos promocionales o páginas oficiales)
 #     que generaron mejores resultados.
 # -----------------------------------------------------------
-# 1) Si no existe la columna booleana, la creamos:
-df["has_homepage"] = ~df["homePage"].isna()
-
-# 2) Agrupar y calcular promedios
-marketing_video_revenue = df.groupby("video")["revenue_millions"].mean()
-marketing_video_popularity = df.groupby("video")["popularity"].mean()
-
-marketing_homepage_revenue = df.groupby("has_homepage")["revenue_millions"].mean()
-marketing_homepage_popularity = df.groupby("has_homepage")["popularity"].mean()
-
-print("\nPromedio de ingresos (millones) según 'video':\n", marketing_video_revenue)
-print("\nPromedio de popularidad según 'video':\n", marketing_video_popularity)
-
-print("\nPromedio de ingresos (millones) según 'has_homepage':\n", marketing_homepage_revenue)
-print("\nPromedio de popularidad según 'has_homepage':\n", marketing_homepage_popularity)
-
-# 3) Gráficos de barras para ver de forma clara
-fig, axes = plt.subplots(2, 2, figsize=(12, 10))
-
-# (a) Ingresos vs. video
-sns.barplot(
-    ax=axes[0, 0],
-    x=marketing_video_revenue.index.astype(str),  
-    y=marketing_video_revenue.values,
-    palette="Set2"
-)
-axes[0, 0].set_title("Ingresos promedio (millones) según 'video'")
-axes[0, 0].set_xlabel("¿Tiene video promocional?")
-axes[0, 0].set_ylabel("Ingresos promedio (M USD)")
-
-# (b) Popularidad vs. video
-sns.barplot(
-    ax=axes[0, 1],
-    x=marketing_video_popularity.index.astype(str),
-    y=marketing_video_popularity.values,
-    palette="Set2"
-)
-axes[0, 1].set_title("Popularidad promedio según 'video'")
-axes[0, 1].set_xlabel("¿Tiene video promocional?")
-axes[0, 1].set_ylabel("Popularidad promedio")
-
-# (c) Ingresos vs. has_homepage
-sns.barplot(
-    ax=axes[1, 0],
-    x=marketing_homepage_revenue.index.astype(str),
-    y=marketing_homepage_revenue.values,
-    palette="Set2"
-)
-axes[1, 0].set_title("Ingresos promedio (millones) según 'has_homepage'")
-axes[1, 0].set_xlabel("¿Tiene página oficial?")
-axes[1, 0].set_ylabel("Ingresos promedio (M USD)")
-
-# (d) Popularidad vs. has_homepage
-sns.barplot(
-    ax=axes[1, 1],
-    x=marketing_homepage_popularity.index.astype(str),
-    y=marketing_homepage_popularity.values,
-    palette="Set2"
-)
-axes[1, 1].set_title("Popularidad promedio según 'has_homepage'")
-axes[1, 1].set_xlabel("¿Tiene página oficial?")
-axes[1, 1].set_ylabel("Popularidad promedio")
-
-plt.tight_layout()
-plt.show()
-
-# Combinación (video + has_homepage)
-combo_revenue = df.groupby(["video", "has_homepage"])["revenue_millions"].mean()
-combo_popularity = df.groupby(["video", "has_homepage"])["popularity"].mean()
-
-print("\nIngresos promedio (millones) por (video, has_homepage):\n", combo_revenue)
-print("\nPopularidad promedio por (video, has_homepage):\n", combo_popularity)
+def section_o(df):
+    # 1) Si no existe la columna booleana, la creamos:
+    df["has_homepage"] = ~df["homePage"].isna()
+
+    # 2) Agrupar y calcular promedios
+    marketing = aggregate("marketing_means", df)
+    marketing_video_revenue = marketing["video_revenue_mean"]
+    marketing_video_popularity = marketing["video_popularity_mean"]
+
+    marketing_homepage_revenue = marketing["homepage_revenue_mean"]
+    marketing_homepage_popularity = marketing["homepage_popularity_mean"]
+
+    register_table("o", "video_revenue_mean", marketing_video_revenue)
+    register_table("o", "video_popularity_mean", marketing_video_popularity)
+    register_table("o", "homepage_revenue_mean", marketing_homepage_revenue)
+    register_table("o", "homepage_popularity_mean", marketing_homepage_popularity)
+
+    print("\nPromedio de ingresos (millones) según 'video':\n", marketing_video_revenue)
+    print("\nPromedio de popularidad según 'video':\n", marketing_video_popularity)
+
+    print("\nPromedio de ingresos (millones) según 'has_homepage':\n", marketing_homepage_revenue)
+    print("\nPromedio de popularidad según 'has_homepage':\n", marketing_homepage_popularity)
+
+    # 3) Gráficos de barras para ver de forma clara
+    plot(ChartSpec("o_marketing", "grid", [
+        # (a) Ingresos vs. video
+        ChartSpec("", "bar", marketing_video_revenue, palette="Set2",
+                  title="Ingresos promedio (millones) según 'video'",
+                  xlabel="¿Tiene video promocional?", ylabel="Ingresos promedio (M USD)",
+                  options={"categorical": True}),
+        # (b) Popularidad vs. video
+        ChartSpec("", "bar", marketing_video_popularity, palette="Set2",
+                  title="Popularidad promedio según 'video'",
+                  xlabel="¿Tiene video promocional?", ylabel="Popularidad promedio",
+                  options={"categorical": True}),
+        # (c) Ingresos vs. has_homepage
+        ChartSpec("", "bar", marketing_homepage_revenue, palette="Set2",
+                  title="Ingresos promedio (millones) según 'has_homepage'",
+                  xlabel="¿Tiene página oficial?", ylabel="Ingresos promedio (M USD)",
+                  options={"categorical": True}),
+        # (d) Popularidad vs. has_homepage
+        ChartSpec("", "bar", marketing_homepage_popularity, palette="Set2",
+                  title="Popularidad promedio según 'has_homepage'",
+                  xlabel="¿Tiene página oficial?", ylabel="Popularidad promedio",
+                  options={"categorical": True}),
+    ], figsize=(12, 10)))
+
+    # Combinación (video + has_homepage)
+    combo_revenue = marketing["combo_revenue_mean"]
+    combo_popularity = marketing["combo_popularity_mean"]
+
+    register_table("o", "combo_revenue_mean", combo_revenue)
+    register_table("o", "combo_popularity_mean", combo_popularity)
+
+    print("\nIngresos promedio (millones) por (video, has_homepage):\n", combo_revenue)
+    print("\nPopularidad promedio por (video, has_homepage):\n", combo_popularity)
 
 
 # ----------------------------------------------------------------------
 # (p) ¿Popularidad del elenco directamente correlacionada con el éxito?
 # ----------------------------------------------------------------------
-# Convertir 'actorsPopularity' en valores numéricos (promedio de la lista)
-def parse_and_average(popularity_str):
-    try:
-        values = list(map(float, popularity_str.split("|")))  # Convertir cada número a float
-        return np.mean(values) if values else np.nan  # Calcular el promedio
-    except:
-        return np.nan  # Si hay un error, devolver NaN
-
-# Aplicar la conversión a la columna 'actorsPopularity'
-df["actorsPopularity"] = df["actorsPopularity"].astype(str).apply(parse_and_average)
-
-# Calcular la correlación
-correlation_cast_popularity = df["actorsPopularity"].corr(df["revenue"])
-
-print(f"\n🎭 Correlación entre popularidad del elenco y éxito de taquilla: {correlation_cast_popularity:.2f}")
-
-# Gráfico de dispersión
-plt.figure(figsize=(8, 6))
-sns.scatterplot(x=df["actorsPopularity"], y=df["revenue"], alpha=0.5)
-plt.xlabel("Popularidad del Elenco (Promedio de actorsPopularity)")
-plt.ylabel("Ingresos (USD)")
-plt.title("Relación entre Popularidad del Elenco y Éxito de Taquilla")
-plt.show()
\ No newline at end of file
+def section_p(df):
+    # 'actorsPopularity' ya es el promedio numérico de la lista (ver preparacion.prepare)
+    # Calcular la correlación
+    correlation_cast_popularity = df["actorsPopularity"].corr(df["revenue"])
+    register_value("p", "corr_cast_popularity_revenue", correlation_cast_popularity)
+
+    print(f"\n🎭 Correlación entre popularidad del elenco y éxito de taquilla: {correlation_cast_popularity:.2f}")
+
+    # Gráfico de dispersión
+    plot(ChartSpec(
+        "p_cast_popularity_vs_revenue", "scatter", df[["actorsPopularity", "revenue"]],
+        x="actorsPopularity", y="revenue",
+        title="Relación entre Popularidad del Elenco y Éxito de Taquilla",
+        xlabel="Popularidad del Elenco (Promedio de actorsPopularity)", ylabel="Ingresos (USD)",
+        options={"alpha": 0.5, "tight": False},
+    ))
+
+
+SECTIONS = [
+    ("a", section_a),
+    ("b", section_b),
+    ("c", section_c),
+    ("d", section_d),
+    ("e", section_e),
+    ("f", section_f),
+    ("g", section_g),
+    ("h", section_h),
+    ("i", section_i),
+    ("j", section_j),
+    ("k", section_k),
+    ("l", section_l),
+    ("m", section_m),
+    ("n", section_n),
+    ("o", section_o),
+    ("p", section_p),
+]
+
+
+def shared_code_signature():
+    # Código del que dependen todas las secciones: los módulos auxiliares y el
+    # resto de ejercicios.py (constantes, funciones comunes, run)
+    with open(os.path.abspath(__file__), encoding="utf-8") as f:
+        source = f.read()
+    for _, section in SECTIONS:
+        source = source.replace(inspect.getsource(section), "")
+    helpers = [name for name in EJERCICIOS_CODE if name != "ejercicios.py"]
+    return code_signature(*src_paths(helpers)) + hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+
+
+def run(data_dir=DATA_DIR):
+    # Ejecuta todas las secciones sobre <data_dir>/movies_clean.csv
+    global sql_backend, ranking_rows
+
+    clean_path = clean_data_path(data_dir)
+    store_path = os.path.join(data_dir, "movies_clean.sqlite")
+    run_registry = exportar.registry_mark()
+
+    # MUESTRA=<método>:<cantidad>: las secciones corren sobre una muestra;
+    # reservorio lee el CSV por bloques sin cargarlo completo
+    sampling_plan = muestreo.SamplingPlan.from_env()
+    sample = ranking_rows = sql_backend = None
+    if sampling_plan is not None and sampling_plan.streaming:
+        with stage(f"sample:{sampling_plan.method}") as info:
+            sample, ranking_rows = muestreo.stream_sample(clean_path, sampling_plan)
+            info["rows"] = sample.population
+        df = sample.frame
+    else:
+        df = load_data(clean_path)
+        if sampling_plan is not None:
+            with stage(f"sample:{sampling_plan.method}", rows=len(df)):
+                ranking_rows = muestreo.ranking_candidates(df, rating_model.min_votes)
+                sample = muestreo.draw_sample(df, sampling_plan)
+            df = sample.frame.copy()
+
+    # IMPUTADOS=excluir: los valores imputados de budget/revenue vuelven a NaN
+    exclude_imputed = os.environ.get("IMPUTADOS", "incluir") == "excluir"
+    if exclude_imputed:
+        df = reported_only(df)
+        if ranking_rows is not None:
+            ranking_rows = reported_only(ranking_rows)
+
+    if sample is not None:
+        sampling_errors = muestreo.sampling_errors(sample)
+        register_table("muestra", "sampling_errors_ejercicios", sampling_errors)
+        register_value("muestra", "sample_rows_ejercicios", len(sample.frame))
+        register_value("muestra", "population_rows_ejercicios", sample.population)
+        muestreo.print_sampling_report(sample, sampling_errors)
+
+    # Con muestra, las agregaciones también salen de la muestra (motor pandas)
+    if os.environ.get("MOTOR", "pandas") == "sql" and sample is not None:
+        print("\n⚠️  MUESTRA usa el motor pandas sobre la muestra (se ignora MOTOR=sql)")
+    elif os.environ.get("MOTOR", "pandas") == "sql":
+        import motor_sql
+
+        with stage("build_sql_store", rows=len(df)):
+            motor_sql.build_store(clean_path, store_path, reported_only=exclude_imputed)
+        sql_backend = motor_sql.SqlBackend(store_path)
+
+    # Cada sección guarda sus tablas, valores y gráficos como punto de
+    # control: si la corrida anterior falló en (p), se reanuda desde (p)
+    checkpoints = Checkpoints(data_dir)
+    inputs = {"data": file_signature(clean_path), "enriched": file_signature(enriched_path(clean_path)),
+              "env": env_signature(), "shared_code": shared_code_signature()}
+    for letter, section in SECTIONS:
+        name = f"ejercicios/section:{letter}"
+        signature = dict(inputs, code=code_signature(section))
+        if checkpoints.done(name, signature):
+            saved = checkpoints.load(name)
+            exportar.restore_registry(saved["registry"])
+            graficos.requeue(saved["charts"])
+            print(f"\n⏭️  Sección ({letter}) reutilizada del punto de control")
+            continue
+
+        registry, charts = exportar.registry_mark(), graficos.pending_mark()
+        start = time.perf_counter()
+        try:
+            with stage(f"section:{letter}", rows=len(df)):
+                section(df)
+        except Exception as e:
+            checkpoints.fail(name, signature, time.perf_counter() - start, e)
+            raise
+        checkpoints.complete(name, signature, time.perf_counter() - start, payload={
+            "registry": exportar.registry_since(registry), "charts": graficos.pending_since(charts),
+        })
+
+    # Intervalos de confianza y p-valores por remuestreo (opcional):
+    #   SIGNIFICANCIA=<iteraciones> [SIGNIFICANCIA_SEGUNDOS=<presupuesto>]
+    if os.environ.get("SIGNIFICANCIA"):
+        import remuestreo
+
+        with stage("significance", rows=len(df)):
+            significance = remuestreo.significance_report(
+                remuestreo.build_tests(df),
+                n_iter=int(os.environ["SIGNIFICANCIA"]),
+                time_budget=float(os.environ.get("SIGNIFICANCIA_SEGUNDOS", 60)),
+            )
+        register_table("significance", "significance_tests", significance)
+        print("\n📐 Intervalos de confianza (95%) y p-valores por remuestreo:")
+        print(significance.to_string(index=False, float_format=lambda x: f"{x:.4f}"))
+
+    if sample is not None:
+        tables = exportar.registry_since(run_registry)["tables"]
+        register_table("muestra", "sampling_annotations_ejercicios",
+                       muestreo.table_annotations(tables, EXACT_TABLES, sample))
+
+    with stage("render_figures"):
+        flush()
+
+    write_sqlite(os.path.join(data_dir, "resultados.sqlite"), source="ejercicios", mark=run_registry)
+    write_report("ejercicios", data_dir)
+
+
+if __name__ == "__main__":
+    # Uso: python src/ejercicios.py [carpeta_de_datos]
+    run(sys.argv[1] if len(sys.argv) > 1 else DATA_DIR)
@@ -0,0 +1,327 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from exportar import register_table, write_sqlite
+from fechas import detect_format, parse_dates, release_dates, to_epoch_days
+from ingesta import dataset_encoding, detect_encoding, write_metadata
+from perfilado import stage, write_report
+from preparacion import DATA_DIR, clean_data_path, enriched_path
+from puntos_control import file_signature
+
+# -----------------------------------------------------------
+# Enriquecimiento con archivos externos de taquilla y calificaciones
+# -----------------------------------------------------------
+# Dos fuentes locales opcionales, con millones de filas, que nunca se
+# cargan completas:
+#   - taquilla semanal (TAQUILLA=<csv>):
+#       id | title + year, week, gross[, theaters]
+#   - historial de calificaciones (HISTORIAL_CALIFICACIONES=<csv>):
+#       id | title + year, date, rating (0-10)[, votes]
+# Cada fila se asocia a una película por id o, si no trae id, por título
+# normalizado + año de estreno (también contra originalTitle; un título +
+# año que corresponde a más de una película se descarta por ambiguo).
+#
+# Cómo se hace:
+#   1. Índices hash sobre el CSV limpio (una pasada por bloques de
+#      id/title/originalTitle/fecha): id -> posición y "título|año" ->
+#      posición (pd.Index.get_indexer).
+#   2. Cada archivo externo se lee por bloques; cada bloque se resuelve a
+#      posiciones con los índices y se acumula por película con
+#      np.bincount / ufunc.at en arreglos del tamaño del catálogo. La
+#      memoria no depende del tamaño de los archivos externos.
+#   3. El resultado (una fila por película con datos) se guarda en
+#      movies_clean.enriched.csv, en el orden del CSV limpio. load_data()
+#      lo une por id al cargar (ver preparacion.py) y las secciones de
+#      ingresos y votos usan sus columnas si están.
+#
+# Uso: python src/enriquecimiento.py [carpeta_de_datos] [--taquilla <csv>]
+#        [--calificaciones <csv>] [--bloque <filas>]
+
+CHUNK_ROWS = 500_000
+# Días desde 1970-01-01 del 2000-01-01: origen del tiempo en la tendencia
+TREND_ORIGIN_DAY = 10_957
+# Día faltante (los días antes de 1970 son negativos)
+NO_DAY = np.iinfo(np.int64).min
+DAYS_PER_YEAR = 365.25
+
+BOX_OFFICE_COLUMNS = ["boxOfficeGross", "boxOfficeWeeks", "boxOfficePeakWeek", "boxOfficeOpeningWeek",
+                      "boxOfficeOpeningGross"]
+RATING_COLUMNS = ["externalRatingCount", "externalRatingMean", "externalRatingTrend", "externalRatingLast"]
+
+
+# -----------------------------------------------------------
+# Índices hash sobre el catálogo limpio
+# -----------------------------------------------------------
+def title_keys(titles, years):
+    # "título normalizado|año": sin tildes, minúsculas, solo letras y números
+    normalized = (titles.fillna("").astype(str).str.normalize("NFKD")
+                  .str.encode("ascii", errors="ignore").str.decode("ascii")
+                  .str.lower().str.replace(r"[^a-z0-9]+", " ", regex=True).str.strip())
+    years = pd.to_numeric(years, errors="coerce")
+    keys = normalized + "|" + years.astype("Int64").astype(str)
+    return keys.where((normalized != "") & years.notna())
+
+
+class MovieKeys:
+    def __init__(self, ids, key_frame):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        # id -> posición (primera aparición si hubiera repetidos)
+        first = ~pd.Index(self.ids).duplicated()
+        self.id_index = pd.Index(self.ids[first])
+        self.id_positions = np.flatnonzero(first)
+
+        # título|año -> posición; los que apuntan a varias películas se descartan
+        pairs = key_frame.dropna().drop_duplicates()
+        ambiguous = pairs["key"].duplicated(keep=False)
+        self.n_ambiguous = int(pairs.loc[ambiguous, "key"].nunique())
+        pairs = pairs[~ambiguous]
+        self.title_index = pd.Index(pairs["key"].to_numpy())
+        self.title_positions = pairs["position"].to_numpy(dtype=np.int64)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_csv(cls, csv_path, chunk_rows=CHUNK_ROWS):
+        encoding = dataset_encoding(csv_path)
+        header = pd.read_csv(csv_path, nrows=0, encoding=encoding).columns
+        usecols = [c for c in ("id", "title", "originalTitle", "releaseDate", "releaseDay") if c in header]
+        ids, frames, offset = [], [], 0
+        for chunk in pd.read_csv(csv_path, usecols=usecols, chunksize=chunk_rows, encoding=encoding):
+            positions = np.arange(offset, offset + len(chunk))
+            offset += len(chunk)
+            ids.append(pd.to_numeric(chunk["id"], errors="coerce").fillna(-1).to_numpy(dtype=np.int64))
+            year = release_dates(chunk).dt.year
+            for col in ("title", "originalTitle"):
+                if col in chunk.columns:
+                    frames.append(pd.DataFrame({"key": title_keys(chunk[col], year).to_numpy(),
+                                                "position": positions}))
+        key_frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["key", "position"])
+        return cls(np.concatenate(ids) if ids else [], key_frame)
+
+    def lookup(self, chunk):
+        # Posición de cada fila externa en el catálogo (-1 si no se encuentra) y cómo se encontró
+        positions = np.full(len(chunk), -1, dtype=np.int64)
+        by_id = np.zeros(len(chunk), dtype=bool)
+        if "id" in chunk.columns:
+            ids = pd.to_numeric(chunk["id"], errors="coerce").to_numpy(dtype=float)
+            valid = ~np.isnan(ids)
+            hit = self.id_index.get_indexer(ids[valid].astype(np.int64))
+            found = np.where(hit >= 0, self.id_positions[np.maximum(hit, 0)], -1)
+            positions[valid] = found
+            by_id[valid] = found >= 0
+        if "title" in chunk.columns and "year" in chunk.columns:
+            pending = positions < 0
+            keys = title_keys(chunk["title"][pending], chunk["year"][pending])
+            hit = self.title_index.get_indexer(keys.fillna("").to_numpy())
+            positions[pending] = np.where(hit >= 0, self.title_positions[np.maximum(hit, 0)], -1)
+        return positions, by_id
+
+
+# -----------------------------------------------------------
+# Acumuladores por película
+# -----------------------------------------------------------
+class BoxOfficeTotals:
+    def __init__(self, n_movies):
+        self.gross = np.zeros(n_movies)
+        self.weeks = np.zeros(n_movies, dtype=np.int64)
+        self.peak = np.full(n_movies, -np.inf)
+        self.opening_day = np.full(n_movies, np.iinfo(np.int64).max)
+        self.opening_gross = np.full(n_movies, np.nan)
+
+    def update(self, positions, days, gross):
+        n = len(self.gross)
+        self.gross += np.bincount(positions, weights=gross, minlength=n)
+        self.weeks += np.bincount(positions, minlength=n)
+        np.maximum.at(self.peak, positions, gross)
+
+        # Semana de estreno: la primera semana de cada película en el bloque
+        dated = days != NO_DAY
+        p, d, g = positions[dated], days[dated], gross[dated]
+        order = np.lexsort((d, p))
+        first_movie, first = np.unique(p[order], return_index=True)
+        first_day, first_gross = d[order][first], g[order][first]
+        earlier = first_day < self.opening_day[first_movie]
+        self.opening_day[first_movie[earlier]] = first_day[earlier]
+        self.opening_gross[first_movie[earlier]] = first_gross[earlier]
+
+    def frame(self):
+        has = self.weeks > 0
+        opening = np.where(self.opening_day < np.iinfo(np.int64).max, self.opening_day, NO_DAY)
+        return pd.DataFrame({
+            "boxOfficeGross": np.where(has, self.gross, np.nan),
+            "boxOfficeWeeks": self.weeks,
+            "boxOfficePeakWeek": np.where(has, self.peak, np.nan),
+            "boxOfficeOpeningWeek": _day_strings(opening),
+            "boxOfficeOpeningGross": self.opening_gross,
+        })[has]
+
+
+class RatingHistory:
+    # Sumas ponderadas por votos: media y pendiente (mínimos cuadrados del
+    # rating contra el tiempo, en puntos por año) se combinan sumando. Las
+    # filas sin fecha cuentan para la media pero no para la pendiente: sus
+    # sumas de tendencia usan el peso d = w solo si la fila tiene fecha
+    def __init__(self, n_movies):
+        self.sums = np.zeros((7, n_movies))   # w, w·r, d, d·r, d·t, d·t², d·t·r
+        self.last_day = np.full(n_movies, NO_DAY, dtype=np.int64)
+
+    def update(self, positions, days, ratings, votes):
+        n = self.sums.shape[1]
+        dated = days != NO_DAY
+        t = np.where(dated, (days - TREND_ORIGIN_DAY) / DAYS_PER_YEAR, 0.0)
+        d = np.where(dated, votes, 0.0)
+        for i, weights in enumerate((votes, votes * ratings, d, d * ratings, d * t, d * t * t, d * t * ratings)):
+            self.sums[i] += np.bincount(positions, weights=weights, minlength=n)
+        np.maximum.at(self.last_day, positions, days)
+
+    def frame(self):
+        w, wr, d, dr, dt, dtt, dtr = self.sums
+        has = w > 0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = wr / w
+            spread = d * dtt - dt * dt
+            trend = np.where(spread > 1e-9 * np.maximum(d * dtt, 1), (d * dtr - dt * dr) / spread, np.nan)
+        return pd.DataFrame({
+            "externalRatingCount": w,
+            "externalRatingMean": mean,
+            "externalRatingTrend": trend,
+            "externalRatingLast": _day_strings(self.last_day),
+        })[has]
+
+
+def _day_strings(days):
+    # Días desde 1970-01-01 -> "AAAA-MM-DD" ("" si falta)
+    days = np.asarray(days, dtype=np.int64)
+    missing = days == NO_DAY
+    text = np.where(missing, 0, days).astype("datetime64[D]").astype(str).astype(object)
+    text[missing] = ""
+    return text
+
+
+# -----------------------------------------------------------
+# Uniones por bloques
+# -----------------------------------------------------------
+def _read_external(path, columns, chunk_rows):
+    encoding = detect_encoding(path)
+    header = pd.read_csv(path, nrows=0, encoding="utf-8" if encoding == "mixed" else encoding,
+                         encoding_errors="replace").columns
+    missing = [c for c in columns if c not in header]
+    if missing:
+        raise ValueError(f"{os.path.basename(path)}: faltan las columnas {', '.join(missing)}")
+    if "id" not in header and not {"title", "year"} <= set(header):
+        raise ValueError(f"{os.path.basename(path)}: se necesita 'id' o 'title' + 'year' para unir")
+    usecols = [c for c in header if c in set(columns) | {"id", "title", "year", "votes"}]
+    return pd.read_csv(path, usecols=usecols, chunksize=chunk_rows, encoding_errors="replace",
+                       encoding="utf-8" if encoding == "mixed" else encoding)
+
+
+def _days(values, formats):
+    # Fechas de texto -> días desde 1970-01-01 (NO_DAY si no es una fecha).
+    # El formato se detecta en el primer bloque con fechas y se reutiliza en
+    # el resto del archivo (formats: columna -> formato)
+    if formats.get(values.name) is None:
+        formats[values.name] = detect_format(values)
+    days = to_epoch_days(parse_dates(values, formats[values.name]))
+    return np.where(days.isna(), NO_DAY, days.fillna(0)).astype(np.int64)
+
+
+def _join(keys, path, columns, chunk_rows, accumulate):
+    stats = {"source": os.path.basename(path), "rows": 0, "matched_id": 0, "matched_title": 0,
+             "unmatched": 0, "invalid": 0}
+    for chunk in _read_external(path, columns, chunk_rows):
+        positions, by_id = keys.lookup(chunk)
+        found = positions >= 0
+        valid = found & accumulate(chunk, positions, found)
+        stats["rows"] += len(chunk)
+        stats["matched_id"] += int((valid & by_id).sum())
+        stats["matched_title"] += int((valid & ~by_id).sum())
+        stats["unmatched"] += int((~found).sum())
+        stats["invalid"] += int((found & ~valid).sum())
+    return stats
+
+
+def join_box_office(keys, path, chunk_rows=CHUNK_ROWS):
+    totals, formats = BoxOfficeTotals(len(keys)), {}
+
+    def accumulate(chunk, positions, found):
+        gross = pd.to_numeric(chunk["gross"], errors="coerce").to_numpy(dtype=float)
+        valid = found & ~np.isnan(gross)
+        days = _days(chunk["week"], formats)
+        totals.update(positions[valid], days[valid], gross[valid])
+        return valid
+
+    stats = _join(keys, path, ["week", "gross"], chunk_rows, accumulate)
+    return totals.frame(), stats
+
+
+def join_rating_history(keys, path, chunk_rows=CHUNK_ROWS):
+    history, formats = RatingHistory(len(keys)), {}
+
+    def accumulate(chunk, positions, found):
+        ratings = pd.to_numeric(chunk["rating"], errors="coerce").to_numpy(dtype=float)
+        votes = (pd.to_numeric(chunk["votes"], errors="coerce").to_numpy(dtype=float)
+                 if "votes" in chunk.columns else np.ones(len(chunk)))
+        valid = found & ~np.isnan(ratings) & (ratings >= 0) & (ratings <= 10) & (votes > 0)
+        days = _days(chunk["date"], formats)
+        history.update(positions[valid], days[valid], ratings[valid], votes[valid])
+        return valid
+
+    stats = _join(keys, path, ["date", "rating"], chunk_rows, accumulate)
+    return history.frame(), stats
+
+
+def enrich(data_dir=DATA_DIR, box_office=None, ratings=None, chunk_rows=CHUNK_ROWS):
+    # Construye movies_clean.enriched.csv a partir de las fuentes externas indicadas
+    clean_path = clean_data_path(data_dir)
+    with stage("enrich:keys") as info:
+        keys = MovieKeys.from_csv(clean_path, chunk_rows)
+        info["rows"] = len(keys)
+    print(f"🔑 Índices: {len(keys.id_index):,} ids y {len(keys.title_index):,} títulos+año "
+          f"({keys.n_ambiguous:,} ambiguos descartados)")
+
+    parts, summary = [], []
+    for path, join, columns in ((box_office, join_box_office, BOX_OFFICE_COLUMNS),
+                                (ratings, join_rating_history, RATING_COLUMNS)):
+        if not path:
+            continue
+        with stage(f"enrich:{join.__name__[len('join_'):]}") as info:
+            frame, stats = join(keys, path, chunk_rows)
+            info["rows"] = stats["rows"]
+        parts.append(frame.reindex(columns=columns))
+        summary.append(stats)
+        print(f"🔗 {stats['source']}: {stats['rows']:,} filas, {stats['matched_id']:,} por id, "
+              f"{stats['matched_title']:,} por título+año, {stats['unmatched']:,} sin película, "
+              f"{stats['invalid']:,} con valores inválidos")
+
+    enriched = pd.concat(parts, axis=1).sort_index() if parts else pd.DataFrame()
+    enriched.insert(0, "id", keys.ids[enriched.index.to_numpy(dtype=np.int64)])
+    output_path = enriched_path(clean_path)
+    tmp_path = output_path + ".tmp"
+    enriched.to_csv(tmp_path, index=False, encoding="utf-8")
+    os.replace(tmp_path, output_path)
+    write_metadata(output_path, encoding="utf-8", clean=file_signature(clean_path),
+                   sources={os.path.abspath(p): file_signature(p) for p in (box_office, ratings) if p})
+
+    summary = pd.DataFrame(summary)
+    register_table("enriquecimiento", "enrichment_summary", summary)
+    print(f"\n✅ {len(enriched):,} películas enriquecidas guardadas en: {output_path}")
+    return enriched, summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Une taquilla semanal e historial de calificaciones al catálogo")
+    parser.add_argument("datos", nargs="?", default=DATA_DIR)
+    parser.add_argument("--taquilla", default=os.environ.get("TAQUILLA"))
+    parser.add_argument("--calificaciones", default=os.environ.get("HISTORIAL_CALIFICACIONES"))
+    parser.add_argument("--bloque", type=int, default=CHUNK_ROWS, help="filas por bloque al leer")
+    args = parser.parse_args()
+    if not args.taquilla and not args.calificaciones:
+        parser.error("indicar --taquilla y/o --calificaciones (o TAQUILLA / HISTORIAL_CALIFICACIONES)")
+
+    enrich(args.datos, args.taquilla, args.calificaciones, args.bloque)
+    write_sqlite(os.path.join(args.datos, "resultados.sqlite"), source="enriquecimiento")
+    write_report("enriquecimiento", args.datos)
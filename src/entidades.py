@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+# -----------------------------------------------------------
+# Diccionario de entidades: directores, productoras y países
+# -----------------------------------------------------------
+# Las columnas director, productionCompany y productionCountry guardan
+# listas separadas por "|". Cada nombre se separa una sola vez y se
+# convierte en un ID entero (factorize); los pares (película, entidad) se
+# ordenan por ID para tener un índice invertido tipo CSR:
+#   rows[offsets[id]:offsets[id + 1]] = posiciones de las películas de la entidad.
+# Los rankings se calculan sobre todo el catálogo con np.bincount.
+
+ENTITY_COLUMNS = {
+    "director": "director",
+    "company": "productionCompany",
+    "country": "productionCountry",
+}
+
+
+class EntityIndex:
+    def __init__(self, values, name=None):
+        self.name = name
+        self.n_movies = len(values)
+
+        # Un par (fila, nombre) por entidad de cada película
+        exploded = pd.Series(np.asarray(values, dtype=object)).str.split("|").explode().str.strip()
+        exploded = exploded[exploded.notna() & (exploded != "")]
+        movie_rows = exploded.index.to_numpy(dtype=np.int64)
+        codes, self.names = pd.factorize(exploded.to_numpy())
+        self.ids = {entity: i for i, entity in enumerate(self.names)}
+
+        # Índice invertido: pares ordenados por ID de entidad
+        order = np.argsort(codes, kind="stable")
+        self.codes = codes[order]
+        self.rows = movie_rows[order]
+        self.counts = np.bincount(self.codes, minlength=len(self.names))
+        self.offsets = np.concatenate([[0], np.cumsum(self.counts)])
+
+    def __len__(self):
+        return len(self.names)
+
+    def rows_for(self, entity):
+        # Posiciones de las películas de una entidad (vacío si no existe)
+        i = self.ids.get(entity)
+        if i is None:
+            return np.empty(0, dtype=np.int64)
+        return self.rows[self.offsets[i]:self.offsets[i + 1]]
+
+    def movie_mask(self, entity):
+        mask = np.zeros(self.n_movies, dtype=bool)
+        mask[self.rows_for(entity)] = True
+        return mask
+
+    def count_in(self, mask):
+        # Películas de cada entidad dentro de un subconjunto (máscara por película)
+        selected = np.asarray(mask, dtype=bool)[self.rows]
+        counts = np.bincount(self.codes[selected], minlength=len(self.names))
+        series = pd.Series(counts, index=pd.Index(self.names, name=self.name), name="movies")
+        return series[series > 0].sort_values(ascending=False, kind="stable")
+
+    def aggregate(self, values, min_movies=1):
+        # count / sum / mean de 'values' por entidad sobre todo el catálogo
+        values = np.asarray(values, dtype=float)[self.rows]
+        valid = ~np.isnan(values)
+        n = len(self.names)
+        counts = np.bincount(self.codes[valid], minlength=n)
+        sums = np.bincount(self.codes[valid], weights=values[valid], minlength=n)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = sums / counts
+        table = pd.DataFrame(
+            {"movies": self.counts, "count": counts, "sum": sums, "mean": means},
+            index=pd.Index(self.names, name=self.name),
+        )
+        return table[table["count"] >= min_movies]
+
+    def ranking(self, values, by="mean", k=10, min_movies=1):
+        table = self.aggregate(values, min_movies=min_movies)
+        return table.sort_values([by, "count"], ascending=False, kind="stable").head(k)
+
+
+def build_entities(df):
+    return {key: EntityIndex(df[column].to_numpy(), name=column) for key, column in ENTITY_COLUMNS.items()}
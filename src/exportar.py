@@ -0,0 +1,143 @@
+import itertools
+import os
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# -----------------------------------------------------------
+# Exportación de resultados a un único artefacto SQLite
+# -----------------------------------------------------------
+# Las secciones registran sus tablas y valores con tipos numéricos reales;
+# el formato de moneda/decimales se aplica solo al mostrarlos en consola.
+# Cada tabla se guarda como una tabla SQL y el catálogo "_catalog" indica
+# de qué sección y script proviene, para que los dashboards la lean directo.
+# Al escribir, una fuente reemplaza todo lo suyo: tablas y valores que
+# registró en una corrida anterior y ya no produce se eliminan.
+# Cada script escribe solo lo que registró desde su marca (registry_mark),
+# aunque varios corran en el mismo proceso.
+
+_tables = {}
+_values = []
+# Orden de registro de cada tabla (para registry_since)
+_stamps = {}
+_counter = itertools.count()
+
+
+def format_currency(x):
+    return f"${x:,.0f}" if pd.notna(x) else "N/A"
+
+
+def format_number(x):
+    return f"{x:,.2f}" if pd.notna(x) else "N/A"
+
+
+def _to_sql_scalar(value):
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _to_frame(table):
+    if isinstance(table, pd.Series):
+        table = table.to_frame(name=table.name if table.name is not None else "value")
+        table = table.reset_index()
+    else:
+        # Un índice sin nombre (posiciones de fila) no aporta información
+        table = table.reset_index(drop=list(table.index.names) == [None])
+
+    # SQLite no tiene tipos categóricos ni booleanos: se guardan como texto/enteros
+    for col in table.columns:
+        if isinstance(table[col].dtype, pd.CategoricalDtype):
+            table[col] = table[col].astype(str)
+        elif table[col].dtype == bool:
+            table[col] = table[col].astype("int64")
+        elif table[col].dtype == object:
+            # p. ej. describe() mezcla fechas y números en una misma columna
+            table[col] = table[col].map(_to_sql_scalar)
+    table.columns = [str(c) for c in table.columns]
+    return table
+
+
+def register_table(section, name, table):
+    _tables[name] = (section, _to_frame(table))
+    _stamps[name] = next(_counter)
+
+
+def register_value(section, name, value):
+    _values.append({"section": section, "name": name, "value": float(value)})
+
+
+def registry_mark():
+    # Punto de referencia para saber qué registró una etapa (ver puntos_control.py)
+    return next(_counter), len(_values)
+
+
+def registry_since(mark):
+    stamp, n_values = mark
+    return {
+        "tables": {name: entry for name, entry in _tables.items() if _stamps.get(name, -1) > stamp},
+        "values": list(_values[n_values:]),
+    }
+
+
+def restore_registry(saved):
+    for name, (section, frame) in saved["tables"].items():
+        _tables[name] = (section, frame)
+        _stamps[name] = next(_counter)
+    _values.extend(saved["values"])
+
+
+def registered_tables():
+    return {name: frame for name, (_, frame) in _tables.items()}
+
+
+def write_sqlite(path, source, mark=None):
+    # Escribe lo registrado desde mark (todo el registro si no se indica)
+    registry = registry_since(mark) if mark is not None else {"tables": _tables, "values": _values}
+    tables, values = registry["tables"], registry["values"]
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    written_at = datetime.now().isoformat(timespec="seconds")
+
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS _catalog ("
+            "table_name TEXT PRIMARY KEY, section TEXT, source TEXT, "
+            "n_rows INTEGER, written_at TEXT)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS _values ("
+            "source TEXT, section TEXT, name TEXT, value REAL, "
+            "PRIMARY KEY (source, name))"
+        )
+
+        # Tablas que esta fuente escribió antes y esta corrida ya no produce
+        # (p. ej. sin MUESTRA o sin enriquecimiento): se borran, no quedan como actuales
+        stale = [name for (name,) in conn.execute("SELECT table_name FROM _catalog WHERE source = ?", (source,))
+                 if name not in tables]
+        for name in stale:
+            conn.execute(f'DROP TABLE IF EXISTS "{name}"')
+            conn.execute("DELETE FROM _catalog WHERE table_name = ?", (name,))
+
+        for name, (section, frame) in tables.items():
+            frame.to_sql(name, conn, if_exists="replace", index=False)
+            conn.execute(
+                "INSERT OR REPLACE INTO _catalog VALUES (?, ?, ?, ?, ?)",
+                (name, section, source, len(frame), written_at),
+            )
+
+        conn.execute("DELETE FROM _values WHERE source = ?", (source,))
+        conn.executemany(
+            "INSERT INTO _values VALUES (?, ?, ?, ?)",
+            [(source, v["section"], v["name"], v["value"]) for v in values],
+        )
+
+    print(f"\n✅ {len(tables)} tablas y {len(values)} valores exportados a: {path}")
+
+
+def read_table(path, name):
+    with sqlite3.connect(path) as conn:
+        return pd.read_sql_query(f'SELECT * FROM "{name}"', conn)
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+
+# -----------------------------------------------------------
+# Fechas de estreno: detección de formato y conversión rápida
+# -----------------------------------------------------------
+# pd.to_datetime sin formato infiere el formato elemento por elemento en
+# los casos que no son ISO. Aquí:
+#   1. El formato se detecta una sola vez por fuente, probando DATE_FORMATS
+#      sobre una muestra de valores distintos (gana el que convierte más).
+#      Quien lee una fuente por bloques lo detecta en el primero y lo pasa
+#      (fmt=...) a los siguientes: una fecha ambigua como "03/04/2001" se
+#      interpreta igual en todo el archivo.
+#   2. Solo se convierten los valores distintos (pd.factorize), con formato
+#      fijo; las fechas se repiten mucho entre películas. Los que no encajan
+#      en el formato detectado se intentan con format="mixed".
+#   3. Las fechas ya convertidas se guardan en una caché por formato
+#      (texto -> días desde 1970-01-01) compartida entre llamadas, así los
+#      lectores por bloques no convierten dos veces la misma fecha.
+# El CSV limpio guarda además la columna releaseDay (int64, días desde
+# 1970-01-01): los lectores la usan directamente y no vuelven a convertir
+# texto (release_dates()).
+
+DATE_FORMATS = ["%Y-%m-%d", "%Y/%m/%d", "%d/%m/%Y", "%m/%d/%Y", "%d-%m-%Y", "%d.%m.%Y", "%Y%m%d",
+                "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S"]
+DAY_COLUMN = "releaseDay"
+SAMPLE_SIZE = 1000
+CACHE_LIMIT = 1_000_000
+
+# Una caché por formato: el mismo texto puede ser otra fecha en otro formato
+_caches = {}
+
+
+def detect_format(values, sample_size=SAMPLE_SIZE):
+    # Formato de DATE_FORMATS que convierte más valores de una muestra (None si ninguno)
+    sample = pd.Series(pd.unique(values.dropna().astype(str)))
+    if len(sample) > sample_size:
+        sample = sample.sample(sample_size, random_state=0)
+    if sample.empty:
+        return None
+    best, best_hits = None, 0
+    for fmt in DATE_FORMATS:
+        hits = int(pd.to_datetime(sample, format=fmt, errors="coerce").notna().sum())
+        if hits > best_hits:
+            best, best_hits = fmt, hits
+    return best
+
+
+def _parse_unique(uniques, fmt):
+    # Días desde 1970-01-01 (float, NaN si no es una fecha) de valores distintos
+    if fmt is not None:
+        parsed = pd.to_datetime(uniques, format=fmt, errors="coerce")
+    else:
+        parsed = pd.Series(pd.NaT, index=uniques.index, dtype="datetime64[ns]")
+    rest = parsed.isna()
+    if rest.any():
+        parsed[rest] = pd.to_datetime(uniques[rest], format="mixed", errors="coerce")
+    return to_epoch_days(parsed).astype("float64")
+
+
+def parse_dates(values, fmt=None):
+    # Equivalente a pd.to_datetime(values, errors="coerce") para texto de fechas.
+    # fmt: formato de la fuente; sin él se detecta sobre todos los valores de esta llamada
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    if pd.api.types.is_numeric_dtype(values):
+        return from_epoch_days(values)
+
+    codes, uniques = pd.factorize(values.astype(object).where(values.notna()), sort=False)
+    uniques = pd.Series(uniques.astype(str))
+    if fmt is None:
+        fmt = detect_format(uniques)
+    cache = _caches.get(fmt, pd.Series(dtype="float64"))
+    days = uniques.map(cache) if len(cache) else pd.Series(np.nan, index=uniques.index)
+    missing = days.isna() & ~uniques.isin(cache.index)
+    if missing.any():
+        new = _parse_unique(uniques[missing].reset_index(drop=True), fmt)
+        days[missing] = new.to_numpy()
+        if len(cache) < CACHE_LIMIT:
+            _caches[fmt] = pd.concat([cache, pd.Series(new.to_numpy(), index=uniques[missing].to_numpy())])
+
+    result = np.full(len(values), np.nan)
+    found = codes >= 0
+    result[found] = days.to_numpy()[codes[found]]
+    return from_epoch_days(pd.Series(result, index=values.index, name=values.name))
+
+
+def to_epoch_days(dates):
+    # datetime64 -> días desde 1970-01-01 (Int64, <NA> si falta)
+    dates = pd.Series(dates)
+    days = dates.to_numpy(dtype="datetime64[ns]").astype("datetime64[D]").astype(np.int64)
+    return pd.Series(days, index=dates.index, name=DAY_COLUMN).astype("Int64").mask(dates.isna())
+
+
+def from_epoch_days(days):
+    # días desde 1970-01-01 -> datetime64 (NaT si falta)
+    # Conversión entera datetime64[D] -> [ns]: pd.to_datetime(unit="D") con NaN
+    # puede fallar con "overflow encountered in multiply" según los valores
+    days = pd.to_numeric(pd.Series(days), errors="coerce")
+    values = days.to_numpy(dtype="float64")
+    missing = np.isnan(values)
+    dates = np.where(missing, 0, values).astype(np.int64).astype("datetime64[D]").astype("datetime64[ns]")
+    dates[missing] = np.datetime64("NaT")
+    return pd.Series(dates, index=days.index, name=days.name)
+
+
+def release_dates(frame, fmt=None):
+    # Fechas de estreno de un bloque/DataFrame: releaseDay si existe, si no releaseDate
+    if DAY_COLUMN in frame.columns:
+        dates = from_epoch_days(frame[DAY_COLUMN])
+    else:
+        dates = parse_dates(frame["releaseDate"], fmt)
+    return dates.rename("releaseDate")
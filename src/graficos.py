@@ -0,0 +1,296 @@
+import hashlib
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+# -----------------------------------------------------------
+# Especificación declarativa de gráficos con caché de renderizado
+# -----------------------------------------------------------
+# Las secciones describen cada gráfico con un ChartSpec (tipo, tabla de
+# datos, etiquetas) y llaman a plot(spec).
+#   - Sin FIGURAS: se dibuja y se muestra con plt.show(), como antes.
+#   - Con FIGURAS=<carpeta>: cada spec se guarda como PNG en segundo plano
+#     (backend Agg y una figura reutilizada) y flush() espera a que
+#     terminen. Cada PNG se identifica con un hash del spec y de sus datos;
+#     si no cambió desde la corrida anterior, no se vuelve a renderizar.
+
+output_dir = os.environ.get("FIGURAS")
+
+_pending = []
+
+
+@dataclass
+class ChartSpec:
+    name: str
+    kind: str                   # barh | bar | line | scatter | hist | histkde | grid
+    data: object                # Series (índice = x) o DataFrame con columnas x / y
+    x: str = None
+    y: str = None
+    title: str = ""
+    xlabel: str = ""
+    ylabel: str = ""
+    color: str = None
+    palette: str = None
+    figsize: tuple = (8, 6)
+    options: dict = field(default_factory=dict)
+
+
+# -----------------------------------------------------------
+# Hash del spec y de sus datos
+# -----------------------------------------------------------
+def _data_digest(data, h):
+    if isinstance(data, list):
+        for sub in data:
+            h.update(spec_hash(sub).encode())
+    elif isinstance(data, (pd.Series, pd.DataFrame)):
+        h.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+        names = data.columns if isinstance(data, pd.DataFrame) else [data.name]
+        h.update(repr(list(names)).encode())
+    else:
+        h.update(np.asarray(data).tobytes())
+
+
+def spec_hash(spec):
+    h = hashlib.sha256()
+    meta = {k: v for k, v in spec.__dict__.items() if k != "data"}
+    h.update(json.dumps(meta, sort_keys=True, default=str).encode())
+    _data_digest(spec.data, h)
+    return h.hexdigest()
+
+
+# -----------------------------------------------------------
+# Dibujo de un spec sobre un eje
+# -----------------------------------------------------------
+def _xy(spec):
+    if isinstance(spec.data, pd.Series):
+        return spec.data.index, spec.data.to_numpy()
+    return spec.data[spec.x], spec.data[spec.y]
+
+
+def _draw(ax, spec):
+    opts = spec.options
+
+    if spec.kind in ("barh", "bar"):
+        xs, ys = _xy(spec)
+        if spec.palette is not None:
+            import seaborn as sns
+            colors = sns.color_palette(spec.palette, len(ys))
+        else:
+            colors = spec.color
+        labels = [str(v) for v in xs] if opts.get("categorical", False) else xs
+        if spec.kind == "barh":
+            ax.barh(labels, ys, color=colors)
+        else:
+            ax.bar(labels, ys, color=colors)
+    elif spec.kind == "line":
+        xs, ys = _xy(spec)
+        ax.plot(xs, ys, marker=opts.get("marker", "o"), linestyle=opts.get("linestyle", "-"), color=spec.color)
+    elif spec.kind == "scatter":
+        xs, ys = _xy(spec)
+        ax.scatter(xs, ys, alpha=opts.get("alpha", 0.5), color=spec.color, s=opts.get("size", 20))
+    elif spec.kind == "hist":
+        values = spec.data.dropna()
+        ax.hist(values, bins=opts.get("bins", 30), color=spec.color, edgecolor=opts.get("edgecolor"))
+    elif spec.kind == "histkde":
+        import seaborn as sns
+        sns.histplot(spec.data, kde=True, bins=opts.get("bins", 30), ax=ax)
+    else:
+        raise ValueError(f"Tipo de gráfico desconocido: {spec.kind}")
+
+    ax.set_title(spec.title)
+    ax.set_xlabel(spec.xlabel)
+    ax.set_ylabel(spec.ylabel)
+
+    if opts.get("invert_y"):
+        ax.invert_yaxis()
+    if "xlim" in opts:
+        ax.set_xlim(*opts["xlim"])
+    if "xticks" in opts:
+        ax.set_xticks(opts["xticks"])
+        if "xticklabels" in opts:
+            ax.set_xticklabels(opts["xticklabels"])
+    if "rotation" in opts:
+        for label in ax.get_xticklabels():
+            label.set_rotation(opts["rotation"])
+            label.set_ha(opts.get("ha", "center"))
+    if "xtick_fontsize" in opts:
+        ax.tick_params(axis="x", labelsize=opts["xtick_fontsize"])
+    if "ytick_fontsize" in opts:
+        ax.tick_params(axis="y", labelsize=opts["ytick_fontsize"])
+    if opts.get("grid"):
+        ax.grid(True)
+
+
+def draw_figure(fig, spec):
+    fig.set_size_inches(*spec.figsize)
+    if spec.kind == "grid":
+        nrows, ncols = spec.options.get("shape", (2, 2))
+        axes = fig.subplots(nrows, ncols).ravel()
+        for ax, sub in zip(axes, spec.data):
+            _draw(ax, sub)
+    else:
+        _draw(fig.add_subplot(), spec)
+    if spec.options.get("tight", True):
+        fig.tight_layout()
+
+
+# -----------------------------------------------------------
+# Escritura en segundo plano
+# -----------------------------------------------------------
+# En modo archivo cada plot() se entrega a un escritor en segundo plano
+# (FIGURAS_ESCRITOR=proceso, por defecto, o hilo) a través de una cola
+# acotada de QUEUE_SIZE gráficos: la sección siguiente se calcula mientras
+# se rasterizan y comprimen los PNG de la anterior. Si la cola está llena,
+# plot() espera al gráfico más antiguo. flush() espera a que terminen todos
+# y actualiza manifest.json. FIGURAS_ESCRITOR=no renderiza todo en flush().
+
+QUEUE_SIZE = 8
+
+_figure = None
+
+
+def _render(spec, path):
+    # Una figura Agg reutilizada por proceso / hilo escritor; PNG temporal + rename
+    global _figure
+    if _figure is None:
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        _figure = Figure()
+        FigureCanvasAgg(_figure)
+    _figure.clf()
+    draw_figure(_figure, spec)
+    tmp_path = path[:-len(".png")] + ".tmp.png"
+    _figure.savefig(tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+class _Writer:
+    def __init__(self, directory, mode):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.manifest_path = _manifest_path(directory)
+        self.manifest = {}
+        if os.path.isfile(self.manifest_path):
+            with open(self.manifest_path, encoding="utf-8") as f:
+                self.manifest = json.load(f)
+        self.mode = mode
+        self.executor = None
+        self.in_flight = deque()
+        self.deferred = []
+        self.rendered = self.skipped = self.failed = 0
+
+    def submit(self, spec):
+        digest = spec_hash(spec)
+        path = os.path.join(self.directory, f"{spec.name}.png")
+        if self.manifest.get(spec.name) == digest and os.path.isfile(path):
+            self.skipped += 1
+            return
+        if self.mode == "no":
+            self.deferred.append((spec, digest, path))
+            return
+        if self.executor is None:
+            if self.mode == "hilo":
+                self.executor = ThreadPoolExecutor(max_workers=1)
+            else:
+                self.executor = ProcessPoolExecutor(max_workers=1)
+        self.in_flight.append((spec, digest, self.executor.submit(_render, spec, path)))
+        while len(self.in_flight) > QUEUE_SIZE:
+            self._collect(self.in_flight.popleft())
+
+    def _collect(self, item):
+        spec, digest, future = item
+        try:
+            future.result()
+        except Exception as e:
+            print(f"⚠️ No se pudo guardar el gráfico {spec.name}: {e}")
+            self.failed += 1
+            return
+        self.manifest[spec.name] = digest
+        self.rendered += 1
+
+    def close(self):
+        for spec, digest, path in self.deferred:
+            try:
+                _render(spec, path)
+            except Exception as e:
+                print(f"⚠️ No se pudo guardar el gráfico {spec.name}: {e}")
+                self.failed += 1
+                continue
+            self.manifest[spec.name] = digest
+            self.rendered += 1
+        while self.in_flight:
+            self._collect(self.in_flight.popleft())
+        if self.executor is not None:
+            self.executor.shutdown()
+
+        if self.rendered:
+            tmp_path = self.manifest_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.manifest, f, indent=2)
+            os.replace(tmp_path, self.manifest_path)
+        errors = f", {self.failed} con errores" if self.failed else ""
+        print(f"\n🖼️  Gráficos: {self.rendered} renderizados, {self.skipped} sin cambios{errors} "
+              f"(en {self.directory})")
+
+
+_writer = None
+
+
+def _writer_for(directory):
+    global _writer
+    if _writer is not None and _writer.directory != directory:
+        flush()
+    if _writer is None:
+        _writer = _Writer(directory, os.environ.get("FIGURAS_ESCRITOR", "proceso"))
+    return _writer
+
+
+# -----------------------------------------------------------
+# Modo interactivo y modo archivo (por lotes, con caché)
+# -----------------------------------------------------------
+def plot(spec):
+    if output_dir is None:
+        import matplotlib.pyplot as plt
+        fig = plt.figure(figsize=spec.figsize)
+        draw_figure(fig, spec)
+        plt.show()
+    else:
+        _pending.append(spec)
+        _writer_for(output_dir).submit(spec)
+
+
+def pending_mark():
+    return len(_pending)
+
+
+def pending_since(mark):
+    # Specs encolados desde pending_mark() (se guardan con el punto de control de la etapa)
+    return list(_pending[mark:])
+
+
+def requeue(specs):
+    # Specs de una etapa reanudada: se vuelven a encolar (la caché de hashes evita re-renderizar)
+    if output_dir is not None:
+        for spec in specs:
+            plot(spec)
+
+
+def _manifest_path(directory):
+    return os.path.join(directory, "manifest.json")
+
+
+def flush():
+    # Espera a que el escritor termine todos los gráficos encolados
+    global _writer
+    _pending.clear()
+    if _writer is None:
+        return
+    writer, _writer = _writer, None
+    writer.close()
@@ -0,0 +1,202 @@
+import numpy as np
+import pandas as pd
+
+from fechas import parse_dates
+
+# -----------------------------------------------------------
+# Imputación de budget y revenue
+# -----------------------------------------------------------
+# Después de la validación, budget/revenue = 0 ya son NaN ("sin dato").
+# Aquí se completan con uno de dos métodos:
+#   - "median": mediana del grupo (género principal, año); si el grupo no
+#     tiene datos, mediana del género y, por último, mediana global.
+#   - "knn": promedio (en escala logarítmica) de los k vecinos más cercanos
+#     sobre variables numéricas estandarizadas. Los vecinos se buscan con un
+#     índice aproximado de proyecciones aleatorias (LSH): cada película cae
+#     en un bucket por tabla y solo se comparan distancias dentro del bucket.
+#     Si una película no encuentra vecinos se usa la mediana del grupo.
+# Cada columna imputada lleva su indicador <columna>_imputed para poder
+# incluir o excluir esos valores en los análisis.
+
+IMPUTED_COLS = ["budget", "revenue"]
+KNN_FEATURES = ["popularity", "voteAvg", "voteCount", "runtime", "actorsAmount", "year"]
+
+# Máximo de elementos por matriz de distancias (consultas x candidatos)
+MAX_BATCH_ELEMENTS = 4_000_000
+
+
+def indicator(col):
+    return f"{col}_imputed"
+
+
+def _group_keys(df):
+    genre = df["genres"].str.split("|").str[0]
+    year = parse_dates(df["releaseDate"]).dt.year
+    return genre, year
+
+
+def group_median_fill(df, col):
+    # Mediana por (género, año) -> por género -> global, todo con transform
+    values = pd.to_numeric(df[col], errors="coerce")
+    genre, year = _group_keys(df)
+    filled = values.groupby([genre, year], dropna=False).transform("median")
+    filled = filled.fillna(values.groupby(genre, dropna=False).transform("median"))
+    return filled.fillna(values.median())
+
+
+def _standardize(df, features):
+    x = df[features].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+    # Conteos y montos muy sesgados: escala logarítmica
+    x = np.sign(x) * np.log1p(np.abs(x))
+    x = x[:, ~np.isnan(x).all(axis=0)]   # columnas sin ningún dato no aportan
+    mean = np.nanmean(x, axis=0)
+    std = np.nanstd(x, axis=0)
+    std[~(std > 0)] = 1.0
+    x = (x - mean) / std
+    return np.nan_to_num(x, nan=0.0)
+
+
+class ProjectionIndex:
+    # Índice aproximado de vecinos: n_tables tablas de n_bits hiperplanos
+    # aleatorios. Cada punto se asigna al bucket de su firma de bits.
+    def __init__(self, points, n_tables=4, n_bits=8, max_candidates=2048, seed=0):
+        self.points = points
+        self.max_candidates = max_candidates
+        rng = np.random.default_rng(seed)
+        self.planes = rng.standard_normal((n_tables, points.shape[1], n_bits))
+        self.weights = 1 << np.arange(n_bits)
+        self.tables = []
+        for planes in self.planes:
+            codes = self._codes(points, planes)
+            order = np.argsort(codes, kind="stable")
+            sorted_codes = codes[order]
+            # Buckets demasiado grandes se recortan a max_candidates al azar
+            buckets = {}
+            unique, starts, counts = np.unique(sorted_codes, return_index=True, return_counts=True)
+            for code, start, count in zip(unique, starts, counts):
+                members = order[start:start + count]
+                if count > max_candidates:
+                    members = rng.choice(members, max_candidates, replace=False)
+                buckets[code] = members
+            self.tables.append(buckets)
+
+    def _codes(self, x, planes):
+        return ((x @ planes) > 0).astype(np.int64) @ self.weights
+
+    def query(self, queries, k):
+        # Devuelve (distancias, posiciones) de forma (n, k); inf / -1 si faltan vecinos
+        n = len(queries)
+        best_dist = np.full((n, 0), np.inf)
+        best_idx = np.full((n, 0), -1, dtype=np.int64)
+
+        for planes, buckets in zip(self.planes, self.tables):
+            dist = np.full((n, k), np.inf)
+            idx = np.full((n, k), -1, dtype=np.int64)
+            codes = self._codes(queries, planes)
+            for code in np.unique(codes):
+                members = buckets.get(code)
+                if members is None:
+                    continue
+                q_rows = np.flatnonzero(codes == code)
+                cand = self.points[members]
+                cand_sq = (cand * cand).sum(axis=1)
+                kk = min(k, len(members))
+                step = max(1, MAX_BATCH_ELEMENTS // len(members))
+                for start in range(0, len(q_rows), step):
+                    rows = q_rows[start:start + step]
+                    q = queries[rows]
+                    # |q - c|^2 = |q|^2 + |c|^2 - 2 q·c (producto de matrices)
+                    d = (q * q).sum(axis=1)[:, None] + cand_sq[None, :] - 2.0 * (q @ cand.T)
+                    part = np.argpartition(d, kk - 1, axis=1)[:, :kk]
+                    dist[rows, :kk] = np.take_along_axis(d, part, axis=1)
+                    idx[rows, :kk] = members[part]
+            best_dist = np.concatenate([best_dist, dist], axis=1)
+            best_idx = np.concatenate([best_idx, idx], axis=1)
+
+        # Un mismo vecino puede aparecer en varias tablas: quedarse con uno
+        order = np.argsort(best_idx, axis=1, kind="stable")
+        sorted_idx = np.take_along_axis(best_idx, order, axis=1)
+        sorted_dist = np.take_along_axis(best_dist, order, axis=1)
+        dup = np.zeros_like(sorted_idx, dtype=bool)
+        dup[:, 1:] = (sorted_idx[:, 1:] == sorted_idx[:, :-1]) & (sorted_idx[:, 1:] >= 0)
+        sorted_dist[dup] = np.inf
+
+        top = np.argsort(sorted_dist, axis=1, kind="stable")[:, :k]
+        dist = np.take_along_axis(sorted_dist, top, axis=1)
+        idx = np.take_along_axis(sorted_idx, top, axis=1)
+        idx[np.isinf(dist)] = -1
+        return dist, idx
+
+
+def knn_fill(df, col, k=10, features=KNN_FEATURES, seed=0):
+    values = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float)
+    missing = np.isnan(values)
+    filled = values.copy()
+    if not missing.any() or missing.all():
+        return pd.Series(filled, index=df.index)
+
+    # La otra columna monetaria también sirve como variable (solo valores reportados)
+    other = [c for c in IMPUTED_COLS if c != col and c in df.columns]
+    features = [f for f in list(features) + other if f in df.columns]
+    x = _standardize(df.assign(year=_group_keys(df)[1]), features)
+
+    donors = np.flatnonzero(~missing)
+    index = ProjectionIndex(x[donors], seed=seed)
+    dist, idx = index.query(x[missing], k)
+
+    # Promedio en escala logarítmica de los vecinos encontrados
+    found = idx >= 0
+    log_values = np.log1p(np.clip(values[donors], 0, None))
+    neighbor_logs = np.where(found, log_values[np.where(found, idx, 0)], 0.0)
+    n_found = found.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        estimate = np.expm1(neighbor_logs.sum(axis=1) / n_found)
+
+    # Sin vecinos: mediana del grupo
+    fallback = group_median_fill(df, col).to_numpy(dtype=float)[missing]
+    filled[missing] = np.where(n_found > 0, estimate, fallback)
+    return pd.Series(filled, index=df.index)
+
+
+def impute(df, method="median", columns=IMPUTED_COLS, k=10):
+    # Devuelve una copia con las columnas completadas y sus indicadores
+    df = df.copy()
+    if method == "none":
+        for col in columns:
+            df[indicator(col)] = False
+        return df
+    if method not in ("median", "knn"):
+        raise ValueError(f"Método de imputación desconocido: {method}")
+
+    # Todas las columnas se imputan a partir de los valores reportados
+    original = df.copy()
+    for col in columns:
+        missing = pd.to_numeric(df[col], errors="coerce").isna()
+        if method == "median":
+            filled = group_median_fill(original, col)
+        else:
+            filled = knn_fill(original, col, k=k)
+        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(filled)
+        df[indicator(col)] = missing & df[col].notna()
+    return df
+
+
+def reported_only(df, columns=IMPUTED_COLS):
+    # Vuelve a NaN los valores imputados (y sus columnas derivadas)
+    df = df.copy()
+    for col in columns:
+        flag = indicator(col)
+        if flag not in df.columns:
+            continue
+        mask = df[flag].astype(bool)
+        derived = [c for c in (col, f"{col}_millions", "profit", "profit_millions") if c in df.columns]
+        df.loc[mask, derived] = np.nan
+    return df
+
+
+def imputation_summary(df, columns=IMPUTED_COLS):
+    return pd.DataFrame({
+        "column": columns,
+        "imputed": [int(df[indicator(c)].sum()) for c in columns],
+        "missing_after": [int(df[c].isna().sum()) for c in columns],
+    })
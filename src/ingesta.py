@@ -0,0 +1,155 @@
+import codecs
+import json
+import os
+
+# -----------------------------------------------------------
+# Ingesta: detección de codificación y transcodificación a UTF-8
+# -----------------------------------------------------------
+# Se toma una muestra de bytes del archivo para decidir su codificación
+# (utf-8, utf-8-sig, cp1252 o "mixed" cuando hay líneas en UTF-8 y otras
+# en Windows-1252/Latin-1), y se transcodifica a UTF-8 por bloques sin
+# cargar el archivo completo. La codificación detectada queda guardada en
+# <archivo>.meta.json; las cargas posteriores leen ese metadato y no
+# vuelven a detectar ni a decodificar.
+
+SAMPLE_BYTES = 1 << 20      # 1 MB de muestra
+CHUNK_BYTES = 8 << 20       # bloques de 8 MB al transcodificar
+
+
+def metadata_path(path):
+    return os.path.splitext(path)[0] + ".meta.json"
+
+
+def read_metadata(path):
+    meta_path = metadata_path(path)
+    if not os.path.isfile(meta_path):
+        return None
+    with open(meta_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_metadata(path, **fields):
+    meta_path = metadata_path(path)
+    tmp_path = meta_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(fields, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, meta_path)
+
+
+def dataset_encoding(path, default="utf-8"):
+    # Codificación registrada para un archivo ya ingerido o limpiado
+    meta = read_metadata(path)
+    return meta.get("encoding", default) if meta else default
+
+
+def _signature(path):
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def detect_encoding(path, sample_bytes=SAMPLE_BYTES):
+    with open(path, "rb") as f:
+        sample = f.read(sample_bytes)
+
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+
+    # Un decodificador incremental tolera un carácter multibyte cortado al final
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        decoder.decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+
+    # Hay bytes que no son UTF-8: si también hay secuencias UTF-8 válidas
+    # de varios bytes (p. ej. "Ã" + continuación), el archivo es mixto
+    valid_multibyte = 0
+    for line in sample.splitlines():
+        if any(b >= 0x80 for b in line):
+            try:
+                line.decode("utf-8")
+                valid_multibyte += 1
+            except UnicodeDecodeError:
+                pass
+    return "mixed" if valid_multibyte else "cp1252"
+
+
+def _decode_legacy(data):
+    # cp1252 cubre las comillas/guiones de 0x80-0x9F; los 5 bytes que no
+    # define se interpretan como Latin-1
+    try:
+        return data.decode("cp1252")
+    except UnicodeDecodeError:
+        return data.decode("latin-1")
+
+
+def _transcode_mixed(src, dst):
+    # Línea por línea: UTF-8 si es válida, si no Windows-1252/Latin-1
+    pending = b""
+    while True:
+        chunk = src.read(CHUNK_BYTES)
+        if not chunk:
+            break
+        chunk = pending + chunk
+        cut = chunk.rfind(b"\n") + 1
+        pending = chunk[cut:]
+        out = []
+        for line in chunk[:cut].splitlines(keepends=True):
+            try:
+                out.append(line.decode("utf-8"))
+            except UnicodeDecodeError:
+                out.append(_decode_legacy(line))
+        dst.write("".join(out))
+    if pending:
+        try:
+            dst.write(pending.decode("utf-8"))
+        except UnicodeDecodeError:
+            dst.write(_decode_legacy(pending))
+
+
+def _transcode_single(src, dst, encoding):
+    decoder = codecs.getincrementaldecoder(encoding)(errors="strict")
+    while True:
+        chunk = src.read(CHUNK_BYTES)
+        if not chunk:
+            break
+        dst.write(decoder.decode(chunk, final=False))
+    dst.write(decoder.decode(b"", final=True))
+
+
+def ingest(source_path, utf8_path):
+    # Devuelve la ruta del archivo en UTF-8, reutilizándolo si la fuente no cambió
+    signature = _signature(source_path)
+    meta = read_metadata(utf8_path)
+    if meta and meta.get("source_signature") == signature and os.path.isfile(utf8_path):
+        print(f"✅ Reutilizando archivo UTF-8 ya ingerido ({meta['source_encoding']}): {utf8_path}")
+        return utf8_path
+
+    encoding = detect_encoding(source_path)
+    print(f"🔤 Codificación detectada en {os.path.basename(source_path)}: {encoding}")
+
+    tmp_path = utf8_path + ".tmp"
+    with open(source_path, "rb") as src, open(tmp_path, "w", encoding="utf-8", newline="") as dst:
+        if encoding == "mixed":
+            _transcode_mixed(src, dst)
+        else:
+            try:
+                _transcode_single(src, dst, encoding)
+            except UnicodeDecodeError:
+                # La muestra no representaba todo el archivo: recurrir al modo mixto
+                encoding = "mixed"
+                src.seek(0)
+                dst.seek(0)
+                dst.truncate()
+                _transcode_mixed(src, dst)
+    os.replace(tmp_path, utf8_path)
+
+    write_metadata(
+        utf8_path,
+        source=os.path.abspath(source_path),
+        source_encoding=encoding,
+        source_signature=signature,
+        encoding="utf-8",
+    )
+    return utf8_path
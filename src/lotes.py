@@ -0,0 +1,158 @@
+import argparse
+import contextlib
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pandas as pd
+
+from exportar import register_table, write_sqlite
+
+# -----------------------------------------------------------
+# Modo por lotes: varias instantáneas del catálogo en paralelo
+# -----------------------------------------------------------
+# Cada instantánea (por región, por mes, ...) se procesa con script.py y
+# luego con ejercicios.py en su propia carpeta de salida:
+#   <salida>/<instantánea>/movies_clean.csv, resultados.sqlite, figuras/,
+#   perfil/, script.log, ejercicios.log
+# Cada paso corre en un proceso nuevo (los registros de tablas, gráficos y
+# perfilado son globales por proceso) y los pasos de distintas
+# instantáneas se reparten entre los procesos disponibles. Al final se
+# arma un reporte comparativo con las métricas clave de cada instantánea.
+#
+# Uso: python src/lotes.py <salida> <movies_2024_01.csv> <movies_2024_02.csv> ... [--procesos N]
+
+
+def snapshot_names(paths):
+    # Nombre de carpeta por instantánea; si hay nombres repetidos se antepone la carpeta de origen
+    stems = [os.path.splitext(os.path.basename(p))[0] for p in paths]
+    if len(set(stems)) == len(stems):
+        return stems
+    return [f"{os.path.basename(os.path.dirname(os.path.abspath(p)))}_{stem}" for p, stem in zip(paths, stems)]
+
+
+def _configure_outputs(out_dir):
+    import graficos
+    import perfilado
+
+    graficos.output_dir = os.path.join(out_dir, "figuras")
+    perfilado.report_dir = os.path.join(out_dir, "perfil")
+
+
+def _run_step(step, data_path, out_dir):
+    os.makedirs(out_dir, exist_ok=True)
+    _configure_outputs(out_dir)
+    start = time.perf_counter()
+    with open(os.path.join(out_dir, f"{step}.log"), "w", encoding="utf-8") as log, \
+            contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        if step == "script":
+            import script
+            ok = script.run(data_path, out_dir)
+        else:
+            import ejercicios
+            ejercicios.run(out_dir)
+            ok = True
+    return step, ok, time.perf_counter() - start
+
+
+def run_batch(paths, output_dir, workers=None):
+    names = snapshot_names(paths)
+    out_dirs = {name: os.path.join(output_dir, name) for name in names}
+    status = {}
+
+    with ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=1) as pool:
+        pending = {
+            pool.submit(_run_step, "script", path, out_dirs[name]): name
+            for name, path in zip(names, paths)
+        }
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = pending.pop(future)
+                try:
+                    step, ok, elapsed = future.result()
+                except Exception as e:
+                    print(f"❌ {name}: error ({e}). Ver {out_dirs[name]}")
+                    status[name] = "error"
+                    continue
+
+                print(f"{'✅' if ok else '❌'} {name}: {step}.py en {elapsed:.1f} s")
+                if step == "script" and ok:
+                    pending[pool.submit(_run_step, "ejercicios", None, out_dirs[name])] = name
+                else:
+                    status[name] = "ok" if ok else "error"
+
+    return {name: out_dirs[name] for name in names if status.get(name) == "ok"}, status
+
+
+# -----------------------------------------------------------
+# Reporte comparativo
+# -----------------------------------------------------------
+def _first(conn, query):
+    try:
+        row = conn.execute(query).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
+
+
+def snapshot_metrics(results_path):
+    with sqlite3.connect(results_path) as conn:
+        values = pd.read_sql_query("SELECT name, value FROM _values", conn)
+        metrics = dict(zip(values["name"], values["value"]))
+        metrics.update({
+            "top_revenue_title": _first(conn, 'SELECT title FROM "top_revenue_movies" LIMIT 1'),
+            "top_profit_genre": _first(
+                conn, "SELECT genres FROM \"genres_profit\" WHERE genres <> '' ORDER BY profit_millions DESC LIMIT 1"),
+            "top_rated_director": _first(conn, 'SELECT director FROM "top_rated_director_counts" LIMIT 1'),
+            "top_revenue_company": _first(conn, 'SELECT productionCompany FROM "company_revenue_ranking" LIMIT 1'),
+            "best_revenue_month": _first(conn, 'SELECT month FROM "monthly_revenue" ORDER BY revenue DESC LIMIT 1'),
+            "budget_imputed": _first(conn, "SELECT imputed FROM \"imputation_summary\" WHERE column = 'budget'"),
+            "revenue_imputed": _first(conn, "SELECT imputed FROM \"imputation_summary\" WHERE column = 'revenue'"),
+        })
+    return metrics
+
+
+def comparison_report(out_dirs):
+    # Métricas en filas, instantáneas en columnas
+    columns = {
+        name: pd.Series(snapshot_metrics(os.path.join(out_dir, "resultados.sqlite")), dtype=object)
+        for name, out_dir in out_dirs.items()
+    }
+    report = pd.DataFrame(columns)
+    report.index.name = "metric"
+    return report
+
+
+def _format_cell(x):
+    if isinstance(x, float):
+        return f"{x:,.0f}" if x.is_integer() else f"{x:,.3f}"
+    return "N/A" if x is None else str(x)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Procesa varias instantáneas del catálogo y las compara.")
+    parser.add_argument("salida", help="carpeta de salida (una subcarpeta por instantánea)")
+    parser.add_argument("instantaneas", nargs="+", help="archivos movies.csv a procesar")
+    parser.add_argument("--procesos", type=int, default=None, help="procesos en paralelo (por defecto, CPUs)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    print(f"📦 Procesando {len(args.instantaneas)} instantáneas en {args.salida}...")
+    out_dirs, status = run_batch(args.instantaneas, args.salida, workers=args.procesos)
+    print(f"⏱️  Lote completado en {time.perf_counter() - start:.1f} s")
+
+    if out_dirs:
+        report = comparison_report(out_dirs)
+        register_table("lotes", "snapshot_comparison", report.astype(str).reset_index())
+        write_sqlite(os.path.join(args.salida, "comparacion.sqlite"), source="lotes")
+        report.to_csv(os.path.join(args.salida, "comparacion.csv"), encoding="utf-8")
+        print("\n📊 Comparación de instantáneas:")
+        print(report.map(_format_cell).to_string())
+
+    failed = [name for name, s in status.items() if s != "ok"]
+    if failed:
+        print(f"\n⚠️ Instantáneas con errores: {', '.join(failed)}")
+        sys.exit(1)
@@ -1,8 +1,94 @@
 # main.py
+import os
 import subprocess
+import sys
+import time
 
-# Ejecutar script.py
-subprocess.run(["python", "src/script.py"])
+from puntos_control import (EJERCICIOS_CODE, ENRIQUECIMIENTO_CODE, SCRIPT_CODE, Checkpoints, code_signature,
+                            env_signature, file_signature, print_status, src_paths)
 
-# Ejecutar ejercicios.py
-subprocess.run(["python", "src/ejercicios.py"])
+# -----------------------------------------------------------
+# Corrida completa: script.py, enriquecimiento.py (opcional) y ejercicios.py
+# -----------------------------------------------------------
+# Cada paso es una etapa con punto de control (ver puntos_control.py):
+#   - script: se salta si movies.csv, IMPUTACION y el código de limpieza no
+#     cambiaron y movies_clean.csv sigue igual que al terminar.
+#   - enriquecimiento: solo si se definió TAQUILLA o HISTORIAL_CALIFICACIONES;
+#     se salta si movies_clean.csv y los archivos externos no cambiaron.
+#   - ejercicios: se salta si movies_clean.csv y la configuración no
+#     cambiaron; si falla a mitad, la siguiente corrida reanuda desde la
+#     sección que falló (las anteriores se restauran de sus puntos de control).
+# Al final se muestra el estado de cada etapa y, si alguna falló, se sale
+# con código distinto de 0.
+#
+# Uso: python src/main.py [--desde-cero]
+
+src_dir = os.path.dirname(os.path.abspath(__file__))
+data_dir = os.environ.get("DATOS", os.path.normpath(os.path.join(src_dir, "..", "data")))
+raw_path = os.path.join(data_dir, "movies.csv")
+clean_path = os.path.join(data_dir, "movies_clean.csv")
+enriched_path = os.path.join(data_dir, "movies_clean.enriched.csv")
+external_paths = [path for path in (os.environ.get("TAQUILLA"), os.environ.get("HISTORIAL_CALIFICACIONES")) if path]
+
+
+def _signature(inputs, code):
+    return {"inputs": inputs, "env": env_signature(), "code": code_signature(*src_paths(code))}
+
+
+def run_pipeline(fresh=False):
+    checkpoints = Checkpoints(data_dir)
+    if fresh:
+        checkpoints.reset()
+
+    stages = [
+        ("script", lambda: _signature({"movies.csv": file_signature(raw_path)}, SCRIPT_CODE),
+         ["script.py", raw_path, data_dir], [clean_path]),
+    ]
+    if external_paths:
+        stages.append(("enriquecimiento", lambda: _signature(
+            dict({"movies_clean.csv": file_signature(clean_path)},
+                 **{os.path.abspath(path): file_signature(path) for path in external_paths}),
+            ENRIQUECIMIENTO_CODE), ["enriquecimiento.py", data_dir], [enriched_path]))
+    stages.append(("ejercicios", lambda: _signature({"movies_clean.csv": file_signature(clean_path),
+                                                     "movies_clean.enriched.csv": file_signature(enriched_path)},
+                                                    EJERCICIOS_CODE), ["ejercicios.py", data_dir], []))
+
+    rows, failed = [], False
+    for name, signature_of, command, artifacts in stages:
+        if failed:
+            rows.append((name, "pendiente", None, "no se ejecutó por un error anterior"))
+            continue
+        # La firma se calcula al llegar a la etapa: depende de lo que dejó la anterior
+        signature = signature_of()
+        if checkpoints.done(name, signature, artifacts):
+            print(f"\n⏭️  {name}.py: sin cambios desde la última corrida correcta")
+            rows.append((name, "reutilizada", checkpoints.manifest()[name]["seconds"], None))
+            continue
+
+        print(f"\n▶️  Ejecutando {name}.py...")
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, os.path.join(src_dir, command[0])] + command[1:])
+        elapsed = time.perf_counter() - start
+        if result.returncode == 0:
+            checkpoints.complete(name, signature, elapsed, artifacts=artifacts)
+            rows.append((name, "ok", elapsed, None))
+        else:
+            error = f"código de salida {result.returncode}"
+            checkpoints.fail(name, signature, elapsed, error)
+            rows.append((name, "error", elapsed, error))
+            failed = True
+
+    # Detalle de las secciones de ejercicios.py (puntos de control internos)
+    manifest = checkpoints.manifest()
+    for name, entry in manifest.items():
+        if name.startswith("ejercicios/") and entry["status"] != "ok":
+            rows.append((name, "error", entry["seconds"], entry.get("error")))
+
+    print_status(rows)
+    return not failed
+
+
+if __name__ == "__main__":
+    if not run_pipeline(fresh="--desde-cero" in sys.argv):
+        print("\n❌ La corrida terminó con errores; la próxima reanuda desde la etapa que falló.")
+        sys.exit(1)
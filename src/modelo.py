@@ -0,0 +1,343 @@
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from bloques import map_chunks
+from exportar import register_table, register_value, write_sqlite
+from fechas import DAY_COLUMN, release_dates
+from ingesta import dataset_encoding
+from perfilado import stage, write_report
+from preparacion import DATA_DIR, clean_data_path
+from textos import features_paths
+
+# -----------------------------------------------------------
+# Modelo de predicción de ingresos (o popularidad)
+# -----------------------------------------------------------
+# Regresión ridge entrenada fuera de memoria: el CSV limpio se lee por
+# bloques y cada bloque (en paralelo, bloques.map_chunks) se reduce a estadísticos
+# suficientes por fold de validación cruzada:
+#   n, Σx, Σy, Σy², XᵀX, Xᵀy
+# La memoria depende solo del número de variables, no de las filas. Con
+# esas sumas se resuelve la regresión (variables estandarizadas) para
+# cada fold y cada alpha, y el error del fold excluido se obtiene de sus
+# propias sumas, sin otra pasada por los datos.
+#
+# Variables: log(budget), géneros (multi-hot), mes, año, cantidades del
+# reparto, estadísticos de actorsPopularity (media, máximo, cantidad),
+# has_homepage, video y, si existen, las variables de texto densas de
+# textos.py. Objetivo: log(1 + revenue) (solo ingresos reportados, sin
+# imputar) o log(1 + popularity).
+#
+# El año y las cantidades del reparto faltantes se reemplazan por la media
+# de entrenamiento (pasada liviana previa, guardada en el modelo como
+# "fill") y se marcan con una variable *_missing; con 0 el año faltante
+# quedaría a dos mil años del resto y distorsionaría la estandarización.
+#
+# Uso: python src/modelo.py [revenue|popularity] [carpeta_de_datos] [--folds K] [--procesos N]
+
+FEATURE_COLUMNS = ["id", "budget", "budget_imputed", "revenue", "revenue_imputed", "popularity",
+                   "genres", "releaseDate", "releaseDay", "actorsAmount", "castWomenAmount", "castMenAmount",
+                   "actorsPopularity", "homePage", "video"]
+TEXT_FEATURES = ["title_length", "title_words", "title_differs_original", "title_sequel_marker"]
+CAST_COLUMNS = ["actorsAmount", "castWomenAmount", "castMenAmount"]
+FILLED_FEATURES = ["year"] + [f"log_{col}" for col in CAST_COLUMNS]
+ALPHAS = [1e-4, 1e-3, 1e-2, 0.1, 1.0]
+CHUNK_ROWS = 50_000
+
+
+def genre_vocabulary(csv_path, chunk_rows=CHUNK_ROWS):
+    # Pasada liviana (una sola columna) para fijar las columnas de géneros
+    genres = set()
+    for chunk in pd.read_csv(csv_path, usecols=["genres"], chunksize=chunk_rows,
+                             encoding=dataset_encoding(csv_path)):
+        genres.update(chunk["genres"].dropna().str.split("|").explode().str.strip().unique())
+    genres.discard("")
+    return sorted(genres)
+
+
+def genre_matrix(values, genres):
+    # Matriz multi-hot (filas x géneros) a partir de la lista "A|B|C"
+    exploded = values.reset_index(drop=True).fillna("").str.split("|").explode().str.strip()
+    codes = pd.Categorical(exploded, categories=genres).codes
+    keep = codes >= 0
+    matrix = np.zeros((len(values), len(genres)))
+    matrix[exploded.index.to_numpy()[keep], codes[keep]] = 1.0
+    return matrix
+
+
+def actor_popularity_stats(values):
+    # Media, máximo y cantidad de la lista "a|b|c" de actorsPopularity
+    exploded = pd.to_numeric(values.astype(str).str.split("|").explode(), errors="coerce")
+    stats = exploded.groupby(level=0).agg(["mean", "max", "count"])
+    return stats.reindex(values.index)
+
+
+def filled_values(chunk):
+    # Variables que se imputan con la media de entrenamiento (NaN = sin dato)
+    values = {"year": release_dates(chunk).dt.year.to_numpy(dtype=float)}
+    for col in CAST_COLUMNS:
+        values[f"log_{col}"] = np.log1p(pd.to_numeric(chunk[col], errors="coerce").clip(lower=0)).to_numpy(dtype=float)
+    return values
+
+
+def fill_means(csv_path, chunk_rows=CHUNK_ROWS):
+    # Pasada liviana (fechas y reparto) para la media de cada variable imputada
+    totals = {name: [0.0, 0] for name in FILLED_FEATURES}
+    for chunk in pd.read_csv(csv_path, usecols=lambda c: c in ["releaseDate", DAY_COLUMN] + CAST_COLUMNS,
+                             chunksize=chunk_rows, encoding=dataset_encoding(csv_path)):
+        for name, values in filled_values(chunk).items():
+            known = ~np.isnan(values)
+            totals[name][0] += values[known].sum()
+            totals[name][1] += int(known.sum())
+    return {name: float(total / count) if count else 0.0 for name, (total, count) in totals.items()}
+
+
+def feature_names(genres, with_text):
+    names = ["log_budget", "budget_missing", "budget_imputed", "year", "year_missing"]
+    names += [f"month_{m}" for m in range(1, 13)]
+    names += [f"genre_{g}" for g in genres]
+    names += ["log_actorsAmount", "log_castWomenAmount", "log_castMenAmount"]
+    names += [f"{col}_missing" for col in CAST_COLUMNS]
+    names += ["cast_popularity_mean", "cast_popularity_max", "cast_popularity_count",
+              "has_homepage", "video"]
+    if with_text:
+        names += TEXT_FEATURES
+    return names
+
+
+def build_features(chunk, genres, fill, text=None):
+    budget = pd.to_numeric(chunk["budget"], errors="coerce")
+    dates = release_dates(chunk)
+    month = dates.dt.month.to_numpy()
+    filled = filled_values(chunk)
+    missing = {name: np.isnan(values) for name, values in filled.items()}
+    for name, values in filled.items():
+        values[missing[name]] = fill[name]
+
+    columns = [
+        np.log1p(budget.clip(lower=0)).to_numpy(dtype=float),
+        budget.isna().to_numpy(dtype=float),
+        chunk["budget_imputed"].astype(str).str.lower().eq("true").to_numpy(dtype=float)
+        if "budget_imputed" in chunk else np.zeros(len(chunk)),
+        filled["year"],
+        missing["year"].astype(float),
+    ]
+    columns += [(month == m).astype(float) for m in range(1, 13)]
+
+    columns += list(genre_matrix(chunk["genres"], genres).T)
+
+    columns += [filled[f"log_{col}"] for col in CAST_COLUMNS]
+    columns += [missing[f"log_{col}"].astype(float) for col in CAST_COLUMNS]
+    pop = actor_popularity_stats(chunk["actorsPopularity"])
+    columns += [pop["mean"].to_numpy(dtype=float), pop["max"].to_numpy(dtype=float),
+                pop["count"].to_numpy(dtype=float)]
+    columns.append(chunk["homePage"].notna().to_numpy(dtype=float))
+    columns.append(chunk["video"].astype(str).str.lower().eq("true").to_numpy(dtype=float))
+
+    if text is not None:
+        for col in TEXT_FEATURES:
+            columns.append(text[col].astype(float).to_numpy())
+
+    x = np.column_stack(columns)
+    return np.nan_to_num(x, nan=0.0)
+
+
+def target_values(chunk, target):
+    if target == "revenue":
+        revenue = pd.to_numeric(chunk["revenue"], errors="coerce")
+        imputed = chunk["revenue_imputed"].astype(str).str.lower().eq("true") \
+            if "revenue_imputed" in chunk else False
+        valid = (revenue > 0) & ~imputed
+        return np.log1p(revenue.where(valid)).to_numpy(dtype=float)
+    if target == "popularity":
+        return np.log1p(pd.to_numeric(chunk["popularity"], errors="coerce").clip(lower=0)).to_numpy(dtype=float)
+    raise ValueError(f"Objetivo desconocido: {target}")
+
+
+def fold_of(ids, n_folds):
+    # Fold estable por película (hash del id), independiente del bloque
+    hashes = pd.util.hash_array(ids.astype(str).to_numpy(dtype=object), categorize=False)
+    return (hashes % np.uint64(n_folds)).astype(np.int64)
+
+
+# -----------------------------------------------------------
+# Estadísticos suficientes por fold
+# -----------------------------------------------------------
+def empty_stats(n_folds, p):
+    return {
+        "n": np.zeros(n_folds), "sx": np.zeros((n_folds, p)), "sy": np.zeros(n_folds),
+        "syy": np.zeros(n_folds), "sxx": np.zeros((n_folds, p, p)), "sxy": np.zeros((n_folds, p)),
+    }
+
+
+def add_stats(total, part):
+    for key in total:
+        total[key] += part[key]
+    return total
+
+
+def chunk_stats(block, genres, fill, target, n_folds):
+    chunk, text = block
+    x = build_features(chunk, genres, fill, text)
+    y = target_values(chunk, target)
+    folds = fold_of(chunk["id"], n_folds)
+    keep = ~np.isnan(y)
+    x, y, folds = x[keep], y[keep], folds[keep]
+
+    stats = empty_stats(n_folds, x.shape[1])
+    for f in range(n_folds):
+        xf, yf = x[folds == f], y[folds == f]
+        stats["n"][f] = len(yf)
+        stats["sx"][f] = xf.sum(axis=0)
+        stats["sy"][f] = yf.sum()
+        stats["syy"][f] = yf @ yf
+        stats["sxx"][f] = xf.T @ xf
+        stats["sxy"][f] = xf.T @ yf
+    return stats
+
+
+def _collapse(stats, folds):
+    return {key: value[folds].sum(axis=0) for key, value in stats.items()}
+
+
+def solve_ridge(s, alpha):
+    # Ridge sobre variables estandarizadas a partir de las sumas; devuelve
+    # (intercepto, coeficientes) en la escala original
+    n = s["n"]
+    mu, ybar = s["sx"] / n, s["sy"] / n
+    cov = s["sxx"] / n - np.outer(mu, mu)
+    cxy = s["sxy"] / n - mu * ybar
+    sd = np.sqrt(np.clip(np.diag(cov), 0, None))
+    sd[sd < 1e-12] = 1.0
+    corr = cov / np.outer(sd, sd)
+    beta_std = np.linalg.solve(corr + alpha * np.eye(len(sd)), cxy / sd)
+    coef = beta_std / sd
+    return ybar - mu @ coef, coef
+
+
+def squared_error(s, intercept, coef):
+    # Σ(y - a - xᵀb)² desarrollado con las sumas del fold
+    return (s["syy"] - 2 * intercept * s["sy"] - 2 * coef @ s["sxy"]
+            + s["n"] * intercept ** 2 + 2 * intercept * coef @ s["sx"] + coef @ s["sxx"] @ coef)
+
+
+def cross_validate(stats, alphas=ALPHAS):
+    n_folds = len(stats["n"])
+    rows = []
+    for alpha in alphas:
+        for f in range(n_folds):
+            train = _collapse(stats, [g for g in range(n_folds) if g != f])
+            test = _collapse(stats, [f])
+            if test["n"] == 0 or train["n"] == 0:
+                continue
+            intercept, coef = solve_ridge(train, alpha)
+            sse = squared_error(test, intercept, coef)
+            sst = test["syy"] - test["sy"] ** 2 / test["n"]
+            rows.append({"alpha": alpha, "fold": f, "n": int(test["n"]),
+                         "rmse": float(np.sqrt(max(sse, 0) / test["n"])),
+                         "r2": float(1 - sse / sst) if sst > 0 else np.nan})
+    folds = pd.DataFrame(rows)
+    summary = folds.groupby("alpha").agg(rmse=("rmse", "mean"), r2=("r2", "mean"), folds=("fold", "count"))
+    return folds, summary.reset_index()
+
+
+# -----------------------------------------------------------
+# Entrenamiento por bloques en paralelo
+# -----------------------------------------------------------
+def _readers(csv_path, chunk_rows):
+    data = pd.read_csv(csv_path, usecols=lambda c: c in FEATURE_COLUMNS, chunksize=chunk_rows,
+                       encoding=dataset_encoding(csv_path))
+    dense_path, _ = features_paths(csv_path)
+    if os.path.isfile(dense_path) and os.path.getmtime(dense_path) >= os.path.getmtime(csv_path):
+        text = pd.read_csv(dense_path, usecols=TEXT_FEATURES, chunksize=chunk_rows, encoding="utf-8")
+        return zip(data, text), True
+    return ((chunk, None) for chunk in data), False
+
+
+def accumulate_stats(csv_path, genres, fill, target, n_folds=5, workers=None, chunk_rows=CHUNK_ROWS):
+    blocks, with_text = _readers(csv_path, chunk_rows)
+    p = len(feature_names(genres, with_text))
+    total = empty_stats(n_folds, p)
+    for part in map_chunks(chunk_stats, blocks, workers, args=(genres, fill, target, n_folds)):
+        add_stats(total, part)
+    return total, with_text
+
+
+def train(data_dir=DATA_DIR, target="revenue", n_folds=5, workers=None, alphas=ALPHAS):
+    csv_path = clean_data_path(data_dir)
+
+    with stage("model:genres"):
+        genres = genre_vocabulary(csv_path)
+    with stage("model:fill"):
+        fill = fill_means(csv_path)
+    with stage("model:stats") as info:
+        stats, with_text = accumulate_stats(csv_path, genres, fill, target, n_folds=n_folds, workers=workers)
+        info["rows"] = int(stats["n"].sum())
+    names = feature_names(genres, with_text)
+
+    with stage("model:cross_validation"):
+        folds, summary = cross_validate(stats, alphas)
+    best = summary.loc[summary["rmse"].idxmin()]
+    intercept, coef = solve_ridge(_collapse(stats, list(range(n_folds))), best["alpha"])
+
+    all_stats = _collapse(stats, list(range(n_folds)))
+    sd = np.sqrt(np.clip(np.diag(all_stats["sxx"] / all_stats["n"])
+                         - (all_stats["sx"] / all_stats["n"]) ** 2, 0, None))
+    coefficients = pd.DataFrame({"feature": names, "coef": coef, "std_coef": coef * sd})
+    coefficients = coefficients.reindex(coefficients["std_coef"].abs().sort_values(ascending=False).index)
+
+    model = {
+        "target": target,
+        "transform": "log1p",
+        "alpha": float(best["alpha"]),
+        "intercept": float(intercept),
+        "features": names,
+        "coef": coef.tolist(),
+        "genres": genres,
+        "fill": fill,
+        "n_train": int(all_stats["n"]),
+        "cv_rmse": float(best["rmse"]),
+        "cv_r2": float(best["r2"]),
+    }
+    model_path = os.path.join(data_dir, f"modelo_{target}.json")
+    with open(model_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(model, f, indent=2, ensure_ascii=False)
+    os.replace(model_path + ".tmp", model_path)
+
+    register_table("model", f"model_{target}_cv_folds", folds)
+    register_table("model", f"model_{target}_cv", summary)
+    register_table("model", f"model_{target}_coefficients", coefficients)
+    register_value("model", f"model_{target}_cv_r2", best["r2"])
+    register_value("model", f"model_{target}_cv_rmse", best["rmse"])
+
+    print(f"\n🤖 Modelo de {target} (ridge, log1p) con {model['n_train']:,} películas y {len(names)} variables")
+    print(summary.to_string(index=False, float_format=lambda x: f"{x:.4f}"))
+    print(f"\n✅ Mejor alpha = {best['alpha']:g}: RMSE (log) = {best['rmse']:.4f}, R² = {best['r2']:.4f}")
+    print("\n📌 Variables con mayor peso (coeficiente estandarizado):")
+    print(coefficients.head(10).to_string(index=False, float_format=lambda x: f"{x:.4f}"))
+    print(f"\n✅ Modelo guardado en: {model_path}")
+    return model
+
+
+def predict(model, chunk, text=None):
+    # Predicción en la escala original (expm1) para un bloque del CSV limpio
+    if (text is not None) != (TEXT_FEATURES[0] in model["features"]):
+        raise ValueError("Las variables de texto del bloque no coinciden con las del modelo")
+    x = build_features(chunk, model["genres"], model["fill"], text)
+    return np.expm1(model["intercept"] + x @ np.asarray(model["coef"]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Entrena el modelo de ingresos/popularidad por bloques.")
+    parser.add_argument("objetivo", nargs="?", default="revenue", choices=["revenue", "popularity"])
+    parser.add_argument("datos", nargs="?", default=DATA_DIR, help="carpeta con movies_clean.csv")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--procesos", type=int, default=None)
+    args = parser.parse_args()
+
+    train(args.datos, target=args.objetivo, n_folds=args.folds, workers=args.procesos)
+    write_sqlite(os.path.join(args.datos, "resultados.sqlite"), source="modelo")
+    write_report("modelo", args.datos)
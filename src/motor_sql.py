@@ -0,0 +1,210 @@
+import os
+import sqlite3
+import sys
+
+import numpy as np
+import pandas as pd
+
+import agregaciones
+from agregaciones import CAST_EDGES
+from rangos import labels_for
+from fechas import release_dates
+from imputacion import IMPUTED_COLS, indicator
+from ingesta import dataset_encoding
+
+# -----------------------------------------------------------
+# Motor SQL (SQLite) para las agregaciones de las secciones
+# -----------------------------------------------------------
+# El CSV limpio se carga por bloques en una base SQLite en disco, así que
+# la memoria usada no depende del tamaño del catálogo. Las secciones
+# (g), (i), (l), (m) y (o) se expresan como consultas SQL y devuelven las
+# mismas Series que agregaciones.py (motor pandas).
+#
+# Uso:
+#   python src/motor_sql.py              -> construye data/movies_clean.sqlite
+#   python src/motor_sql.py --verificar  -> compara resultados SQL vs pandas
+
+NUMERIC_COLS = ["budget", "revenue", "voteCount", "voteAvg", "popularity", "runtime",
+                "castWomenAmount", "castMenAmount", "actorsAmount"]
+
+# Columnas derivadas calculadas dentro de SQL (equivalentes a load_data)
+_MOVIES_VIEW = """
+CREATE VIEW IF NOT EXISTS movies_v AS
+SELECT
+    *,
+    CAST(strftime('%m', releaseDate) AS INTEGER) AS month,
+    (revenue - budget) / 1000000.0 AS profit_millions,
+    revenue / 1000000.0 AS revenue_millions,
+    homePage IS NOT NULL AS has_homepage
+FROM movies
+"""
+
+
+def build_store(csv_path, db_path, chunksize=100_000, reported_only=False):
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    with sqlite3.connect(db_path) as conn:
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize, encoding=dataset_encoding(csv_path)):
+            for col in NUMERIC_COLS:
+                if col in chunk.columns:
+                    chunk[col] = pd.to_numeric(chunk[col], errors="coerce")
+            if reported_only:
+                # Excluir valores imputados (ver imputacion.py)
+                for col in IMPUTED_COLS:
+                    if indicator(col) in chunk.columns:
+                        chunk.loc[chunk[indicator(col)].astype(bool), col] = np.nan
+            # Texto ISO para strftime() de SQLite; releaseDay (días) queda como INTEGER
+            days = release_dates(chunk).to_numpy().astype("datetime64[D]")
+            chunk["releaseDate"] = np.where(np.isnat(days), None, days.astype(str))
+            chunk.to_sql("movies", conn, if_exists="append", index=False)
+        conn.execute(_MOVIES_VIEW)
+
+    print(f"✅ Almacén SQL creado en: {db_path}")
+
+
+def _cast_range_case(column, edges=CAST_EDGES):
+    # Mismos rangos que rangos.assign_bins: [e0, e1], (e1, e2], ..., (e_n, +inf)
+    labels = labels_for(edges)
+    if len(edges) == 1:
+        return f"CASE WHEN {column} >= {edges[0]} THEN '{labels[0]}' END"
+    whens = [f"        WHEN {column} >= {edges[0]} AND {column} <= {edges[1]} THEN '{labels[0]}'"]
+    whens += [
+        f"        WHEN {column} > {low} AND {column} <= {high} THEN '{label}'"
+        for low, high, label in zip(edges[1:-1], edges[2:], labels[1:-1])
+    ]
+    whens.append(f"        WHEN {column} > {edges[-1]} THEN '{labels[-1]}'")
+    return "CASE\n" + "\n".join(whens) + "\n    END"
+
+
+class SqlBackend:
+    def __init__(self, db_path):
+        self.conn = sqlite3.connect(db_path)
+
+    def _query(self, sql):
+        return pd.read_sql_query(sql, self.conn)
+
+    # (g) Ganancia total por género: la lista 'a|b|c' se separa con un CTE recursivo
+    def genre_profit(self):
+        result = self._query("""
+            WITH RECURSIVE split(genre, rest, profit, level) AS (
+                SELECT '', COALESCE(genres, '') || '|', profit_millions, 0 FROM movies_v
+                UNION ALL
+                SELECT substr(rest, 1, instr(rest, '|') - 1),
+                       substr(rest, instr(rest, '|') + 1),
+                       profit, level + 1
+                FROM split WHERE rest <> ''
+            )
+            SELECT genre AS genres, TOTAL(profit) AS profit_millions
+            FROM split WHERE level > 0
+            GROUP BY genre
+            ORDER BY profit_millions DESC
+        """)
+        return result.set_index("genres")["profit_millions"]
+
+    # (i) Promedios por rango de actrices / actores
+    def cast_range_means(self, women_edges=CAST_EDGES, men_edges=CAST_EDGES):
+        out = {}
+        for prefix, column, edges in (("women", "castWomenAmount", women_edges),
+                                      ("men", "castMenAmount", men_edges)):
+            labels = labels_for(edges)
+            result = self._query(f"""
+                SELECT {_cast_range_case(column, edges)} AS cast_range,
+                       AVG(popularity) AS popularity,
+                       AVG(revenue_millions) AS revenue_millions
+                FROM movies_v
+                GROUP BY cast_range
+                HAVING cast_range IS NOT NULL
+            """).set_index("cast_range").reindex(labels)
+            result.index = pd.CategoricalIndex(labels, categories=labels,
+                                               ordered=True, name=f"cast{prefix.title()}Range")
+            out[f"{prefix}_popularity_mean"] = result["popularity"]
+            out[f"{prefix}_revenue_mean"] = result["revenue_millions"]
+        return out
+
+    # (l) y (m) Promedio por mes de lanzamiento
+    def monthly_mean(self, column):
+        source = {"revenue": "revenue", "revenue_millions": "revenue_millions"}[column]
+        result = self._query(f"""
+            SELECT month, AVG({source}) AS value
+            FROM movies_v WHERE month IS NOT NULL
+            GROUP BY month ORDER BY month
+        """)
+        return result.set_index("month")["value"].rename(column)
+
+    # (o) Promedios según video / página oficial / combinación
+    def marketing_means(self):
+        out = {}
+        groupings = {
+            "video": ["video"],
+            "homepage": ["has_homepage"],
+            "combo": ["video", "has_homepage"],
+        }
+        for name, keys in groupings.items():
+            cols = ", ".join(keys)
+            result = self._query(f"""
+                SELECT {cols},
+                       AVG(revenue_millions) AS revenue_millions,
+                       AVG(popularity) AS popularity
+                FROM movies_v
+                WHERE {' AND '.join(f'{k} IS NOT NULL' for k in keys)}
+                GROUP BY {cols} ORDER BY {cols}
+            """)
+            for key in keys:
+                result[key] = result[key].astype(bool)
+            result = result.set_index(keys)
+            out[f"{name}_revenue_mean"] = result["revenue_millions"]
+            out[f"{name}_popularity_mean"] = result["popularity"]
+        return out
+
+
+# -----------------------------------------------------------
+# Verificación de paridad contra el motor pandas
+# -----------------------------------------------------------
+def _normalize_index(series):
+    series = series.copy()
+    # Los meses pueden venir como int (SQL) o float (pandas con NaT)
+    if pd.api.types.is_numeric_dtype(series.index) and not pd.api.types.is_bool_dtype(series.index):
+        series.index = series.index.astype(float)
+    series.index = series.index.map(str)
+    return series
+
+
+def _same(a, b, rtol=1e-9):
+    a = _normalize_index(a)
+    b = _normalize_index(b)
+    a = a.sort_index()
+    b = b.sort_index()
+    return list(a.index) == list(b.index) and np.allclose(
+        a.to_numpy(dtype=float), b.to_numpy(dtype=float), rtol=rtol, equal_nan=True
+    )
+
+
+def check_parity(df, backend):
+    pairs = {
+        "genre_profit": (agregaciones.genre_profit(df), backend.genre_profit()),
+        "monthly_mean:revenue": (agregaciones.monthly_mean(df, "revenue"), backend.monthly_mean("revenue")),
+        "monthly_mean:revenue_millions": (agregaciones.monthly_mean(df, "revenue_millions"),
+                                          backend.monthly_mean("revenue_millions")),
+    }
+    for group in ("cast_range_means", "marketing_means"):
+        expected = getattr(agregaciones, group)(df)
+        actual = getattr(backend, group)()
+        for name in expected:
+            pairs[f"{group}:{name}"] = (expected[name], actual[name])
+
+    return {name: _same(expected, actual) for name, (expected, actual) in pairs.items()}
+
+
+if __name__ == "__main__":
+    from preparacion import DATA_DIR, clean_data_path, load_data
+
+    csv_path = clean_data_path()
+    db_path = os.path.join(DATA_DIR, "movies_clean.sqlite")
+    build_store(csv_path, db_path)
+
+    if "--verificar" in sys.argv:
+        results = check_parity(load_data(csv_path), SqlBackend(db_path))
+        for name, ok in results.items():
+            print(f"{'✅' if ok else '❌'} {name}")
+        sys.exit(0 if all(results.values()) else 1)
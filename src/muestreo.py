@@ -0,0 +1,294 @@
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from fechas import release_dates
+from ingesta import dataset_encoding
+from preparacion import join_enrichment, prepare, rating_model
+from resumen import SUMMARY_COLUMNS
+
+# -----------------------------------------------------------
+# Modo muestra para exploraciones rápidas sobre catálogos grandes
+# -----------------------------------------------------------
+# MUESTRA=<método>:<cantidad> hace que las secciones corran sobre un
+# subconjunto representativo elegido al cargar los datos:
+#   - uniforme:<fracción>       muestreo aleatorio simple sin reemplazo
+#   - estratificada:<fracción>  la misma fracción en cada estrato (año de
+#                               estreno, género principal), al menos una
+#                               película por estrato
+#   - reservorio:<filas>        tamaño fijo; en ejercicios.py el CSV limpio
+#                               se lee por bloques y nunca se carga completo
+# MUESTRA_SEMILLA=<n> (0 por defecto) fija la muestra.
+#
+# Las tres variantes usan una clave aleatoria por fila y se quedan con las
+# claves más chicas (por estrato en la estratificada); por bloques, el
+# reservorio es el mismo "bottom-k" con memoria O(filas de la muestra).
+#
+# Los rankings top-K no se estiman: al cargar se separan, de todo el
+# catálogo, las RANKING_DEPTH filas candidatas de cada ranking de
+# ejercicios.py (RANKING_KEYS) y las secciones calculan sus top-K sobre esas
+# filas, así el resultado es exacto.
+#
+# El reporte lleva el error de muestreo de las medias (error estándar con
+# corrección por población finita, fórmula estratificada si corresponde) y
+# una anotación por tabla: "exacta" o "muestra". En las tablas de muestra
+# los conteos y sumas son de la muestra; expansion_factor (población /
+# muestra) los lleva a escala del catálogo.
+
+CHUNK_ROWS = 100_000
+RANKING_DEPTH = 50
+Z_95 = 1.96
+
+FRACTION_METHODS = ("uniforme", "estratificada")
+SIZE_METHODS = ("reservorio",)
+
+# (columna, ascendente, filtro) de cada ranking top-K de ejercicios.py
+RANKING_KEYS = [
+    ("budget", False, "budget_reported"),     # (a)
+    ("revenue", False, "revenue_reported"),   # (b), (m)
+    ("voteCount", False, None),               # (c)
+    ("weightedRating", True, "rated"),        # (d)
+    ("runtime", False, None),                 # (f)
+    ("weightedRating", False, "rated_director"),  # (j)
+]
+
+
+class SamplingPlan:
+    def __init__(self, method, amount, seed=0):
+        if method in FRACTION_METHODS:
+            amount = float(amount)
+            if not 0 < amount <= 1:
+                raise ValueError(f"La fracción de muestra debe estar en (0, 1]: {amount}")
+        elif method in SIZE_METHODS:
+            amount = int(amount)
+            if amount < 1:
+                raise ValueError(f"El tamaño de la muestra debe ser positivo: {amount}")
+        else:
+            options = ", ".join(FRACTION_METHODS + SIZE_METHODS)
+            raise ValueError(f"Método de muestreo desconocido '{method}'. Opciones: {options}")
+        self.method = method
+        self.amount = amount
+        self.seed = int(seed)
+
+    @classmethod
+    def from_env(cls):
+        # None si MUESTRA no está definida (corrida completa)
+        text = os.environ.get("MUESTRA")
+        if not text:
+            return None
+        method, _, amount = text.partition(":")
+        if not amount:
+            raise ValueError(f"MUESTRA debe tener la forma <método>:<cantidad>, no '{text}'")
+        return cls(method.strip(), amount.strip(), os.environ.get("MUESTRA_SEMILLA", 0))
+
+    @property
+    def streaming(self):
+        return self.method in SIZE_METHODS
+
+    def size_for(self, population):
+        if self.streaming:
+            return min(self.amount, population)
+        return min(population, max(1, int(round(self.amount * population))))
+
+    def __str__(self):
+        if self.streaming:
+            return f"{self.method} de {self.amount:,} filas (semilla {self.seed})"
+        return f"{self.method} {self.amount:.1%} (semilla {self.seed})"
+
+
+@dataclass
+class Sample:
+    frame: pd.DataFrame
+    method: str
+    population: int
+    strata: np.ndarray = None        # estrato de cada fila de la muestra
+    strata_sizes: np.ndarray = None  # filas de cada estrato en el catálogo
+
+    @property
+    def expansion_factor(self):
+        return self.population / len(self.frame) if len(self.frame) else np.nan
+
+    def rows(self, frame):
+        # Las filas de la muestra en otra versión del mismo DataFrame (mismo índice)
+        return frame.loc[self.frame.index]
+
+
+# -----------------------------------------------------------
+# Selección de la muestra
+# -----------------------------------------------------------
+def strata_codes(frame):
+    # Estrato = (año de estreno, género principal); sin dato cuenta como un valor más
+    year = frame["year"] if "year" in frame.columns else release_dates(frame).dt.year
+    genre = frame["genres"].str.split("|").str[0]
+    codes, _ = pd.factorize(pd.MultiIndex.from_arrays([year.fillna(-1).astype(int).to_numpy(),
+                                                      genre.fillna("").to_numpy()]))
+    return codes
+
+
+def _smallest_keys(keys, size):
+    # Posiciones (ordenadas) de las 'size' claves más chicas
+    if size >= len(keys):
+        return np.arange(len(keys))
+    return np.sort(np.argpartition(keys, size - 1)[:size])
+
+
+def draw_sample(frame, plan):
+    # Muestra de un DataFrame en memoria (las tres variantes)
+    rng = np.random.default_rng(plan.seed)
+    keys = rng.random(len(frame))
+    if plan.method != "estratificada":
+        positions = _smallest_keys(keys, plan.size_for(len(frame)))
+        return Sample(frame.iloc[positions], plan.method, len(frame))
+
+    codes = strata_codes(frame)
+    sizes = np.bincount(codes)
+    take = np.minimum(sizes, np.maximum(1, np.round(plan.amount * sizes).astype(np.int64)))
+    order = np.lexsort((keys, codes))
+    starts = np.cumsum(sizes) - sizes
+    rank = np.arange(len(order)) - starts[codes[order]]
+    positions = np.sort(order[rank < take[codes[order]]])
+    return Sample(frame.iloc[positions], plan.method, len(frame), strata=codes[positions], strata_sizes=sizes)
+
+
+# -----------------------------------------------------------
+# Filas candidatas de los rankings top-K (exactas)
+# -----------------------------------------------------------
+def _not_imputed(frame, col):
+    flag = f"{col}_imputed"
+    if flag not in frame.columns:
+        return pd.Series(True, index=frame.index)
+    return ~frame[flag].astype(bool)
+
+
+def _ranking_filter(frame, name, min_votes):
+    if name is None:
+        return pd.Series(True, index=frame.index)
+    if name == "budget_reported":
+        return _not_imputed(frame, "budget")
+    if name == "revenue_reported":
+        return _not_imputed(frame, "revenue")
+    rated = pd.to_numeric(frame["voteCount"], errors="coerce") >= min_votes
+    if name == "rated_director":
+        return rated & frame["director"].notna()
+    return rated
+
+
+def ranking_candidates(frame, min_votes, depth=RANKING_DEPTH):
+    # Unión de las 'depth' primeras filas de cada ranking (mismo desempate
+    # que nlargest/nsmallest: a igual valor, la fila anterior)
+    labels = []
+    for column, ascending, name in RANKING_KEYS:
+        subset = frame.loc[_ranking_filter(frame, name, min_votes), [column]]
+        subset[column] = pd.to_numeric(subset[column], errors="coerce")
+        top = subset.nsmallest(depth, column) if ascending else subset.nlargest(depth, column)
+        labels.append(top.index)
+    keep = frame.index.isin(np.concatenate(labels))
+    return frame[keep]
+
+
+# -----------------------------------------------------------
+# Reservorio por bloques
+# -----------------------------------------------------------
+def stream_sample(csv_path, plan, chunk_rows=CHUNK_ROWS):
+    # Muestra de tamaño fijo y candidatas de los rankings en una pasada por
+    # bloques sobre el CSV limpio; la calificación ponderada usa la media a
+    # priori de todo el catálogo (pasada liviana previa de voteAvg/voteCount)
+    encoding = dataset_encoding(csv_path)
+    votes = points = 0.0
+    for chunk in pd.read_csv(csv_path, usecols=["voteAvg", "voteCount"], chunksize=chunk_rows, encoding=encoding):
+        rating_model.fit(chunk)
+        votes += rating_model.total_votes
+        points += rating_model.total_points
+    rating_model.total_votes, rating_model.total_points = votes, points
+
+    rng = np.random.default_rng(plan.seed)
+    reservoir, reservoir_keys, candidates, population = None, np.empty(0), None, 0
+    for chunk in pd.read_csv(csv_path, chunksize=chunk_rows, encoding=encoding):
+        population += len(chunk)
+        keys = np.concatenate([reservoir_keys, rng.random(len(chunk))])
+        merged = chunk if reservoir is None else pd.concat([reservoir, chunk])
+        keep = _smallest_keys(keys, plan.amount)
+        reservoir, reservoir_keys = merged.iloc[keep], keys[keep]
+
+        chunk = chunk.assign(weightedRating=rating_model.rating_column(chunk))
+        merged = chunk if candidates is None else pd.concat([candidates, chunk])
+        candidates = ranking_candidates(merged, rating_model.min_votes)
+
+    # prepare() ajusta el modelo a las filas que recibe: se restauran los
+    # totales del catálogo y se recalcula weightedRating
+    frame = prepare(reservoir.drop(columns="weightedRating", errors="ignore"))
+    candidates = prepare(candidates.drop(columns="weightedRating"))
+    rating_model.total_votes, rating_model.total_points = votes, points
+    rating_model.refresh(frame)
+    rating_model.refresh(candidates)
+    frame, candidates = join_enrichment(frame, csv_path), join_enrichment(candidates, csv_path)
+    return Sample(frame, plan.method, population), candidates
+
+
+# -----------------------------------------------------------
+# Error de muestreo y anotaciones del reporte
+# -----------------------------------------------------------
+def sampling_errors(sample, columns=SUMMARY_COLUMNS, z=Z_95):
+    # Media estimada, error estándar e intervalo de confianza de cada columna
+    rows = []
+    for col in columns:
+        if col not in sample.frame.columns:
+            continue
+        x = pd.to_numeric(sample.frame[col], errors="coerce").to_numpy(dtype=float)
+        valid = ~np.isnan(x)
+        n = int(valid.sum())
+        if sample.strata is None:
+            estimate = x[valid].mean() if n else np.nan
+            fpc = 1 - len(sample.frame) / sample.population
+            se = np.sqrt(x[valid].var(ddof=1) / n * fpc) if n > 1 else np.nan
+        else:
+            estimate, se = _stratified_mean(x[valid], sample.strata[valid], sample.strata_sizes,
+                                            np.bincount(sample.strata, minlength=len(sample.strata_sizes)))
+        rows.append({"column": col, "n": n, "estimate": estimate, "std_error": se,
+                     "ci_low": estimate - z * se, "ci_high": estimate + z * se,
+                     "relative_error": se / abs(estimate) if estimate else np.nan})
+    return pd.DataFrame(rows)
+
+
+def _stratified_mean(x, strata, strata_sizes, sampled):
+    # Media estratificada sum(W_h * media_h) y su varianza
+    # sum(W_h^2 * (1 - n_h / N_h) * s_h^2 / n_h). En estratos con una sola
+    # observación s_h no se puede estimar: se usa la varianza de toda la
+    # muestra (estratos colapsados; sobreestima el error, no lo oculta)
+    minlength = len(strata_sizes)
+    n_h = np.bincount(strata, minlength=minlength).astype(float)
+    present = n_h > 0
+    total = np.bincount(strata, weights=x, minlength=minlength)
+    sumsq = np.bincount(strata, weights=x * x, minlength=minlength)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_h = total / n_h
+        pooled = x.var(ddof=1) if len(x) > 1 else 0.0
+        var_h = np.where(n_h > 1, (sumsq - n_h * mean_h * mean_h) / (n_h - 1), pooled)
+        # N_h de las filas con dato: proporcional a las filas sorteadas del estrato
+        weight = strata_sizes * n_h / np.maximum(sampled, 1)
+        weight = weight / weight[present].sum()
+        estimate = float((weight * mean_h)[present].sum())
+        fpc = 1 - sampled / strata_sizes
+        variance = float((weight * weight * fpc * np.maximum(var_h, 0) / n_h)[present].sum())
+    return estimate, np.sqrt(variance)
+
+
+def table_annotations(tables, exact, sample):
+    # Base de cada tabla registrada: "exacta" (catálogo completo) o "muestra"
+    return pd.DataFrame([{
+        "table_name": name,
+        "basis": "exacta" if name in exact else "muestra",
+        "rows_used": sample.population if name in exact else len(sample.frame),
+        "expansion_factor": 1.0 if name in exact else sample.expansion_factor,
+    } for name in tables])
+
+
+def print_sampling_report(sample, errors):
+    print(f"\n🎲 Muestra {sample.method}: {len(sample.frame):,} de {sample.population:,} filas "
+          f"(factor de expansión {sample.expansion_factor:,.2f})")
+    print("   Media estimada ± error estándar (IC 95%):")
+    for row in errors.itertuples():
+        print(f"   {row.column:<16} {row.estimate:>18,.3f} ± {row.std_error:,.3f} "
+              f"[{row.ci_low:,.3f}, {row.ci_high:,.3f}]")
@@ -0,0 +1,167 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows no tiene el módulo resource
+    resource = None
+
+# -----------------------------------------------------------
+# Instrumentación por etapas del pipeline
+# -----------------------------------------------------------
+# Cada etapa registra tiempo de pared, tiempo de CPU, pico de memoria (RSS)
+# y filas procesadas. Las etapas pueden anidarse (por ejemplo, un gráfico
+# dentro de una sección) y se exportan como JSON y como traza compatible
+# con visores de flamegraph (Chrome trace / speedscope / Perfetto).
+#
+# Variables de entorno:
+#   PERFIL_CPROFILE=<etapa>  -> ejecuta esa etapa bajo cProfile
+#   PERFIL_DIR=<carpeta>     -> carpeta donde se escriben los reportes
+#                               (por defecto <datos de la corrida>/perfil, la
+#                               misma carpeta que recibe resultados.sqlite)
+
+_records = []
+_stack = []
+_profiles = []  # (etapa, cProfile) pendientes de guardar con el reporte
+_origin = time.perf_counter()
+
+cprofile_stage = os.environ.get("PERFIL_CPROFILE")
+report_dir = os.environ.get("PERFIL_DIR")  # None -> <data_dir>/perfil de cada corrida
+default_data_dir = os.environ.get("DATOS", os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")))
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB, macOS reporta bytes
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+@contextmanager
+def stage(name, rows=None):
+    # 'info' se entrega al bloque para que pueda fijar info["rows"] al final
+    info = {"rows": rows}
+    path = _stack + [name]
+    _stack.append(name)
+
+    profiler = None
+    if cprofile_stage is not None and name == cprofile_stage:
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield info
+    finally:
+        wall_end = time.perf_counter()
+        cpu_end = time.process_time()
+        if profiler is not None:
+            profiler.disable()
+            _print_profile(name, profiler)
+        _stack.pop()
+
+        _records.append({
+            "stage": name,
+            "path": ";".join(path),
+            "depth": len(path) - 1,
+            "start_s": wall_start - _origin,
+            "wall_s": wall_end - wall_start,
+            "cpu_s": cpu_end - cpu_start,
+            "peak_rss_mb": _peak_rss_mb(),
+            "rows": None if info["rows"] is None else int(info["rows"]),
+        })
+
+
+def _print_profile(name, profiler):
+    # El .prof se guarda con el reporte, cuando ya se conoce la carpeta de la corrida
+    _profiles.append((name, profiler))
+    buffer = io.StringIO()
+    pstats.Stats(profiler, stream=buffer).sort_stats("cumulative").print_stats(20)
+    print(f"\n🔬 cProfile de la etapa '{name}':")
+    print(buffer.getvalue())
+
+
+def output_dir(data_dir=None):
+    # PERFIL_DIR (o report_dir fijado a mano) manda; si no, <data_dir>/perfil
+    if report_dir is not None:
+        return report_dir
+    return os.path.join(default_data_dir if data_dir is None else data_dir, "perfil")
+
+
+def records():
+    # Registros ordenados por inicio (las etapas anidadas terminan antes que su padre)
+    return sorted(_records, key=lambda r: (r["start_s"], r["depth"]))
+
+
+def export_json(path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(records(), f, indent=2, ensure_ascii=False)
+
+
+def export_trace(path):
+    # Formato "Trace Event" (eventos completos 'X' en microsegundos)
+    events = [
+        {
+            "name": r["stage"],
+            "cat": "pipeline",
+            "ph": "X",
+            "ts": r["start_s"] * 1e6,
+            "dur": r["wall_s"] * 1e6,
+            "pid": os.getpid(),
+            "tid": 0,
+            "args": {k: r[k] for k in ("cpu_s", "peak_rss_mb", "rows")},
+        }
+        for r in records()
+    ]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+def export_folded(path):
+    # Pilas colapsadas ("a;b;c <microsegundos propios>") para flamegraph.pl
+    self_time = {}
+    for r in _records:
+        self_time[r["path"]] = self_time.get(r["path"], 0.0) + r["wall_s"]
+    for r in _records:
+        parent = r["path"].rsplit(";", 1)[0] if r["depth"] > 0 else None
+        if parent is not None and parent in self_time:
+            self_time[parent] -= r["wall_s"]
+
+    with open(path, "w", encoding="utf-8") as f:
+        for stack_path, seconds in self_time.items():
+            f.write(f"{stack_path} {max(int(seconds * 1e6), 0)}\n")
+
+
+def print_report():
+    print("\n⏱️  Reporte de etapas:")
+    print(f"{'Etapa':<40} {'Pared (s)':>10} {'CPU (s)':>10} {'RSS pico (MB)':>14} {'Filas':>10}")
+    for r in records():
+        name = "  " * r["depth"] + r["stage"]
+        rss = f"{r['peak_rss_mb']:.1f}" if r["peak_rss_mb"] is not None else "N/A"
+        rows = f"{r['rows']:,}" if r["rows"] is not None else ""
+        print(f"{name[:40]:<40} {r['wall_s']:>10.3f} {r['cpu_s']:>10.3f} {rss:>14} {rows:>10}")
+
+
+def write_report(run_name, data_dir=None):
+    out_dir = output_dir(data_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    while _profiles:
+        name, profiler = _profiles.pop(0)
+        safe_name = "".join(c if c.isalnum() else "_" for c in name)
+        profiler.dump_stats(os.path.join(out_dir, f"cprofile_{safe_name}.prof"))
+    base = os.path.join(out_dir, run_name)
+    export_json(base + ".json")
+    export_trace(base + ".trace.json")
+    export_folded(base + ".folded")
+    print_report()
+    print(f"\n✅ Reporte de perfilado guardado en: {base}.json / .trace.json / .folded")
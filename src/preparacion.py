@@ -0,0 +1,187 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from calificacion import RatingModel
+from fechas import parse_dates, release_dates
+from imputacion import IMPUTED_COLS, indicator
+from ingesta import dataset_encoding, read_metadata
+from perfilado import stage
+from puntos_control import file_signature
+
+# -----------------------------------------------------------
+# Preparación compartida del dataset limpio
+# -----------------------------------------------------------
+# ejercicios.py, raw_ejercicios/pares.py e impares.py (y las herramientas
+# que cargan movies_clean.csv) usan load_data(). Dentro de un proceso el
+# DataFrame preparado se calcula una sola vez; entre procesos se reutiliza
+# una instantánea en disco (<csv>.prepared.pkl) mientras el CSV no cambie.
+# Si existe <csv>.enriched.csv (taquilla e historial de calificaciones, ver
+# enriquecimiento.py) y corresponde a este CSV, sus columnas se unen por id.
+
+# Carpeta de datos por defecto (data/ junto a src/), independiente del
+# directorio de trabajo; DATOS=<carpeta> la reemplaza
+DATA_DIR = os.environ.get(
+    "DATOS", os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")))
+
+NUMERIC_COLS = ["budget", "revenue", "voteCount", "popularity",
+                "castWomenAmount", "castMenAmount", "actorsAmount"]
+
+# Incrementar al cambiar prepare(): invalida las instantáneas existentes
+PREPARATION_VERSION = 5
+
+_memo = {}
+
+# Calificación ponderada (CALIFICACION*, ver calificacion.py)
+rating_model = RatingModel.from_env()
+
+
+def _signature(path):
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_size, st.st_mtime_ns, PREPARATION_VERSION, rating_model.key(),
+            tuple((file_signature(enriched_path(path)) or {}).values()))
+
+
+def clean_data_path(data_dir=None):
+    return os.path.join(data_dir or DATA_DIR, "movies_clean.csv")
+
+
+def snapshot_path(data_path):
+    return os.path.splitext(data_path)[0] + ".prepared.pkl"
+
+
+def enriched_path(data_path):
+    return os.path.splitext(data_path)[0] + ".enriched.csv"
+
+
+# Convertir 'actorsPopularity' en valores numéricos (promedio de la lista)
+def parse_and_average(popularity_str):
+    try:
+        values = list(map(float, popularity_str.split("|")))  # Convertir cada número a float
+        return np.mean(values) if values else np.nan  # Calcular el promedio
+    except:
+        return np.nan  # Si hay un error, devolver NaN
+
+
+def prepare(df):
+    # Convertir 'releaseDate' a tipo fecha (desde releaseDay, sin volver a leer texto)
+    with stage("parse_dates", rows=len(df)):
+        df["releaseDate"] = release_dates(df)
+
+    # -----------------------------------------------------------
+    # Conversión de tipos para evitar errores en cálculos
+    # -----------------------------------------------------------
+    with stage("numeric_coercion", rows=len(df)):
+        for col in NUMERIC_COLS:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+
+    # Indicadores de imputación (un CSV limpio anterior no los tiene)
+    for col in IMPUTED_COLS:
+        flag = indicator(col)
+        df[flag] = df[flag].astype(bool) if flag in df.columns else False
+
+    with stage("derived_columns", rows=len(df)):
+        # Crear columna adicional para el año y el mes de lanzamiento
+        df["year"] = df["releaseDate"].dt.year
+        df["month"] = df["releaseDate"].dt.month  # 1 = Enero, 12 = Diciembre
+
+        df["profit"] = df["revenue"] - df["budget"]
+
+        # Para mostrar todos los valores monetarios en millones
+        df["budget_millions"] = df["budget"] / 1_000_000
+        df["revenue_millions"] = df["revenue"] / 1_000_000
+        df["profit_millions"] = df["profit"] / 1_000_000
+
+        # Género principal y uso de página oficial (secciones f y o)
+        df["genre_main"] = df["genres"].str.split("|").str[0]
+        df["has_homepage"] = ~df["homePage"].isna()
+
+        # Popularidad del elenco como número para (p) y las pruebas de remuestreo
+        df["actorsPopularity"] = df["actorsPopularity"].astype(str).apply(parse_and_average)
+
+        # Calificación ponderada por votos para los rankings de (d) y (j)
+        df["weightedRating"] = rating_model.fit(df).rating_column(df)
+
+    return df
+
+
+# Columnas de enriquecimiento.py: conteos (0 sin datos) y fechas
+ENRICHED_COUNTS = ["boxOfficeWeeks", "externalRatingCount"]
+ENRICHED_DATES = ["boxOfficeOpeningWeek", "externalRatingLast"]
+ENRICHED_CHUNK_ROWS = 500_000
+
+
+def join_enrichment(df, data_path):
+    # Une por id las columnas de <csv>.enriched.csv, leyendo por bloques solo
+    # las películas de df (también sirve para una muestra)
+    path = enriched_path(data_path)
+    if not os.path.isfile(path):
+        return df
+    meta = read_metadata(path) or {}
+    if meta.get("clean") != file_signature(data_path):
+        print(f"⚠️  {os.path.basename(path)} no corresponde al CSV limpio actual: "
+              f"se ignora (volver a correr enriquecimiento.py)")
+        return df
+
+    with stage("join_enrichment", rows=len(df)):
+        # ids como Int64 (sin pasar por float: ids > 2**53 no pierden precisión)
+        ids = pd.to_numeric(df["id"], errors="coerce", dtype_backend="numpy_nullable").astype("Int64")
+        parts = [chunk[chunk["id"].isin(ids.dropna())] for chunk in pd.read_csv(
+            path, chunksize=ENRICHED_CHUNK_ROWS, encoding=dataset_encoding(path), dtype={"id": "Int64"})]
+        extra = pd.concat(parts).drop_duplicates("id").set_index("id").reindex(pd.Index(ids))
+        for col in extra.columns:
+            values = extra[col].to_numpy()
+            if col in ENRICHED_COUNTS:
+                values = pd.to_numeric(extra[col]).fillna(0).to_numpy()
+            elif col in ENRICHED_DATES:
+                # enriquecimiento.py siempre escribe fechas ISO
+                values = parse_dates(extra[col], fmt="%Y-%m-%d").to_numpy()
+            df[col] = values
+    return df
+
+
+def _load_snapshot(path, signature):
+    if not os.path.isfile(path):
+        return None
+    try:
+        snapshot = pd.read_pickle(path)
+    except Exception:
+        return None
+    if snapshot.get("signature") != signature:
+        return None
+    return snapshot["frame"]
+
+
+def _save_snapshot(path, signature, df):
+    tmp_path = path + ".tmp"
+    pd.to_pickle({"signature": signature, "frame": df}, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_data(data_path, use_snapshot=True):
+    signature = _signature(data_path)
+
+    if signature not in _memo:
+        snap_path = snapshot_path(data_path)
+        df = None
+        if use_snapshot:
+            with stage("load_snapshot") as info:
+                df = _load_snapshot(snap_path, signature)
+                info["rows"] = None if df is None else len(df)
+
+        if df is None:
+            with stage("load") as info:
+                df = pd.read_csv(data_path, encoding=dataset_encoding(data_path))
+                info["rows"] = len(df)
+            df = join_enrichment(prepare(df), data_path)
+            if use_snapshot:
+                with stage("save_snapshot", rows=len(df)):
+                    _save_snapshot(snap_path, signature, df)
+        else:
+            rating_model.fit(df)
+
+        _memo[signature] = df
+
+    # Cada llamador recibe su propia copia: las secciones agregan columnas
+    return _memo[signature].copy()
@@ -0,0 +1,143 @@
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import shutil
+from datetime import datetime
+
+# -----------------------------------------------------------
+# Puntos de control por etapa (reanudar corridas fallidas)
+# -----------------------------------------------------------
+# Cada etapa (script.py, ejercicios.py, cada sección de ejercicios) se
+# registra en <datos>/etapas/manifest.json con su estado, su duración y una
+# firma de sus entradas: archivos de entrada (tamaño y fecha), variables de
+# entorno que cambian los resultados y el código de la etapa. Si una etapa
+# ya terminó bien con la misma firma y sus artefactos siguen en disco, la
+# siguiente corrida la salta y reanuda desde la primera etapa pendiente.
+# El manifiesto y los artefactos (.pkl) se escriben en un archivo temporal
+# y se renombran, así una corrida interrumpida nunca deja un punto de
+# control a medio escribir.
+#
+# REANUDAR=no (o python src/main.py --desde-cero) ignora los puntos de control.
+
+# Variables de entorno que cambian los resultados de alguna etapa
+RESULT_ENV = ["IMPUTACION", "IMPUTADOS", "MOTOR", "RANGOS_REPARTO", "CALIFICACION", "CALIFICACION_MEDIA",
+              "CALIFICACION_VOTOS", "CALIFICACION_MIN_VOTOS", "SIGNIFICANCIA", "SIGNIFICANCIA_SEGUNDOS", "FIGURAS",
+              "MUESTRA", "MUESTRA_SEMILLA"]
+
+# Módulos de src/ de los que dependen los resultados de cada etapa (main.py
+# y los puntos de control por sección de ejercicios.py): el script y todo lo
+# que importa, directa o indirectamente (tests/test_reanudar.py lo verifica)
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPT_CODE = ["script.py", "ingesta.py", "validacion.py", "imputacion.py", "textos.py", "muestreo.py",
+               "fechas.py", "resumen.py", "preparacion.py", "calificacion.py", "bloques.py", "exportar.py",
+               "graficos.py", "perfilado.py"]
+EJERCICIOS_CODE = ["ejercicios.py", "agregaciones.py", "preparacion.py", "calificacion.py", "rangos.py",
+                   "entidades.py", "motor_sql.py", "muestreo.py", "fechas.py", "imputacion.py", "ingesta.py",
+                   "remuestreo.py", "resumen.py", "bloques.py", "exportar.py", "graficos.py", "perfilado.py"]
+ENRIQUECIMIENTO_CODE = ["enriquecimiento.py", "fechas.py", "preparacion.py", "calificacion.py", "imputacion.py",
+                        "ingesta.py", "exportar.py", "perfilado.py"]
+
+
+def src_paths(names):
+    return [os.path.join(SRC_DIR, name) for name in names]
+
+
+def file_signature(path):
+    if not os.path.isfile(path):
+        return None
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def code_signature(*objects):
+    # Hash del código fuente (funciones, módulos o rutas a archivos .py)
+    h = hashlib.sha256()
+    for obj in objects:
+        if isinstance(obj, str):
+            with open(obj, "rb") as f:
+                h.update(f.read())
+        else:
+            h.update(inspect.getsource(obj).encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def env_signature(keys=RESULT_ENV):
+    return {key: os.environ[key] for key in keys if key in os.environ}
+
+
+def _write_atomic(path, data, mode="wb"):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, mode, **({} if "b" in mode else {"encoding": "utf-8"})) as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class Checkpoints:
+    def __init__(self, data_dir, enabled=None):
+        self.directory = os.path.join(data_dir, "etapas")
+        self.manifest_path = os.path.join(self.directory, "manifest.json")
+        self.enabled = os.environ.get("REANUDAR", "si") != "no" if enabled is None else enabled
+
+    def manifest(self):
+        if not os.path.isfile(self.manifest_path):
+            return {}
+        with open(self.manifest_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _artifact_path(self, name):
+        return os.path.join(self.directory, name.replace(":", "_").replace("/", "_") + ".pkl")
+
+    def _update(self, name, entry):
+        # Se relee el manifiesto: otro proceso (p. ej. ejercicios.py bajo main.py) pudo escribirlo
+        os.makedirs(self.directory, exist_ok=True)
+        manifest = self.manifest()
+        manifest[name] = entry
+        _write_atomic(self.manifest_path, json.dumps(manifest, indent=2, ensure_ascii=False), mode="w")
+
+    def done(self, name, signature, artifacts=()):
+        # True si la etapa terminó bien con la misma firma y sus artefactos no cambiaron
+        if not self.enabled:
+            return False
+        entry = self.manifest().get(name)
+        if not entry or entry.get("status") != "ok" or entry.get("signature") != signature:
+            return False
+        if entry.get("payload") and not os.path.isfile(self._artifact_path(name)):
+            return False
+        recorded = entry.get("artifacts", {})
+        return all(recorded.get(path) == file_signature(path) for path in artifacts)
+
+    def load(self, name):
+        with open(self._artifact_path(name), "rb") as f:
+            return pickle.load(f)
+
+    def complete(self, name, signature, seconds, payload=None, artifacts=()):
+        if payload is not None:
+            os.makedirs(self.directory, exist_ok=True)
+            _write_atomic(self._artifact_path(name), pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL))
+        self._update(name, {
+            "status": "ok", "signature": signature, "seconds": round(seconds, 3),
+            "payload": payload is not None, "artifacts": {path: file_signature(path) for path in artifacts},
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+        })
+
+    def fail(self, name, signature, seconds, error):
+        self._update(name, {
+            "status": "failed", "signature": signature, "seconds": round(seconds, 3),
+            "error": f"{type(error).__name__}: {error}" if isinstance(error, BaseException) else str(error),
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+        })
+
+    def reset(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def print_status(rows):
+    # rows: (etapa, estado, segundos, detalle); estado = ok | reutilizada | error | pendiente
+    icons = {"ok": "✅", "reutilizada": "⏭️ ", "error": "❌", "pendiente": "⏸️ "}
+    print("\n🧾 Estado de las etapas:")
+    print(f"{'Etapa':<28} {'Estado':<14} {'Tiempo (s)':>10}  Detalle")
+    for name, status, seconds, detail in rows:
+        elapsed = f"{seconds:>10.2f}" if seconds is not None else f"{'':>10}"
+        print(f"{name:<28} {icons[status]} {status:<11} {elapsed}  {detail or ''}")
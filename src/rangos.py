@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+
+# -----------------------------------------------------------
+# Asignación de rangos (bins) vectorizada para la sección (i)
+# -----------------------------------------------------------
+# assign_bins() asigna códigos con np.searchsorted sobre el arreglo crudo.
+# A diferencia de pd.cut con bins [0, 2, ...], el primer rango incluye el
+# 0 (repartos sin actrices/actores) y los valores por encima del último
+# borde van a un rango de desborde en lugar de convertirse en NaN.
+# Código -1 = valor faltante o negativo.
+
+DEFAULT_EDGES = [0, 2, 5, 10, 20, 50]
+
+
+def _fmt(x):
+    return str(int(x)) if float(x).is_integer() else f"{x:g}"
+
+
+def labels_for(edges):
+    edges = list(edges)
+    if len(edges) == 1:
+        return [f"{_fmt(edges[0])}+"]
+    labels = [f"{_fmt(edges[0])}-{_fmt(edges[1])}"]
+    for lo, hi in zip(edges[1:-1], edges[2:]):
+        # Con bordes enteros (conteos) el rango (lo, hi] empieza en lo + 1
+        start = _fmt(lo + 1) if float(lo).is_integer() else _fmt(lo)
+        labels.append(f"{start}-{_fmt(hi)}")
+    labels.append(f"{_fmt(edges[-1])}+")
+    return labels
+
+
+def quantile_edges(values, n_bins):
+    # Bordes por cuantiles (sin duplicados cuando hay muchos empates)
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    edges = np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1)))
+    return edges[:-1].tolist()
+
+
+def data_edges(values, n_bins):
+    # Bordes equiespaciados entre el mínimo y el máximo observados
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    return np.linspace(values.min(), values.max(), n_bins + 1)[:-1].tolist()
+
+
+def resolve_edges(values, edges="default", n_bins=6):
+    if isinstance(edges, str):
+        if edges == "default":
+            return list(DEFAULT_EDGES)
+        if edges == "quantile":
+            return quantile_edges(values, n_bins)
+        if edges == "data":
+            return data_edges(values, n_bins)
+        raise ValueError(f"Tipo de bordes desconocido: {edges}")
+    return list(edges)
+
+
+def assign_bins(values, edges):
+    # Rangos [e0, e1], (e1, e2], ..., (e_n, +inf): cerrados a la derecha como pd.cut
+    values = np.asarray(values, dtype=float)
+    edges = np.asarray(edges, dtype=float)
+    codes = np.searchsorted(edges[1:], values, side="left")
+    codes[np.isnan(values) | (values < edges[0])] = -1
+    return codes
+
+
+def range_means(codes, values, n_bins):
+    # Promedio de 'values' por código de rango con np.bincount (ignora NaN)
+    values = np.asarray(values, dtype=float)
+    ok = (codes >= 0) & ~np.isnan(values)
+    sums = np.bincount(codes[ok], weights=values[ok], minlength=n_bins)
+    counts = np.bincount(codes[ok], minlength=n_bins)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return sums / counts
+
+
+def cast_contingency(women, men, popularity, revenue, women_edges, men_edges):
+    # Tabla 2D (rango de actrices x rango de actores) en una sola pasada:
+    # un código combinado por fila y np.bincount para conteos y sumas
+    w_codes = assign_bins(women, women_edges)
+    m_codes = assign_bins(men, men_edges)
+    n_w, n_m = len(women_edges), len(men_edges)
+
+    valid = (w_codes >= 0) & (m_codes >= 0)
+    cell = np.where(valid, w_codes * n_m + m_codes, -1)
+    size = n_w * n_m
+
+    index = pd.Index(labels_for(women_edges), name="castWomenRange")
+    columns = pd.Index(labels_for(men_edges), name="castMenRange")
+    shape = (n_w, n_m)
+
+    def grid(values):
+        return pd.DataFrame(values.reshape(shape), index=index, columns=columns)
+
+    return {
+        "count": grid(np.bincount(cell[valid], minlength=size)),
+        "popularity_mean": grid(range_means(cell, popularity, size)),
+        "revenue_mean": grid(range_means(cell, revenue, size)),
+    }
@@ -1,3 +1,6 @@
+import os
+import sys
+
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
@@ -5,33 +8,12 @@ import seaborn as sns
 
 
 # -----------------------------------------------------------
-# Cargar el dataset limpio
-# -----------------------------------------------------------
-data_path = "data/movies_clean.csv"
-df = pd.read_csv(data_path)
-
-# Convertir 'releaseDate' a tipo fecha
-df["releaseDate"] = pd.to_datetime(df["releaseDate"], errors="coerce")
-
-# -----------------------------------------------------------
-# Conversión de tipos para evitar errores en cálculos
+# Cargar el dataset limpio (preparación compartida con ejercicios.py)
 # -----------------------------------------------------------
-numeric_cols = ["budget", "revenue", "voteCount", "popularity",
-                "castWomenAmount", "castMenAmount", "actorsAmount"]
-for col in numeric_cols:
-    df[col] = pd.to_numeric(df[col], errors="coerce")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from preparacion import clean_data_path, load_data
 
-# Crear columna adicional para el año y el mes de lanzamiento
-df["year"] = df["releaseDate"].dt.year
-df["month"] = df["releaseDate"].dt.month  # 1 = Enero, 12 = Diciembre
-
-df["profit"] = df["revenue"] - df["budget"]
-
-
-# Para mostrar todos los valores monetarios en millones
-df["budget_millions"] = df["budget"] / 1_000_000
-df["revenue_millions"] = df["revenue"] / 1_000_000
-df["profit_millions"] = df["profit"] / 1_000_000
+df = load_data(clean_data_path())
 
 # -----------------------------------------------------------
 # (a) Las 10 películas con mayor presupuesto
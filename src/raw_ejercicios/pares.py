@@ -1,31 +1,16 @@
-import pandas as pd
+import os
+import sys
+
 import matplotlib.pyplot as plt
-import numpy as np
 import seaborn as sns
 
 # -----------------------------------------------------------
-# Cargar el dataset limpio
-# -----------------------------------------------------------
-data_path = "data/movies_clean.csv"
-df = pd.read_csv(data_path)
-
-# Convertir 'releaseDate' a tipo fecha
-df["releaseDate"] = pd.to_datetime(df["releaseDate"], errors="coerce")
-
-# -----------------------------------------------------------
-# Conversión de tipos para evitar errores en cálculos
+# Cargar el dataset limpio (preparación compartida con ejercicios.py)
 # -----------------------------------------------------------
-numeric_cols = ["budget", "revenue", "voteCount", "popularity",
-                "castWomenAmount", "castMenAmount", "actorsAmount"]
-for col in numeric_cols:
-    df[col] = pd.to_numeric(df[col], errors="coerce")
-
-# Crear columna adicional para el año y el mes de lanzamiento
-df["year"] = df["releaseDate"].dt.year
-df["month"] = df["releaseDate"].dt.month  # 1 = Enero, 12 = Diciembre
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from preparacion import clean_data_path, load_data
 
-# Crear la columna 'profit' (ganancia = ingresos - presupuesto)
-df["profit"] = df["revenue"] - df["budget"]
+df = load_data(clean_data_path())
 
 # -----------------------------------------------------------
 # (b) Las 10 películas con mayor ingreso (revenue)
@@ -197,17 +182,7 @@ plt.show()
 # ----------------------------------------------------------------------
 # (p) ¿Popularidad del elenco directamente correlacionada con el éxito?
 # ----------------------------------------------------------------------
-# Convertir 'actorsPopularity' en valores numéricos (promedio de la lista)
-def parse_and_average(popularity_str):
-    try:
-        values = list(map(float, popularity_str.split("|")))  # Convertir cada número a float
-        return np.mean(values) if values else np.nan  # Calcular el promedio
-    except:
-        return np.nan  # Si hay un error, devolver NaN
-
-# Aplicar la conversión a la columna 'actorsPopularity'
-df["actorsPopularity"] = df["actorsPopularity"].astype(str).apply(parse_and_average)
-
+# 'actorsPopularity' ya es el promedio numérico de la lista (ver preparacion.prepare)
 # Calcular la correlación
 correlation_cast_popularity = df["actorsPopularity"].corr(df["revenue"])
 
@@ -0,0 +1,175 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError, as_completed
+
+import numpy as np
+import pandas as pd
+
+# -----------------------------------------------------------
+# Bootstrap y pruebas de permutación para las secciones (h), (i), (n), (o), (p)
+# -----------------------------------------------------------
+# Cada prueba es una diferencia de medias entre dos grupos ("diff") o una
+# correlación de Pearson ("corr"). Las iteraciones se calculan por lotes
+# como matrices de índices (lote x n) con NumPy y los lotes se reparten
+# entre procesos. Si se agota el presupuesto de tiempo, se cancelan los
+# lotes pendientes, los que están corriendo se cortan en el siguiente
+# sub-lote (reciben el plazo) y se reporta con las iteraciones completadas.
+
+# Máximo de elementos por matriz de índices (~32 MB en int64)
+MAX_BATCH_ELEMENTS = 4_000_000
+TASK_ITERATIONS = 250
+
+_TESTS = {}
+
+
+def _init_worker(tests):
+    global _TESTS
+    _TESTS = tests
+
+
+def _diff_stat(values, groups):
+    # Diferencia de medias (grupo True - grupo False) por fila
+    n_true = groups.sum(axis=-1)
+    n_false = groups.shape[-1] - n_true
+    sum_true = (values * groups).sum(axis=-1)
+    sum_false = values.sum(axis=-1) - sum_true
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return sum_true / n_true - sum_false / n_false
+
+
+def _corr_stat(x, y):
+    # Correlación de Pearson por fila
+    x = x - x.mean(axis=-1, keepdims=True)
+    y = y - y.mean(axis=-1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (x * y).sum(axis=-1) / np.sqrt((x * x).sum(axis=-1) * (y * y).sum(axis=-1))
+
+
+def statistic(kind, a, b):
+    return _diff_stat(a, b) if kind == "diff" else _corr_stat(a, b)
+
+
+def _run_batch(name, n_iter, seed, deadline=None):
+    # deadline: time.time() límite; el lote devuelve lo calculado hasta ese momento
+    kind, a, b = _TESTS[name]
+    n = len(a)
+    rng = np.random.default_rng(seed)
+    batch = max(1, min(n_iter, MAX_BATCH_ELEMENTS // max(n, 1)))
+
+    boot, perm = [], []
+    done = 0
+    while done < n_iter and (deadline is None or time.time() < deadline):
+        size = min(batch, n_iter - done)
+        # Bootstrap: remuestreo de filas con reemplazo
+        idx = rng.integers(0, n, size=(size, n))
+        boot.append(statistic(kind, a[idx], b[idx]))
+        # Permutación: se baraja la segunda variable (grupo o 'y') por fila
+        shuffled = rng.permuted(np.broadcast_to(b, (size, n)), axis=1)
+        perm.append(statistic(kind, np.broadcast_to(a, (size, n)), shuffled))
+        done += size
+    if not boot:
+        return name, np.empty(0), np.empty(0)
+    return name, np.concatenate(boot), np.concatenate(perm)
+
+
+def build_tests(df):
+    tests = {}
+
+    def add_diff(name, value_col, group):
+        data = pd.DataFrame({"v": df[value_col], "g": group}).dropna()
+        tests[name] = ("diff", data["v"].to_numpy(dtype=float), data["g"].to_numpy(dtype=bool))
+
+    def add_corr(name, x_col, y_col):
+        data = df[[x_col, y_col]].apply(pd.to_numeric, errors="coerce").dropna()
+        tests[name] = ("corr", data[x_col].to_numpy(dtype=float), data[y_col].to_numpy(dtype=float))
+
+    # (h) y (n) correlaciones con los ingresos
+    add_corr("h: actorsAmount vs revenue", "actorsAmount", "revenue")
+    add_corr("n: voteAvg vs revenue", "voteAvg", "revenue")
+    # (i) reparto femenino / masculino
+    add_corr("i: castWomenAmount vs popularity", "castWomenAmount", "popularity")
+    add_corr("i: castWomenAmount vs revenue", "castWomenAmount", "revenue_millions")
+    add_corr("i: castMenAmount vs popularity", "castMenAmount", "popularity")
+    add_corr("i: castMenAmount vs revenue", "castMenAmount", "revenue_millions")
+    # (o) diferencias de medias por estrategia de marketing
+    video = df["video"].map({True: True, False: False, "True": True, "False": False})
+    has_homepage = df["homePage"].notna()
+    add_diff("o: revenue (video - sin video)", "revenue_millions", video)
+    add_diff("o: popularity (video - sin video)", "popularity", video)
+    add_diff("o: revenue (homepage - sin homepage)", "revenue_millions", has_homepage)
+    add_diff("o: popularity (homepage - sin homepage)", "popularity", has_homepage)
+    # (p) popularidad del elenco (si ya fue convertida a promedio numérico)
+    if pd.api.types.is_numeric_dtype(df["actorsPopularity"]):
+        add_corr("p: actorsPopularity vs revenue", "actorsPopularity", "revenue")
+    return tests
+
+
+def significance_report(tests, n_iter=2000, time_budget=60.0, workers=None, seed=0, alpha=0.05):
+    workers = workers or os.cpu_count() or 1
+    tasks = [
+        (name, min(TASK_ITERATIONS, n_iter - done))
+        for name in tests
+        for done in range(0, n_iter, TASK_ITERATIONS)
+    ]
+    seeds = np.random.SeedSequence(seed).spawn(len(tasks))
+
+    boot = {name: [] for name in tests}
+    perm = {name: [] for name in tests}
+    start = time.perf_counter()
+    deadline = time.time() + time_budget
+    timed_out = False
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(tests,)) as pool:
+        futures = [
+            pool.submit(_run_batch, name, iterations, task_seed, deadline)
+            for (name, iterations), task_seed in zip(tasks, seeds)
+        ]
+        pending = set(futures)
+        try:
+            for future in as_completed(futures, timeout=max(0.0, deadline - time.time())):
+                pending.discard(future)
+                name, b, p = future.result()
+                boot[name].append(b)
+                perm[name].append(p)
+        except TimeoutError:
+            # Los lotes en curso terminan en su próximo sub-lote; se guarda lo que entreguen
+            timed_out = True
+            running = [future for future in pending if not future.cancel()]
+            for future in running:
+                name, b, p = future.result()
+                boot[name].append(b)
+                perm[name].append(p)
+
+    rows = []
+    for name, (kind, a, b) in tests.items():
+        observed = float(statistic(kind, a, b))
+        boot_stats = np.concatenate(boot[name]) if boot[name] else np.empty(0)
+        perm_stats = np.concatenate(perm[name]) if perm[name] else np.empty(0)
+        boot_stats = boot_stats[~np.isnan(boot_stats)]
+        perm_stats = perm_stats[~np.isnan(perm_stats)]
+
+        if len(boot_stats):
+            ci_low, ci_high = np.quantile(boot_stats, [alpha / 2, 1 - alpha / 2])
+        else:
+            ci_low = ci_high = np.nan
+        if len(perm_stats):
+            p_value = (1 + np.sum(np.abs(perm_stats) >= abs(observed))) / (1 + len(perm_stats))
+        else:
+            p_value = np.nan
+
+        rows.append({
+            "test": name,
+            "kind": kind,
+            "n": len(a),
+            "statistic": observed,
+            "ci_low": ci_low,
+            "ci_high": ci_high,
+            "p_value": p_value,
+            "iterations": len(boot_stats),
+        })
+
+    elapsed = time.perf_counter() - start
+    if timed_out:
+        print(f"⚠️ Presupuesto de tiempo agotado ({time_budget:.0f} s): resultados con menos iteraciones.")
+    print(f"⏱️  Remuestreo completado en {elapsed:.1f} s con {workers} procesos.")
+    return pd.DataFrame(rows)
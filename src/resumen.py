@@ -0,0 +1,256 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from bloques import map_chunks
+from exportar import format_number, register_table, write_sqlite
+from fechas import DAY_COLUMN, release_dates
+from ingesta import dataset_encoding
+from perfilado import stage, write_report
+from preparacion import DATA_DIR, clean_data_path
+
+# -----------------------------------------------------------
+# Cubo de resumen: describe() por género, idioma y década
+# -----------------------------------------------------------
+# count / mean / std / min / 25% / 50% / 75% / max de cada columna numérica
+# para cada grupo de cada dimensión (y "all" = catálogo completo).
+#   - Una sola pasada ordenada: cada fila se repite una vez por grupo al que
+#     pertenece (una película con 3 géneros cuenta en los 3), las filas se
+#     ordenan una vez por celda y todas las columnas se reducen juntas con
+#     np.*.reduceat.
+#   - Momentos combinables (cantidad, media, M2, mín, máx; fórmula de Chan)
+#     y cuartiles con un sketch de error relativo acotado (buckets
+#     logarítmicos, estilo DDSketch): dos cubos se combinan sumando, así que
+#     el cubo se puede calcular por bloques, en paralelo o incrementalmente.
+#
+# Uso: python src/resumen.py [carpeta_de_datos] [--procesos N]
+
+SUMMARY_COLUMNS = ["budget", "revenue", "runtime", "popularity", "voteAvg", "voteCount",
+                   "actorsAmount", "castWomenAmount", "castMenAmount"]
+DIMENSIONS = ["all", "genre", "language", "decade"]
+QUANTILES = [0.25, 0.5, 0.75]
+RELATIVE_ACCURACY = 0.01
+CHUNK_ROWS = 100_000
+
+_CELL = ["dimension", "group", "column"]
+
+
+def _memberships(frame, dimensions):
+    # Posiciones de fila y código de celda de cada pertenencia fila -> grupo,
+    # más las celdas (dimensión, grupo) de cada código
+    rows, codes, cells = [], [], []
+    n = len(frame)
+    for dim in dimensions:
+        if dim == "all":
+            pos, labels = np.arange(n), np.full(n, "all", dtype=object)
+        elif dim == "genre":
+            exploded = frame["genres"].reset_index(drop=True).fillna("").astype(str).str.split("|").explode()
+            exploded = exploded[exploded != ""]
+            pos, labels = exploded.index.to_numpy(), exploded.to_numpy(dtype=object)
+        elif dim == "language":
+            lang = frame["originalLanguage"].reset_index(drop=True)
+            keep = lang.notna().to_numpy()
+            pos, labels = np.flatnonzero(keep), lang[keep].astype(str).to_numpy(dtype=object)
+        elif dim == "decade":
+            year = release_dates(frame).dt.year.reset_index(drop=True)
+            keep = year.notna().to_numpy()
+            pos = np.flatnonzero(keep)
+            labels = ((year[keep].astype(int) // 10) * 10).astype(str).to_numpy(dtype=object)
+        else:
+            raise ValueError(f"Dimensión desconocida '{dim}'. Opciones: {', '.join(DIMENSIONS)}")
+        group_codes, uniques = pd.factorize(labels, sort=True)
+        rows.append(pos)
+        codes.append(group_codes + len(cells))
+        cells += [(dim, group) for group in uniques]
+    return np.concatenate(rows), np.concatenate(codes), cells
+
+
+class QuantileSketch:
+    # Buckets logarítmicos: |x| en (gamma^(k-1), gamma^k] comparte bucket k;
+    # el valor representativo tiene error relativo <= RELATIVE_ACCURACY.
+    # Clave entera con signo: 0 para x = 0, ±(k + KEY_OFFSET) según el signo,
+    # así el orden de las claves es el orden de los valores.
+    KEY_OFFSET = 1 << 20
+
+    def __init__(self, accuracy=RELATIVE_ACCURACY):
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.log_gamma = np.log(self.gamma)
+
+    def keys(self, x):
+        magnitude = np.abs(x)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            k = np.ceil(np.log(magnitude) / self.log_gamma)
+        k = np.clip(np.nan_to_num(k, neginf=0), 1 - self.KEY_OFFSET, self.KEY_OFFSET - 1).astype(np.int64)
+        return np.where(magnitude > 0, np.sign(x).astype(np.int64) * (k + self.KEY_OFFSET), 0)
+
+    def values(self, keys):
+        keys = np.asarray(keys, dtype=np.int64)
+        k = np.abs(keys) - self.KEY_OFFSET
+        return np.where(keys != 0, np.sign(keys) * 2 * np.exp(k * self.log_gamma) / (self.gamma + 1), 0.0)
+
+
+class SummaryCube:
+    def __init__(self, columns=SUMMARY_COLUMNS, dimensions=DIMENSIONS, accuracy=RELATIVE_ACCURACY):
+        self.columns = list(columns)
+        self.dimensions = list(dimensions)
+        self.sketch = QuantileSketch(accuracy)
+        self.moments = pd.DataFrame(columns=["count", "mean", "m2", "min", "max"],
+                                    index=pd.MultiIndex.from_arrays([[], [], []], names=_CELL), dtype=float)
+        self.buckets = pd.Series(dtype=float, index=pd.MultiIndex.from_arrays([[], [], [], []],
+                                                                               names=_CELL + ["bucket"]))
+
+    # ---------------- actualización ----------------
+    def update(self, frame):
+        # Agrega un bloque (o el DataFrame completo) al cubo
+        moments, buckets = self._chunk_summary(frame)
+        self._merge(moments, buckets)
+        return self
+
+    def merge(self, other):
+        self._merge(other.moments, other.buckets)
+        return self
+
+    def _chunk_summary(self, frame):
+        values = np.column_stack([pd.to_numeric(frame[c], errors="coerce").to_numpy(dtype=float)
+                                  for c in self.columns])
+        rows, cell_codes, cells = _memberships(frame, self.dimensions)
+        if len(rows) == 0:
+            return self.moments.iloc[:0], self.buckets.iloc[:0]
+
+        # Una ordenación por celda (dimensión, grupo); luego reduceat por tramos
+        order = np.argsort(cell_codes, kind="stable")
+        x = values[rows[order]]
+        sorted_codes = cell_codes[order]
+        starts = np.flatnonzero(np.r_[True, np.diff(sorted_codes) != 0])
+        cells = pd.MultiIndex.from_tuples([cells[c] for c in sorted_codes[starts]])
+
+        valid = ~np.isnan(x)
+        count = np.add.reduceat(valid, starts, axis=0).astype(float)
+        total = np.add.reduceat(np.where(valid, x, 0.0), starts, axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = total / count
+        cell_of_row = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(x)]))
+        deviation = np.where(valid, x - mean[cell_of_row], 0.0)
+        m2 = np.add.reduceat(deviation * deviation, starts, axis=0)
+        low = np.minimum.reduceat(np.where(valid, x, np.inf), starts, axis=0)
+        high = np.maximum.reduceat(np.where(valid, x, -np.inf), starts, axis=0)
+
+        index = pd.MultiIndex.from_arrays([
+            np.repeat(cells.get_level_values(0), len(self.columns)),
+            np.repeat(cells.get_level_values(1), len(self.columns)),
+            np.tile(self.columns, len(cells)),
+        ], names=_CELL)
+        moments = pd.DataFrame({"count": count.ravel(), "mean": mean.ravel(), "m2": m2.ravel(),
+                                "min": low.ravel(), "max": high.ravel()}, index=index)
+        moments = moments[moments["count"] > 0]
+
+        # Sketch: (celda, columna, bucket) -> cantidad, con una clave int64 y np.unique
+        row_idx, col_idx = np.nonzero(valid)
+        # las claves van de -2·KEY_OFFSET a 2·KEY_OFFSET
+        half = 2 * QuantileSketch.KEY_OFFSET
+        shift = np.int64(2 * half)
+        combined = ((cell_of_row[row_idx].astype(np.int64) * len(self.columns) + col_idx) * shift
+                    + self.sketch.keys(x[row_idx, col_idx]) + half)
+        unique, counts = np.unique(combined, return_counts=True)
+        cell_col, bucket = np.divmod(unique, shift)
+        cell_pos, col_pos = np.divmod(cell_col, len(self.columns))
+        buckets = pd.Series(counts.astype(float), index=pd.MultiIndex.from_arrays([
+            cells.get_level_values(0)[cell_pos], cells.get_level_values(1)[cell_pos],
+            np.asarray(self.columns, dtype=object)[col_pos], bucket - half,
+        ], names=_CELL + ["bucket"]))
+        return moments, buckets
+
+    def _merge(self, moments, buckets):
+        if self.moments.empty:
+            self.moments, self.buckets = moments.copy(), buckets.copy()
+            return
+        a, b = self.moments.align(moments, join="outer")
+        a["count"] = a["count"].fillna(0)
+        b["count"] = b["count"].fillna(0)
+        n = a["count"] + b["count"]
+        delta = b["mean"].fillna(0) - a["mean"].fillna(0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            share = (b["count"] / n).fillna(0)
+        merged = pd.DataFrame({
+            "count": n,
+            "mean": a["mean"].fillna(0) + delta * share,
+            "m2": a["m2"].fillna(0) + b["m2"].fillna(0) + delta * delta * a["count"] * share,
+            "min": np.fmin(a["min"], b["min"]),
+            "max": np.fmax(a["max"], b["max"]),
+        })
+        self.moments = merged
+        self.buckets = pd.concat([self.buckets, buckets]).groupby(level=[0, 1, 2, 3], sort=False).sum()
+
+    # ---------------- resultado ----------------
+    def quantiles(self, qs=QUANTILES):
+        # Cuantiles desde el sketch: primer bucket cuya cantidad acumulada supera q·(n-1)
+        ordered = self.buckets.sort_index()
+        by_cell = ordered.groupby(level=[0, 1, 2], sort=False)
+        cumulative = by_cell.cumsum()
+        n = by_cell.transform("sum")
+        values = pd.Series(self.sketch.values(ordered.index.get_level_values("bucket")), index=ordered.index)
+        result = {}
+        for q in qs:
+            reached = cumulative > q * (n - 1)
+            result[f"{q:.0%}"] = values[reached].groupby(level=[0, 1, 2], sort=False).first()
+        return pd.DataFrame(result)
+
+    def table(self):
+        m = self.moments
+        with np.errstate(invalid="ignore", divide="ignore"):
+            std = np.sqrt(m["m2"] / (m["count"] - 1)).where(m["count"] > 1)
+        summary = pd.DataFrame({"count": m["count"].astype(np.int64), "mean": m["mean"], "std": std,
+                                "min": m["min"]})
+        quantiles = self.quantiles().reindex(summary.index)
+        # Los cuartiles aproximados nunca salen del rango exacto [min, max]
+        for col in quantiles.columns:
+            summary[col] = quantiles[col].clip(m["min"], m["max"])
+        summary["max"] = m["max"]
+
+        # Orden: dimensiones como en DIMENSIONS, grupos por cantidad de películas
+        summary = summary.reset_index()
+        summary["_dim"] = summary["dimension"].map({d: i for i, d in enumerate(self.dimensions)})
+        summary["_col"] = summary["column"].map({c: i for i, c in enumerate(self.columns)})
+        group_size = summary.groupby(["dimension", "group"])["count"].transform("max")
+        summary["_size"] = -group_size
+        summary = summary.sort_values(["_dim", "_size", "group", "_col"]).drop(columns=["_dim", "_col", "_size"])
+        return summary.reset_index(drop=True)
+
+
+def summary_cube(df, columns=SUMMARY_COLUMNS, dimensions=DIMENSIONS):
+    # Cubo completo de un DataFrame en memoria
+    return SummaryCube(columns, dimensions).update(df).table()
+
+
+def _chunk_cube(chunk, columns, dimensions):
+    return SummaryCube(columns, dimensions).update(chunk)
+
+
+def stream_cube(csv_path, columns=SUMMARY_COLUMNS, dimensions=DIMENSIONS, workers=None, chunk_rows=CHUNK_ROWS):
+    # Cubo de un CSV por bloques (en paralelo): los cubos parciales se combinan
+    header = pd.read_csv(csv_path, nrows=0, encoding=dataset_encoding(csv_path)).columns
+    usecols = [c for c in list(columns) + ["genres", "originalLanguage", "releaseDate", DAY_COLUMN] if c in header]
+    reader = pd.read_csv(csv_path, usecols=usecols, chunksize=chunk_rows, encoding=dataset_encoding(csv_path))
+    cube = SummaryCube(columns, dimensions)
+    for part in map_chunks(_chunk_cube, reader, workers, args=(list(columns), list(dimensions))):
+        cube.merge(part)
+    return cube
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="describe() por género, idioma y década, por bloques.")
+    parser.add_argument("datos", nargs="?", default=DATA_DIR, help="carpeta con movies_clean.csv")
+    parser.add_argument("--dimensiones", nargs="+", default=DIMENSIONS, choices=DIMENSIONS)
+    parser.add_argument("--procesos", type=int, default=None)
+    args = parser.parse_args()
+
+    with stage("summary_cube") as info:
+        table = stream_cube(clean_data_path(args.datos), dimensions=args.dimensiones, workers=args.procesos).table()
+        info["rows"] = int(table.loc[table["dimension"] == "all", "count"].max()) if "all" in args.dimensiones else None
+    register_table("resumen", "summary_cube", table)
+    print("\n📊 Resumen por grupo (primeras filas):")
+    print(table.head(40).to_string(index=False, float_format=format_number))
+    write_sqlite(os.path.join(args.datos, "resultados.sqlite"), source="resumen")
+    write_report("resumen", args.datos)
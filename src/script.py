@@ -1,34 +1,100 @@
 import pandas as pd
 import os
-import matplotlib.pyplot as plt
-import seaborn as sns
+import sys
 import scipy.stats as stats
 import numpy as np
 
-# Definir la ruta al archivo
+from exportar import format_number, register_table, register_value, registry_mark, registry_since, write_sqlite
+from fechas import DAY_COLUMN, to_epoch_days
+from graficos import ChartSpec, flush, plot
+from imputacion import impute, imputation_summary
+from ingesta import ingest, read_metadata, write_metadata
+from muestreo import SamplingPlan, draw_sample, print_sampling_report, sampling_errors, table_annotations
+from perfilado import stage, write_report
+from resumen import summary_cube
+from textos import extract_text_features
+from validacion import print_summary, validate
+
+# Rutas por defecto: data/movies.csv -> data/movies_clean.csv (junto a src/,
+# o en DATOS=<carpeta>)
 script_dir = os.path.dirname(os.path.abspath(__file__))
-data_dir = os.path.join(script_dir, "..", "data")  # Carpeta donde se guarda el archivo
-data_path = os.path.join(data_dir, "movies.csv")  # Archivo de entrada
-clean_data_path = os.path.join(data_dir, "movies_clean.csv")  # Archivo de salida
+default_data_dir = os.environ.get("DATOS", os.path.normpath(os.path.join(script_dir, "..", "data")))
+
+
+def run(data_path, data_dir):
+    # Limpia data_path y deja los archivos de salida en data_dir
+    utf8_data_path = os.path.join(data_dir, "movies.utf8.csv")  # Entrada transcodificada a UTF-8
+    clean_data_path = os.path.join(data_dir, "movies_clean.csv")  # Archivo de salida
+    results_path = os.path.join(data_dir, "resultados.sqlite")  # Tablas de resultados
+    quarantine_path = os.path.join(data_dir, "movies_quarantine.csv")  # Filas que no pasan la validación
+
+    data_dir = os.path.normpath(data_dir)
+    data_path = os.path.normpath(data_path)
+    utf8_data_path = os.path.normpath(utf8_data_path)
+    clean_data_path = os.path.normpath(clean_data_path)
+    results_path = os.path.normpath(results_path)
+    quarantine_path = os.path.normpath(quarantine_path)
 
-data_dir = os.path.normpath(data_dir)
-data_path = os.path.normpath(data_path)
-clean_data_path = os.path.normpath(clean_data_path)
+    print(f"📂 Ruta al archivo de entrada: {data_path}")
+    print(f"📂 Ruta al archivo de salida: {clean_data_path}")
 
-print(f"📂 Ruta al archivo de entrada: {data_path}")
-print(f"📂 Ruta al archivo de salida: {clean_data_path}")
+    # Verificar si el archivo existe
+    if not os.path.isfile(data_path):
+        print(f"\n❌ El archivo {os.path.basename(data_path)} no se encuentra en la ruta especificada.")
+        return False
+
+    print(f"\n✅ El archivo {os.path.basename(data_path)} ha sido encontrado correctamente.")
+
+    # Crear la carpeta de salida si no existe
+    if not os.path.exists(data_dir):
+        os.makedirs(data_dir)
+        print(f"📂 Carpeta creada: {data_dir}")
 
-# Verificar si el archivo existe
-if not os.path.isfile(data_path):
-    print("\n❌ El archivo movies.csv no se encuentra en la ruta especificada.")
-else:
-    print("\n✅ El archivo movies.csv ha sido encontrado correctamente.")
+    # Detectar la codificación y transcodificar a UTF-8 (solo si la fuente cambió)
+    with stage("ingest"):
+        ingest(data_path, utf8_data_path)
+    source_encoding = read_metadata(utf8_data_path)["source_encoding"]
 
     # Cargar el dataset
-    df = pd.read_csv(data_path, encoding="ISO-8859-1")
+    with stage("load") as info:
+        df = pd.read_csv(utf8_data_path, encoding="utf-8")
+        info["rows"] = len(df)
+
+    # Validar con las reglas declarativas (también convierte 'releaseDate'
+    # a fecha y las columnas numéricas); las filas inválidas van a cuarentena
+    registry = registry_mark()
+    with stage("validate", rows=len(df)) as info:
+        n_loaded = len(df)
+        df, quarantine, validation_summary, n_nullified = validate(df)
+        info["rows"] = n_loaded
+    quarantine.to_csv(quarantine_path, index=False, encoding="utf-8")
+    register_table("script", "validation_summary", validation_summary)
+    n_quarantined = len(quarantine)
+    register_value("script", "rows_loaded", n_loaded)
+    register_value("script", "rows_quarantined", n_quarantined)
+    register_value("script", "rows_nullified", n_nullified)
+    register_value("script", "rows_clean", len(df))
+    print_summary(validation_summary, n_loaded, n_quarantined, n_nullified)
+    print(f"📂 Cuarentena guardada en: {quarantine_path}")
+
+    # MUESTRA (ver muestreo.py): describe, el cubo de resumen, los gráficos
+    # y las pruebas de normalidad usan una muestra de las filas válidas; la
+    # imputación, el CSV limpio y los conteos siguen usando todas las filas.
+    # Aquí todo está en memoria: reservorio:<filas> es una muestra uniforme
+    # de ese tamaño.
+    sampling_plan = SamplingPlan.from_env()
+    sample = None
+    if sampling_plan is not None:
+        with stage(f"sample:{sampling_plan.method}", rows=len(df)):
+            sample = draw_sample(df, sampling_plan)
+        errors = sampling_errors(sample)
+        register_table("muestra", "sampling_errors_script", errors)
+        register_value("muestra", "sample_rows_script", len(sample.frame))
+        register_value("muestra", "population_rows_script", sample.population)
+        print_sampling_report(sample, errors)
 
-    # Convertir 'releaseDate' a tipo fecha
-    df["releaseDate"] = pd.to_datetime(df["releaseDate"], errors="coerce")
+    def explore(frame):
+        return frame if sample is None else sample.rows(frame)
 
     # Mostrar información general
     print("\n🔍 Información general del dataset:")
@@ -36,96 +102,130 @@ else:
 
     # Revisar datos faltantes
     print("\n⚠️  Datos faltantes en el dataset:")
-    print(df.isnull().sum())
+    missing_values = df.isnull().sum()
+    register_table("script", "missing_values", missing_values.rename("missing").rename_axis("Variable"))
+    print(missing_values)
 
     # Descripción estadística de las variables numéricas
     print("\n📊 Estadísticas de las variables numéricas:")
-    print(df.describe().applymap(lambda x: f"{x:,.2f}"))
+    with stage("describe", rows=len(explore(df))):
+        numeric_summary = explore(df).describe()
+    register_table("script", "numeric_summary", numeric_summary.rename_axis("statistic"))
+    print(numeric_summary.to_string(float_format=format_number))
 
-    # Crear la carpeta 'data/' si no existe
-    if not os.path.exists(data_dir):
-        os.makedirs(data_dir)
-        print(f"📂 Carpeta creada: {data_dir}")
+    # Mismo resumen por género, idioma y década (ver resumen.py)
+    with stage("summary_cube", rows=len(explore(df))):
+        cube = summary_cube(explore(df))
+    register_table("script", "summary_cube", cube)
+    print(f"\n📊 Resumen por género, idioma y década: {len(cube):,} filas (tabla summary_cube)")
+
+    # Imputar budget y revenue faltantes (IMPUTACION=median|knn|none) con
+    # indicadores <columna>_imputed para incluir o excluir esos valores
+    imputation_method = os.environ.get("IMPUTACION", "median")
+    with stage(f"impute:{imputation_method}", rows=len(df)):
+        df = impute(df, method=imputation_method)
+    imputation_df = imputation_summary(df)
+    register_table("script", "imputation_summary", imputation_df)
+    print(f"\n🩹 Imputación de budget/revenue ({imputation_method}):")
+    print(imputation_df.to_string(index=False))
 
     # Guardar el dataset limpio
-    df.to_csv(clean_data_path, index=False)
+    # releaseDay: fecha de estreno en días desde 1970-01-01 (int64), los
+    # lectores la usan en lugar de volver a convertir releaseDate
+    with stage("save_clean", rows=len(df)):
+        df.insert(df.columns.get_loc("releaseDate") + 1, DAY_COLUMN, to_epoch_days(df["releaseDate"]))
+        df.to_csv(clean_data_path, index=False, encoding="utf-8")
+        write_metadata(clean_data_path, encoding="utf-8", source_encoding=source_encoding)
     print(f"\n✅ Datos guardados en: {clean_data_path}")
 
+    # Variables de texto (título, título original, dominio de homePage) con
+    # tokens por hashing, guardadas junto al CSV limpio
+    with stage("text_features", rows=len(df)):
+        text_dense_path, _ = extract_text_features(clean_data_path)
+    text_scripts = pd.read_csv(text_dense_path, usecols=["original_script"])["original_script"].value_counts()
+    register_table("script", "text_original_script_counts", text_scripts)
+
     ### Clasificación Automática de Variables ###
-    # Diccionario para clasificar las variables
-    classification = {}
+    with stage("classification", rows=len(df)):
+        # Diccionario para clasificar las variables
+        classification = {}
 
-    for column in df.columns:
-        dtype = df[column].dtype  # Obtener el tipo de dato de la columna
+        for column in df.columns:
+            dtype = df[column].dtype  # Obtener el tipo de dato de la columna
         
-        if dtype == "object":
-            classification[column] = "Cualitativa Nominal"
-        elif dtype == "int64":
-            classification[column] = "Cuantitativa Discreta"
-        elif dtype == "float64":
-            classification[column] = "Cuantitativa Continua"
-        elif "datetime" in str(dtype):
-            classification[column] = "Cualitativa Nominal"
+            if dtype == "object":
+                classification[column] = "Cualitativa Nominal"
+            elif dtype == "int64":
+                classification[column] = "Cuantitativa Discreta"
+            elif dtype == "float64":
+                classification[column] = "Cuantitativa Continua"
+            elif "datetime" in str(dtype):
+                classification[column] = "Cualitativa Nominal"
     
-    # Correcciones manuales para ciertas variables mal detectadas
-    continuous_vars = ["budget", "revenue", "runtime", "popularity", "voteAvg", "actorsPopularity"]
-    discrete_vars = ["castWomenAmount", "castMenAmount"]
+        # Correcciones manuales para ciertas variables mal detectadas
+        continuous_vars = ["budget", "revenue", "runtime", "popularity", "voteAvg", "actorsPopularity"]
+        discrete_vars = ["castWomenAmount", "castMenAmount"]
 
-    for var in continuous_vars:
-        if var in classification:
-            classification[var] = "Cuantitativa Continua"
+        for var in continuous_vars:
+            if var in classification:
+                classification[var] = "Cuantitativa Continua"
 
-    for var in discrete_vars:
-        if var in classification:
-            classification[var] = "Cuantitativa Discreta"
+        for var in discrete_vars:
+            if var in classification:
+                classification[var] = "Cuantitativa Discreta"
     
-    # Convertir la clasificación a un DataFrame
-    classification_df = pd.DataFrame(list(classification.items()), columns=["Variable", "Tipo"])
+        # Convertir la clasificación a un DataFrame
+        classification_df = pd.DataFrame(list(classification.items()), columns=["Variable", "Tipo"])
 
-    # Mostrar la clasificación
-    print("\n📌 Clasificación de las Variables:")
-    print(classification_df)
+        # Mostrar la clasificación
+        print("\n📌 Clasificación de las Variables:")
+        print(classification_df)
+    register_table("script", "variable_classification", classification_df)
 
     # Convertir variables numéricas que puedan estar en texto
-    for var in continuous_vars:
-        df[var] = pd.to_numeric(df[var], errors='coerce') 
+    with stage("numeric_coercion", rows=len(df)):
+        for var in continuous_vars:
+            df[var] = pd.to_numeric(df[var], errors='coerce') 
 
     ### Análisis de Distribución Normal ###
     print("\n📊 Generando gráficos de distribución...")
+    explored = explore(df)
 
     for var in continuous_vars:
-        plt.figure(figsize=(8, 4))
-
-        try:
-            # Filtrar valores extremos usando el método IQR (Rango Intercuartílico)
-            Q1 = np.percentile(df[var].dropna(), 25)
-            Q3 = np.percentile(df[var].dropna(), 75)
-            IQR = Q3 - Q1
-            lower_bound = Q1 - 1.5 * IQR
-            upper_bound = Q3 + 1.5 * IQR
-
-            # Aplicar filtro solo a `actorsPopularity` para mejorar rendimiento
-            if var == "actorsPopularity":
-                filtered_data = df[(df[var] >= lower_bound) & (df[var] <= upper_bound)][var]
-
-                # Agregar un límite en el eje X para evitar que el gráfico se deforme
-                max_x = min(upper_bound, filtered_data.max())  
-
-                sns.histplot(filtered_data, kde=True, bins=20)
-                plt.xlim(left=filtered_data.min(), right=max_x)
-                plt.title(f"Distribución de {var} (Filtrada)")
-            else:
-                filtered_data = df[var]
-                sns.histplot(filtered_data, kde=True, bins=30)
-                plt.title(f"Distribución de {var}")
-
-            plt.xlabel(var)
-            plt.ylabel("Frecuencia")
-            plt.show()
-
-        except Exception as e:
-            print(f"⚠️ No se pudo graficar {var} debido a un error: {e}")
-            
+        with stage(f"plot:{var}", rows=len(explored)):
+            try:
+                # Filtrar valores extremos usando el método IQR (Rango Intercuartílico)
+                Q1 = np.percentile(explored[var].dropna(), 25)
+                Q3 = np.percentile(explored[var].dropna(), 75)
+                IQR = Q3 - Q1
+                lower_bound = Q1 - 1.5 * IQR
+                upper_bound = Q3 + 1.5 * IQR
+
+                # Aplicar filtro solo a `actorsPopularity` para mejorar rendimiento
+                if var == "actorsPopularity":
+                    filtered_data = explored[(explored[var] >= lower_bound) & (explored[var] <= upper_bound)][var]
+
+                    # Agregar un límite en el eje X para evitar que el gráfico se deforme
+                    max_x = min(upper_bound, filtered_data.max())
+
+                    plot(ChartSpec(
+                        f"dist_{var}", "histkde", filtered_data,
+                        title=f"Distribución de {var} (Filtrada)", xlabel=var, ylabel="Frecuencia",
+                        figsize=(8, 4),
+                        options={"bins": 20, "xlim": (float(filtered_data.min()), float(max_x))},
+                    ))
+                else:
+                    plot(ChartSpec(
+                        f"dist_{var}", "histkde", explored[var],
+                        title=f"Distribución de {var}", xlabel=var, ylabel="Frecuencia",
+                        figsize=(8, 4), options={"bins": 30},
+                    ))
+
+            except Exception as e:
+                print(f"⚠️ No se pudo graficar {var} debido a un error: {e}")
+
+    with stage("render_figures"):
+        flush()
     print("\nProceso terminado...")
 
     ### Pruebas de Normalidad ###
@@ -133,18 +233,22 @@ else:
     normality_results = []
 
     for var in continuous_vars:
-        data = df[var].dropna()  # Eliminar valores nulos
-        shapiro_test = stats.shapiro(data) if len(data) < 5000 else (None, None)
-        ks_test = stats.kstest(data, 'norm')
+        data = explored[var].dropna()  # Eliminar valores nulos
+        with stage(f"normality:{var}", rows=len(data)):
+            shapiro_test = stats.shapiro(data) if len(data) < 5000 else (None, None)
+            ks_test = stats.kstest(data, 'norm')
 
         normality_results.append({
             "Variable": var,
-            "Shapiro-Wilk p-valor": f"{shapiro_test[1]:.6f}" if shapiro_test[1] is not None else "N/A",
+            "Shapiro-Wilk p-valor": shapiro_test[1] if shapiro_test[1] is not None else np.nan,
             "Kolmogorov-Smirnov p-valor": ks_test.pvalue
         })
 
     normality_df = pd.DataFrame(normality_results)
-    print(normality_df)
+    register_table("script", "normality_tests", normality_df)
+    print(normality_df.to_string(formatters={
+        "Shapiro-Wilk p-valor": lambda p: f"{p:.6f}" if pd.notna(p) else "N/A"
+    }))
 
     ### Tablas de Frecuencia de Variables Cualitativas ###
     print("\n📊 Tablas de Frecuencias de Variables Cualitativas:")
@@ -152,6 +256,26 @@ else:
 
     for var in qualitative_vars:
         print(f"\n🔹 {var}:")
-        print(df[var].value_counts().head(10))
+        frequencies = df[var].value_counts()
+        register_table("script", f"frequency_{var}", frequencies)
+        print(frequencies.head(10))
         # Para poder observar todos los datos
-        # print(df[var].value_counts().to_frame().rename(columns={var: "count"}))
\ No newline at end of file
+        # print(df[var].value_counts().to_frame().rename(columns={var: "count"}))
+
+    if sample is not None:
+        exact = {"validation_summary", "missing_values", "imputation_summary", "text_original_script_counts",
+                 "variable_classification"} | {f"frequency_{var}" for var in qualitative_vars}
+        register_table("muestra", "sampling_annotations_script",
+                       table_annotations(registry_since(registry)["tables"], exact, sample))
+
+    write_sqlite(results_path, source="script", mark=registry)
+    write_report("script", data_dir)
+    return True
+
+
+if __name__ == "__main__":
+    # Uso: python src/script.py [movies.csv] [carpeta_de_salida]
+    data_dir = sys.argv[2] if len(sys.argv) > 2 else default_data_dir
+    data_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(default_data_dir, "movies.csv")
+    if not run(data_path, data_dir):
+        sys.exit(1)
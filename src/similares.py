@@ -0,0 +1,347 @@
+import argparse
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from agrupamiento import (NUMERIC_FEATURES, Standardizer, minibatch_kmeans, raw_features, read_chunks,
+                          sample_pass, sq_distances)
+from bloques import map_chunks
+from exportar import register_table, write_sqlite
+from ingesta import dataset_encoding
+from modelo import actor_popularity_stats, genre_matrix, genre_vocabulary
+from perfilado import stage, write_report
+from preparacion import DATA_DIR, clean_data_path
+
+# -----------------------------------------------------------
+# Películas similares: índice aproximado de vecinos (IVF)
+# -----------------------------------------------------------
+# Cada película es un vector con las variables numéricas de
+# agrupamiento.py, un resumen de actorsPopularity (media, máximo y cantidad)
+# y los géneros en multi-hot, estandarizado con sumas por bloques.
+#   - Construcción: k-means por minilotes sobre una muestra define
+#     ~sqrt(N) centros ("listas"); una pasada por bloques asigna cada
+#     película a su centro y los vectores se guardan ordenados por lista
+#     (float32), así cada lista es un tramo contiguo del archivo.
+#   - Consulta: se eligen los nprobe centros más cercanos y solo se
+#     recorren esas listas. Los archivos se abren con mmap, de modo que
+#     cargar el índice no lee los vectores y cada consulta solo toca las
+#     listas que visita. Las consultas se resuelven en lote: cada lista se
+#     lee una vez para todas las consultas que la visitan.
+# Archivos en movies_clean.similar/ (centros, offsets, vectores, ids, index.json).
+#
+# Uso:
+#   python src/similares.py construir [datos] [--listas N] [--procesos N]
+#   python src/similares.py buscar [datos] --ids 5 6 [--k 10] [--nprobe 8]
+#   python src/similares.py evaluar [datos] [--consultas 200]
+
+INDEX_COLUMNS = NUMERIC_FEATURES + ["actorsPopularity"]
+CHUNK_ROWS = 100_000
+SAMPLE_SIZE = 200_000
+NPROBE = 8
+BENCHMARK_NPROBES = [1, 2, 4, 8, 16, 32, 64]
+SCAN_ROWS = 262_144
+
+
+def index_path(clean_path):
+    return os.path.splitext(clean_path)[0] + ".similar"
+
+
+def _source_signature(csv_path):
+    st = os.stat(csv_path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def similarity_features(chunk):
+    # Variables numéricas + log(1 + media / máximo / cantidad) de popularidad de actores
+    actors = actor_popularity_stats(chunk["actorsPopularity"]).to_numpy(dtype=float)
+    return np.hstack([raw_features(chunk), np.log1p(np.clip(actors, 0, None))])
+
+
+def gather(array, positions):
+    # array[positions] leyendo el mmap en orden creciente (acceso secuencial al disco)
+    order = np.argsort(positions, kind="stable")
+    out = np.empty((len(positions),) + array.shape[1:], dtype=array.dtype)
+    out[order] = array[positions[order]]
+    return out
+
+
+def _encode_chunk(chunk, genres, scaler, centroids):
+    x = scaler.transform(similarity_features(chunk), genre_matrix(chunk["genres"], genres))
+    labels = sq_distances(x, centroids).argmin(axis=1).astype(np.int32)
+    return chunk["id"].to_numpy(dtype=np.int64), x.astype(np.float32), labels
+
+
+# -----------------------------------------------------------
+# Construcción
+# -----------------------------------------------------------
+def build_index(data_dir=DATA_DIR, n_lists=None, workers=None, chunk_rows=CHUNK_ROWS,
+                sample_size=SAMPLE_SIZE, seed=0):
+    csv_path = clean_data_path(data_dir)
+    path = index_path(csv_path)
+    tmp_path = path + ".tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    with stage("similar:genres"):
+        genres = genre_vocabulary(csv_path)
+
+    with stage("similar:sample") as info:
+        total = sample_pass(csv_path, genres, workers, chunk_rows, sample_size, seed,
+                            features=similarity_features, columns=INDEX_COLUMNS)
+        info["rows"] = total["rows"]
+    rows = int(total["rows"])
+    scaler = Standardizer(total["count"], total["sum"], total["sumsq"])
+    sample = scaler.transform(total["sample"], total["genres"])
+    n_lists = min(n_lists or max(1, int(np.sqrt(rows))), len(sample))
+
+    with stage("similar:centroids", rows=len(sample)):
+        centroids, _ = minibatch_kmeans(sample, n_lists, seed, batch_size=max(1024, 4 * n_lists),
+                                        init="random")
+
+    # Vectores en el orden del CSV (archivo temporal), luego reordenados por lista
+    with stage("similar:encode", rows=rows):
+        unordered = np.lib.format.open_memmap(os.path.join(tmp_path, "unordered.npy"), mode="w+",
+                                              dtype=np.float32, shape=(rows, centroids.shape[1]))
+        ids = np.empty(rows, dtype=np.int64)
+        labels = np.empty(rows, dtype=np.int32)
+        start = 0
+        for chunk_ids, x, chunk_labels in map_chunks(_encode_chunk, read_chunks(csv_path, chunk_rows, INDEX_COLUMNS),
+                                                     workers, args=(genres, scaler, centroids)):
+            end = start + len(chunk_ids)
+            unordered[start:end] = x
+            ids[start:end] = chunk_ids
+            labels[start:end] = chunk_labels
+            start = end
+
+    with stage("similar:write", rows=rows):
+        order = np.argsort(labels, kind="stable")
+        offsets = np.searchsorted(labels[order], np.arange(n_lists + 1)).astype(np.int64)
+        vectors = np.lib.format.open_memmap(os.path.join(tmp_path, "vectors.npy"), mode="w+",
+                                            dtype=np.float32, shape=unordered.shape)
+        for block in range(0, rows, SCAN_ROWS):
+            vectors[block:block + SCAN_ROWS] = gather(unordered, order[block:block + SCAN_ROWS])
+        vectors.flush()
+        del vectors, unordered
+        os.remove(os.path.join(tmp_path, "unordered.npy"))
+
+        ordered_ids = ids[order]
+        by_id = np.argsort(ordered_ids, kind="stable")
+        np.save(os.path.join(tmp_path, "centroids.npy"), centroids.astype(np.float32))
+        np.save(os.path.join(tmp_path, "offsets.npy"), offsets)
+        np.save(os.path.join(tmp_path, "ids.npy"), ordered_ids)
+        np.save(os.path.join(tmp_path, "sorted_ids.npy"), ordered_ids[by_id])
+        np.save(os.path.join(tmp_path, "sorted_positions.npy"), by_id.astype(np.int64))
+        with open(os.path.join(tmp_path, "index.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "rows": rows, "lists": n_lists, "genres": list(genres),
+                "mean": scaler.mean.tolist(), "std": scaler.std.tolist(), "genre_weight": scaler.genre_weight,
+                "source": os.path.abspath(csv_path), "source_signature": _source_signature(csv_path),
+            }, f, indent=2, ensure_ascii=False)
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+    sizes = np.diff(offsets)
+    print(f"✅ Índice de similares guardado en: {path} ({rows:,} películas, {n_lists:,} listas, "
+          f"lista media {sizes.mean():,.0f} / máxima {sizes.max():,})")
+    return path
+
+
+# -----------------------------------------------------------
+# Consulta
+# -----------------------------------------------------------
+class SimilarIndex:
+    def __init__(self, path):
+        with open(os.path.join(path, "index.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.genres = pd.Index(self.meta["genres"])
+        self.scaler = Standardizer.from_moments(self.meta["mean"], self.meta["std"], self.meta["genre_weight"])
+        self.centroids = np.load(os.path.join(path, "centroids.npy"))
+        self.offsets = np.load(os.path.join(path, "offsets.npy"))
+        # Vectores e ids por mmap: solo se leen las listas visitadas
+        self.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        self.ids = np.load(os.path.join(path, "ids.npy"), mmap_mode="r")
+        self.sorted_ids = np.load(os.path.join(path, "sorted_ids.npy"), mmap_mode="r")
+        self.sorted_positions = np.load(os.path.join(path, "sorted_positions.npy"), mmap_mode="r")
+
+    @classmethod
+    def open(cls, data_dir=DATA_DIR):
+        csv_path = clean_data_path(data_dir)
+        path = index_path(csv_path)
+        if not os.path.isfile(os.path.join(path, "index.json")):
+            raise FileNotFoundError(f"No hay índice de similares en {path}. "
+                                    "Ejecuta: python src/similares.py construir")
+        index = cls(path)
+        if index.meta.get("source_signature") != _source_signature(csv_path):
+            print("⚠️ movies_clean.csv cambió desde que se construyó el índice de similares; "
+                  "conviene reconstruirlo.")
+        return index
+
+    def __len__(self):
+        return len(self.ids)
+
+    def encode(self, chunk):
+        # Vectores de consulta para películas que no están en el índice
+        x = self.scaler.transform(similarity_features(chunk), genre_matrix(chunk["genres"], self.genres))
+        return x.astype(np.float32)
+
+    def positions(self, movie_ids):
+        movie_ids = np.asarray(movie_ids, dtype=np.int64)
+        found = np.searchsorted(self.sorted_ids, movie_ids)
+        found = np.minimum(found, len(self.sorted_ids) - 1)
+        missing = self.sorted_ids[found] != movie_ids
+        if missing.any():
+            raise KeyError(f"ids fuera del índice: {movie_ids[missing].tolist()}")
+        return np.asarray(self.sorted_positions[found])
+
+    def search(self, queries, k=10, nprobe=NPROBE, exclude=None):
+        # Devuelve (distancias, posiciones) de forma (n, k); inf / -1 si faltan vecinos.
+        # exclude: posición a ignorar por consulta (la propia película)
+        queries = np.asarray(queries, dtype=np.float32)
+        n = len(queries)
+        nprobe = min(nprobe, len(self.centroids))
+        probes = np.argpartition(sq_distances(queries, self.centroids), nprobe - 1, axis=1)[:, :nprobe]
+        best_d = np.full((n, k), np.inf, dtype=np.float32)
+        best_i = np.full((n, k), -1, dtype=np.int64)
+
+        # Pares (consulta, lista) agrupados por lista: cada lista se lee una vez
+        pair_lists = probes.ravel()
+        pair_queries = np.repeat(np.arange(n), nprobe)
+        order = np.argsort(pair_lists, kind="stable")
+        pair_lists, pair_queries = pair_lists[order], pair_queries[order]
+        bounds = np.flatnonzero(np.diff(pair_lists)) + 1
+        starts = np.concatenate([[0], bounds])
+        for start, rows in zip(starts, np.split(pair_queries, bounds)):
+            lst = pair_lists[start]
+            lo, hi = self.offsets[lst], self.offsets[lst + 1]
+            if hi == lo:
+                continue
+            members = np.asarray(self.vectors[lo:hi])
+            d = sq_distances(queries[rows], members)
+            if exclude is not None:
+                own = exclude[rows] - lo
+                inside = (own >= 0) & (own < hi - lo)
+                d[np.flatnonzero(inside), own[inside]] = np.inf
+            kk = min(k, hi - lo)
+            part = np.argpartition(d, kk - 1, axis=1)[:, :kk]
+            # Fusión con los mejores hasta ahora
+            cand_d = np.hstack([best_d[rows], np.take_along_axis(d, part, axis=1)])
+            cand_i = np.hstack([best_i[rows], part + lo])
+            top = np.argpartition(cand_d, k - 1, axis=1)[:, :k]
+            best_d[rows] = np.take_along_axis(cand_d, top, axis=1)
+            best_i[rows] = np.take_along_axis(cand_i, top, axis=1)
+
+        return _sorted(best_d, best_i)
+
+    def exact_search(self, queries, k=10, exclude=None):
+        # Recorrido completo por bloques (referencia para medir el recall)
+        queries = np.asarray(queries, dtype=np.float32)
+        n = len(queries)
+        best_d = np.full((n, k), np.inf, dtype=np.float32)
+        best_i = np.full((n, k), -1, dtype=np.int64)
+        for lo in range(0, len(self.vectors), SCAN_ROWS):
+            block = np.asarray(self.vectors[lo:lo + SCAN_ROWS])
+            d = sq_distances(queries, block)
+            if exclude is not None:
+                own = exclude - lo
+                inside = (own >= 0) & (own < len(block))
+                d[np.flatnonzero(inside), own[inside]] = np.inf
+            kk = min(k, len(block))
+            part = np.argpartition(d, kk - 1, axis=1)[:, :kk]
+            cand_d = np.hstack([best_d, np.take_along_axis(d, part, axis=1)])
+            cand_i = np.hstack([best_i, part + lo])
+            top = np.argpartition(cand_d, k - 1, axis=1)[:, :k]
+            best_d = np.take_along_axis(cand_d, top, axis=1)
+            best_i = np.take_along_axis(cand_i, top, axis=1)
+        return _sorted(best_d, best_i)
+
+    def similar_to(self, movie_ids, k=10, nprobe=NPROBE):
+        # Tabla (id, rank, similar_id, distance) con las k películas más parecidas a cada id
+        pos = self.positions(movie_ids)
+        dist, idx = self.search(gather(self.vectors, pos), k, nprobe, exclude=pos)
+        valid = idx >= 0
+        return pd.DataFrame({
+            "id": np.repeat(np.asarray(movie_ids, dtype=np.int64), k)[valid.ravel()],
+            "rank": np.tile(np.arange(1, k + 1), len(pos))[valid.ravel()],
+            "similar_id": np.asarray(self.ids)[idx[valid]],
+            "distance": np.sqrt(np.maximum(dist[valid], 0)),
+        })
+
+
+def _sorted(dist, idx):
+    order = np.argsort(dist, axis=1, kind="stable")
+    dist = np.take_along_axis(dist, order, axis=1)
+    idx = np.take_along_axis(idx, order, axis=1)
+    idx[np.isinf(dist)] = -1
+    return dist, idx
+
+
+# -----------------------------------------------------------
+# Recall vs. latencia
+# -----------------------------------------------------------
+def benchmark(index, n_queries=200, k=10, nprobes=BENCHMARK_NPROBES, seed=0):
+    rng = np.random.default_rng(seed)
+    pos = np.sort(rng.choice(len(index), min(n_queries, len(index)), replace=False))
+    queries = gather(index.vectors, pos)
+
+    start = time.perf_counter()
+    _, exact = index.exact_search(queries, k, exclude=pos)
+    exact_ms = (time.perf_counter() - start) * 1000 / len(pos)
+
+    rows = []
+    for nprobe in nprobes:
+        if nprobe > len(index.centroids):
+            break
+        start = time.perf_counter()
+        _, found = index.search(queries, k, nprobe, exclude=pos)
+        ms = (time.perf_counter() - start) * 1000 / len(pos)
+        hits = [len(np.intersect1d(a[a >= 0], b[b >= 0])) for a, b in zip(found, exact)]
+        expected = (exact >= 0).sum()
+        rows.append({"nprobe": nprobe, "recall_at_k": sum(hits) / max(expected, 1),
+                     "ms_per_query": ms, "speedup": exact_ms / ms if ms > 0 else np.nan})
+    rows.append({"nprobe": len(index.centroids), "recall_at_k": 1.0, "ms_per_query": exact_ms, "speedup": 1.0})
+    table = pd.DataFrame(rows)
+    table.insert(0, "method", ["ivf"] * (len(table) - 1) + ["exact"])
+    return table
+
+
+def _titles(data_dir, ids):
+    # Títulos de los ids pedidos, leyendo el CSV por bloques
+    csv_path = clean_data_path(data_dir)
+    parts = [chunk[chunk["id"].isin(ids)] for chunk in pd.read_csv(
+        csv_path, usecols=["id", "title"], chunksize=CHUNK_ROWS, encoding=dataset_encoding(csv_path))]
+    return pd.concat(parts).set_index("id")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Índice aproximado de películas similares.")
+    parser.add_argument("accion", choices=["construir", "buscar", "evaluar"])
+    parser.add_argument("datos", nargs="?", default=DATA_DIR, help="carpeta con movies_clean.csv")
+    parser.add_argument("--listas", type=int, default=None, help="cantidad de listas (por defecto, sqrt(N))")
+    parser.add_argument("--procesos", type=int, default=None)
+    parser.add_argument("--ids", type=int, nargs="+", default=[], help="ids de las películas a consultar")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, default=NPROBE, help="listas visitadas por consulta")
+    parser.add_argument("--consultas", type=int, default=200, help="consultas del benchmark")
+    args = parser.parse_args()
+
+    if args.accion == "construir":
+        build_index(args.datos, n_lists=args.listas, workers=args.procesos)
+        write_report("similares", args.datos)
+    elif args.accion == "buscar":
+        index = SimilarIndex.open(args.datos)
+        result = index.similar_to(args.ids, args.k, args.nprobe)
+        titles = _titles(args.datos, np.concatenate([args.ids, result["similar_id"].to_numpy()]))
+        result["title"] = result["id"].map(titles["title"])
+        result["similar_title"] = result["similar_id"].map(titles["title"])
+        print(result.to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+    else:
+        index = SimilarIndex.open(args.datos)
+        table = benchmark(index, args.consultas, args.k)
+        print(f"\n📈 Recall@{args.k} vs. latencia ({len(index):,} películas, {len(index.centroids):,} listas):")
+        print(table.to_string(index=False, float_format=lambda x: f"{x:,.3f}"))
+        register_table("similar", "ann_benchmark", table)
+        write_sqlite(os.path.join(args.datos, "resultados.sqlite"), source="similares")
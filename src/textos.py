@@ -0,0 +1,142 @@
+import os
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from bloques import map_chunks
+from ingesta import dataset_encoding, read_metadata, write_metadata
+
+# -----------------------------------------------------------
+# Variables de texto: title, originalTitle y homePage
+# -----------------------------------------------------------
+# El CSV limpio se lee por bloques (solo las columnas de texto) y los
+# bloques se procesan en paralelo (bloques.map_chunks):
+#   - Variables densas: largo del título, cantidad de palabras, título
+#     distinto del original, proporción de caracteres no ASCII, alfabeto
+#     dominante del título original, dígitos / marcas de secuela y dominio
+#     de nivel superior de la página oficial (.es, .fr, ...).
+#   - Tokens: "hashing trick" sobre las palabras (sin vocabulario en
+#     memoria). Cada token se convierte con pd.util.hash_array (hash
+#     estable entre procesos y corridas) en una columna de una matriz
+#     dispersa CSR de N_FEATURES columnas, con signo según un bit del hash.
+# Resultados junto al CSV limpio (mismas filas y orden):
+#   movies_clean.text.csv  (id + variables densas)
+#   movies_clean.text.npz  (matriz dispersa de tokens)
+# Se regeneran solo si movies_clean.csv cambió.
+
+TEXT_COLUMNS = ["id", "title", "originalTitle", "homePage"]
+N_FEATURES = 1 << 18
+CHUNK_ROWS = 50_000
+
+TOKEN_PATTERN = r"[^\W_]+"
+SEQUEL_PATTERN = r"(?:\b(?:II|III|IV|2|3|4|5)\b|\bPart\b|\bParte\b|\bChapter\b|\bCapítulo\b)"
+SCRIPTS = {
+    "cjk": r"[぀-ヿ㐀-鿿가-힯]",
+    "cyrillic": r"[Ѐ-ӿ]",
+    "arabic": r"[؀-ۿ]",
+    "hebrew": r"[֐-׿]",
+    "greek": r"[Ͱ-Ͽ]",
+    "devanagari": r"[ऀ-ॿ]",
+    "thai": r"[฀-๿]",
+}
+
+
+def features_paths(clean_data_path):
+    base = os.path.splitext(clean_data_path)[0]
+    return base + ".text.csv", base + ".text.npz"
+
+
+def _dense_features(chunk):
+    title = chunk["title"].fillna("").astype(str)
+    original = chunk["originalTitle"].fillna("").astype(str)
+    homepage = chunk["homePage"].fillna("").astype(str).str.lower()
+
+    title_len = title.str.len()
+    original_len = original.str.len()
+    non_ascii = original.str.count(r"[^\x00-\x7f]")
+
+    script = pd.Series("latin", index=chunk.index)
+    script[original_len == 0] = "none"
+    for name, pattern in SCRIPTS.items():
+        script[original.str.contains(pattern, regex=True)] = name
+
+    return pd.DataFrame({
+        "id": chunk["id"],
+        "title_length": title_len,
+        "title_words": title.str.count(TOKEN_PATTERN),
+        "title_differs_original": (title != original) & (original_len > 0),
+        "original_non_ascii_ratio": (non_ascii / original_len.where(original_len > 0)).fillna(0.0),
+        "original_script": script,
+        "title_has_digits": title.str.contains(r"\d", regex=True),
+        "title_sequel_marker": title.str.contains(SEQUEL_PATTERN, regex=True, case=False),
+        "homepage_tld": homepage.str.extract(r"^[a-z]+://[^/:?#]*\.([a-z]{2,})(?:[/:?#]|$)", expand=False),
+    })
+
+
+def _token_matrix(chunk, n_features=N_FEATURES):
+    # Tokens con prefijo de campo (t: título, o: original, h: dominio) para
+    # que la misma palabra en distintas columnas no comparta coordenada
+    fields = [
+        ("t:", chunk["title"].fillna("").astype(str).str.lower()),
+        ("o:", chunk["originalTitle"].fillna("").astype(str).str.lower()),
+        ("h:", chunk["homePage"].fillna("").astype(str).str.lower()
+               .str.extract(r"^[a-z]+://([^/:?#]*)", expand=False).fillna("")),
+    ]
+    rows, tokens = [], []
+    positions = pd.RangeIndex(len(chunk))
+    for prefix, text in fields:
+        exploded = pd.Series(text.to_numpy(), index=positions).str.findall(TOKEN_PATTERN).explode().dropna()
+        rows.append(exploded.index.to_numpy(dtype=np.int64))
+        tokens.append(prefix + exploded.astype(str).to_numpy(dtype=object))
+
+    rows = np.concatenate(rows)
+    tokens = np.concatenate(tokens) if len(rows) else np.empty(0, dtype=object)
+    hashes = pd.util.hash_array(tokens, categorize=True)
+    cols = (hashes % np.uint64(n_features)).astype(np.int64)
+    signs = np.where((hashes >> np.uint64(63)) & np.uint64(1), -1.0, 1.0)
+    # coo -> csr suma los tokens repetidos dentro de una misma película
+    return sp.coo_matrix((signs, (rows, cols)), shape=(len(chunk), n_features)).tocsr()
+
+
+def _process_chunk(chunk, n_features=N_FEATURES):
+    return _dense_features(chunk), _token_matrix(chunk, n_features)
+
+
+def extract_text_features(clean_data_path, workers=None, chunk_rows=CHUNK_ROWS, n_features=N_FEATURES):
+    dense_path, tokens_path = features_paths(clean_data_path)
+    st = os.stat(clean_data_path)
+    signature = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "n_features": n_features}
+    meta = read_metadata(dense_path)
+    if (meta and meta.get("source_signature") == signature
+            and os.path.isfile(dense_path) and os.path.isfile(tokens_path)):
+        print(f"✅ Reutilizando variables de texto: {dense_path}")
+        return dense_path, tokens_path
+
+    reader = pd.read_csv(clean_data_path, usecols=TEXT_COLUMNS, chunksize=chunk_rows,
+                         encoding=dataset_encoding(clean_data_path), dtype=str)
+    dense_parts, token_parts = [], []
+    for dense, tokens in map_chunks(_process_chunk, reader, workers, args=(n_features,)):
+        dense_parts.append(dense)
+        token_parts.append(tokens)
+
+    dense = pd.concat(dense_parts, ignore_index=True) if dense_parts else _dense_features(
+        pd.DataFrame(columns=TEXT_COLUMNS))
+    tokens = sp.vstack(token_parts, format="csr") if token_parts else sp.csr_matrix((0, n_features))
+
+    tmp_dense, tmp_tokens = dense_path + ".tmp", tokens_path + ".tmp.npz"
+    dense.to_csv(tmp_dense, index=False, encoding="utf-8")
+    sp.save_npz(tmp_tokens, tokens)
+    os.replace(tmp_dense, dense_path)
+    os.replace(tmp_tokens, tokens_path)
+    write_metadata(dense_path, encoding="utf-8", source=os.path.abspath(clean_data_path),
+                   source_signature=signature, n_features=n_features, nnz=int(tokens.nnz))
+    print(f"✅ Variables de texto guardadas en: {dense_path} y {tokens_path} ({tokens.nnz:,} tokens)")
+    return dense_path, tokens_path
+
+
+def load_text_features(clean_data_path):
+    # (variables densas, matriz dispersa de tokens) alineadas con movies_clean.csv
+    dense_path, tokens_path = features_paths(clean_data_path)
+    dense = pd.read_csv(dense_path, encoding="utf-8")
+    return dense, sp.load_npz(tokens_path)
@@ -0,0 +1,160 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from fechas import parse_dates
+
+# -----------------------------------------------------------
+# Validación del dataset con reglas declarativas
+# -----------------------------------------------------------
+# Cada regla describe qué filas fallan como una máscara booleana calculada
+# con operaciones vectorizadas. Las conversiones de tipo (to_numeric,
+# to_datetime) se hacen una sola vez por columna y las comparten todas las
+# reglas, así que validar cuesta aproximadamente una pasada por columna.
+#
+# Acciones:
+#   - "quarantine": la fila se separa del dataset limpio.
+#   - "nullify": el valor se reemplaza por NaN (p. ej. revenue = 0 significa
+#     "sin dato", no ingresos reales) y la fila se conserva.
+# El archivo de cuarentena tiene solo las filas separadas, con la lista de
+# reglas que no cumplen (una etiqueta por combinación distinta de fallas,
+# armada una sola vez); las filas con valores anulados se conservan y se
+# reportan como un conteo aparte.
+
+NUMERIC_COLS = ["budget", "revenue", "runtime", "popularity", "voteAvg", "voteCount",
+                "actorsAmount", "castWomenAmount", "castMenAmount"]
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    description: str
+    check: object               # función (columnas) -> máscara de filas que fallan
+    action: str = "quarantine"  # quarantine | nullify
+    column: str = None          # columna a anular cuando action == "nullify"
+
+
+class Columns:
+    # Acceso a columnas convertidas con memo: cada conversión se hace una vez
+    def __init__(self, df, today=None):
+        self.df = df
+        self.today = pd.Timestamp.today().normalize() if today is None else pd.Timestamp(today)
+        self._numeric = {}
+        self._dates = {}
+
+    def raw(self, col):
+        return self.df[col]
+
+    def numeric(self, col):
+        if col not in self._numeric:
+            self._numeric[col] = pd.to_numeric(self.df[col], errors="coerce")
+        return self._numeric[col]
+
+    def dates(self, col):
+        if col not in self._dates:
+            self._dates[col] = parse_dates(self.df[col])
+        return self._dates[col]
+
+    def converted(self):
+        return {**self._numeric, **self._dates}
+
+
+def _not_numeric(col):
+    return lambda c: c.raw(col).notna() & c.numeric(col).isna()
+
+
+def default_rules():
+    rules = [
+        Rule(f"{col}_not_numeric", f"{col} tiene un valor que no es numérico", _not_numeric(col))
+        for col in NUMERIC_COLS
+    ]
+    rules += [
+        Rule("release_date_invalid", "releaseDate no es una fecha válida",
+             lambda c: c.raw("releaseDate").notna() & c.dates("releaseDate").isna()),
+        Rule("release_date_future", "releaseDate es posterior a la fecha actual",
+             lambda c: c.dates("releaseDate") > c.today),
+        Rule("budget_negative", "budget negativo", lambda c: c.numeric("budget") < 0),
+        Rule("revenue_negative", "revenue negativo", lambda c: c.numeric("revenue") < 0),
+        Rule("runtime_negative", "runtime negativo", lambda c: c.numeric("runtime") < 0),
+        Rule("vote_avg_out_of_range", "voteAvg fuera del rango [0, 10]",
+             lambda c: (c.numeric("voteAvg") < 0) | (c.numeric("voteAvg") > 10)),
+        Rule("cast_exceeds_actors", "castWomenAmount + castMenAmount mayor que actorsAmount",
+             lambda c: c.numeric("castWomenAmount") + c.numeric("castMenAmount") > c.numeric("actorsAmount")),
+        Rule("duplicate_id", "id repetido (se conserva la primera aparición)",
+             lambda c: c.raw("id").duplicated(keep="first") & c.raw("id").notna()),
+        Rule("budget_zero", "budget = 0 (sin dato): se reemplaza por NaN",
+             lambda c: c.numeric("budget") == 0, action="nullify", column="budget"),
+        Rule("revenue_zero", "revenue = 0 (sin dato): se reemplaza por NaN",
+             lambda c: c.numeric("revenue") == 0, action="nullify", column="revenue"),
+    ]
+    return rules
+
+
+def failure_labels(failures, names):
+    # "regla_a|regla_b" por columna de la matriz reglas x filas: las filas se
+    # agrupan por patrón de fallas (bits empaquetados) y cada patrón se arma una vez
+    if failures.shape[1] == 0:
+        return np.empty(0, dtype=object)
+    packed = np.ascontiguousarray(np.packbits(failures, axis=0).T)
+    keys = packed.view(np.dtype((np.void, packed.shape[1]))).ravel()
+    patterns, inverse = np.unique(keys, return_inverse=True)
+    names = np.asarray(names, dtype=object)
+    labels = np.array([
+        "|".join(names[np.unpackbits(np.frombuffer(p.tobytes(), dtype=np.uint8))[:len(names)].astype(bool)])
+        for p in patterns
+    ], dtype=object)
+    return labels[inverse.ravel()]
+
+
+def validate(df, rules=None, today=None):
+    # Devuelve (limpio, cuarentena, resumen, filas con valores anulados). El
+    # DataFrame limpio conserva las columnas ya convertidas (fechas y numéricas)
+    # para no repetir el trabajo.
+    rules = default_rules() if rules is None else rules
+    cols = Columns(df, today=today)
+
+    # Matriz reglas x filas: una máscara por regla, sin NaN (NaN = no falla)
+    failures = np.zeros((len(rules), len(df)), dtype=bool)
+    for i, rule in enumerate(rules):
+        failures[i] = np.asarray(rule.check(cols), dtype=bool)
+
+    counts = failures.sum(axis=1)
+    quarantine_rules = np.array([rule.action == "quarantine" for rule in rules], dtype=bool)
+    to_quarantine = failures[quarantine_rules].any(axis=0)
+    n_nullified = int((failures[~quarantine_rules].any(axis=0) & ~to_quarantine).sum())
+
+    # Lista de reglas incumplidas, solo para las filas en cuarentena
+    positions = np.flatnonzero(to_quarantine)
+    quarantine = df.iloc[positions].copy()
+    quarantine.insert(0, "failed_rules", failure_labels(failures[:, positions], [rule.name for rule in rules]))
+
+    clean = df.copy()
+    for col, values in cols.converted().items():
+        clean[col] = values
+    for i, rule in enumerate(rules):
+        if rule.action == "nullify" and counts[i]:
+            clean.loc[failures[i], rule.column] = np.nan
+    clean = clean[~to_quarantine]
+
+    summary = pd.DataFrame({
+        "rule": [rule.name for rule in rules],
+        "description": [rule.description for rule in rules],
+        "action": [rule.action for rule in rules],
+        "failures": counts,
+    })
+    return clean, quarantine, summary, n_nullified
+
+
+def print_summary(summary, n_rows, n_quarantined, n_nullified=0):
+    print("\n🧪 Validación de datos:")
+    failing = summary[summary["failures"] > 0]
+    if failing.empty:
+        print("✅ Todas las reglas se cumplen.")
+    else:
+        for row in failing.itertuples(index=False):
+            icon = "🚫" if row.action == "quarantine" else "✏️"
+            print(f"{icon} {row.rule}: {row.failures:,} filas — {row.description}")
+    print(f"📦 Filas en cuarentena: {n_quarantined:,} de {n_rows:,}")
+    if n_nullified:
+        print(f"✏️ Filas conservadas con valores anulados: {n_nullified:,}")
@@ -0,0 +1,91 @@
+import os
+import sqlite3
+import sys
+from contextlib import contextmanager
+
+import pandas as pd
+import pytest
+
+# -----------------------------------------------------------
+# Corrida de referencia compartida por las pruebas
+# -----------------------------------------------------------
+# Se genera el dataset sintético (sintetico.py), se corren script.run y
+# ejercicios.run en una carpeta temporal y se guardan las tablas de
+# resultados.sqlite y los tiempos por etapa de perfilado.
+#
+#   python -m pytest -q                       compara contra tests/golden
+#   python -m pytest -q --actualizar-golden   reescribe los archivos golden
+#                                             y la línea base de rendimiento
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+GOLDEN_DIR = os.path.join(TESTS_DIR, "golden")
+SRC_DIR = os.path.normpath(os.path.join(TESTS_DIR, "..", "src"))
+sys.path.insert(0, SRC_DIR)
+sys.path.insert(0, TESTS_DIR)
+
+# Configuración fija de la corrida: sin puntos de control, imputación por mediana
+PIPELINE_ENV = {"REANUDAR": "no", "IMPUTACION": "median", "FIGURAS_ESCRITOR": "hilo"}
+CLEARED_ENV = ["IMPUTADOS", "MOTOR", "RANGOS_REPARTO", "CALIFICACION", "CALIFICACION_MEDIA",
+               "CALIFICACION_VOTOS", "CALIFICACION_MIN_VOTOS", "SIGNIFICANCIA", "SIGNIFICANCIA_SEGUNDOS",
+               "MUESTRA", "MUESTRA_SEMILLA", "TAQUILLA", "HISTORIAL_CALIFICACIONES"]
+
+
+def pytest_addoption(parser):
+    parser.addoption("--actualizar-golden", action="store_true", default=False,
+                     help="Reescribe tests/golden con los resultados de esta corrida")
+
+
+@pytest.fixture(scope="session")
+def update_golden(request):
+    return request.config.getoption("--actualizar-golden")
+
+
+@contextmanager
+def pipeline_env():
+    # Fija PIPELINE_ENV, quita CLEARED_ENV y restaura el entorno al salir
+    saved_env = {key: os.environ.get(key) for key in list(PIPELINE_ENV) + CLEARED_ENV}
+    os.environ.update(PIPELINE_ENV)
+    for key in CLEARED_ENV:
+        os.environ.pop(key, None)
+    try:
+        yield
+    finally:
+        for key, value in saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+@pytest.fixture(scope="session")
+def dataset(tmp_path_factory):
+    import sintetico
+
+    data_dir = tmp_path_factory.mktemp("datos")
+    return str(data_dir), sintetico.write(os.path.join(data_dir, "movies.csv"))
+
+
+@pytest.fixture(scope="session")
+def pipeline(dataset, tmp_path_factory):
+    # Tablas y valores de una corrida completa + registros de perfilado
+    data_dir, raw_path = dataset
+
+    import graficos
+    import perfilado
+
+    graficos.output_dir = str(tmp_path_factory.mktemp("figuras"))
+    perfilado.report_dir = str(tmp_path_factory.mktemp("perfil"))
+    with pipeline_env():
+        import ejercicios
+        import script
+
+        assert script.run(raw_path, data_dir)
+        ejercicios.run(data_dir)
+
+    results_path = os.path.join(data_dir, "resultados.sqlite")
+    with sqlite3.connect(results_path) as conn:
+        catalog = pd.read_sql_query("SELECT table_name, section, source FROM _catalog", conn)
+        tables = {name: pd.read_sql_query(f'SELECT * FROM "{name}"', conn) for name in catalog["table_name"]}
+        values = pd.read_sql_query("SELECT source, section, name, value FROM _values", conn)
+    return {"data_dir": data_dir, "tables": tables, "values": values, "catalog": catalog,
+            "records": perfilado.records()}
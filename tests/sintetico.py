@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+# -----------------------------------------------------------
+# Dataset sintético determinista para las pruebas de regresión
+# -----------------------------------------------------------
+# Mismas columnas que movies.csv, generadas con una semilla fija (PCG64 es
+# estable entre versiones de numpy), en latin-1 como el original. Incluye
+# los casos que ensucian los datos reales: textos con tildes y eñes, géneros
+# vacíos, presupuestos/ingresos en 0, fechas inválidas o futuras, números
+# que no son números, duplicados y listas de popularidad malformadas.
+
+GENRES = ["Action", "Drama", "Comedy", "Horror", "Animation", "Science Fiction", "Romance"]
+COMPANIES = ["Warner", "Fox", "Ñandú Films", "Pixar", "Estudios Churubusco"]
+DIRECTORS = ["Steven Spielberg", "Pedro Almodóvar", "Guillermo del Toro|Alfonso Cuarón",
+             "Agnès Varda", "Sin Director Conocido"]
+
+
+def _genre_list(rng):
+    k = rng.integers(0, 4)
+    return "|".join(rng.choice(GENRES, k, replace=False)) if k else np.nan
+
+
+def generate(n=600, seed=2024):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "id": np.arange(1, n + 1),
+        "budget": np.where(rng.random(n) < 0.3, 0, rng.integers(100_000, 300_000_000, n)),
+        "genres": [_genre_list(rng) for _ in range(n)],
+        "homePage": np.where(rng.random(n) < 0.5, "http://pelicula.example", None),
+        "productionCompany": ["|".join(rng.choice(COMPANIES, rng.integers(1, 3), replace=False)) for _ in range(n)],
+        "productionCountry": rng.choice(["United States of America", "Spain", "Mexico", "France"], n),
+        "revenue": np.where(rng.random(n) < 0.3, 0, rng.integers(100_000, 2_000_000_000, n)),
+        "runtime": rng.integers(60, 200, n),
+        "video": rng.random(n) < 0.1,
+        "actorsPopularity": ["|".join(f"{x:.3f}" for x in rng.random(rng.integers(1, 6)) * 20) for _ in range(n)],
+        "director": rng.choice(DIRECTORS, n),
+        "title": [f"Película {i}" for i in range(n)],
+        "originalTitle": [f"Título original {i}" for i in range(n)],
+        "originalLanguage": rng.choice(["en", "es", "fr", "ja"], n, p=[0.6, 0.2, 0.15, 0.05]),
+        "popularity": rng.gamma(2, 10, n).round(3),
+        "releaseDate": (pd.Timestamp("1950-01-01") + pd.to_timedelta(rng.integers(0, 27_000, n), unit="D"))
+        .strftime("%Y-%m-%d"),
+        "voteAvg": rng.uniform(1, 10, n).round(1),
+        "voteCount": rng.integers(0, 20_000, n),
+    })
+    # Elenco consistente: mujeres + hombres <= cantidad de actores
+    actors = rng.integers(1, 80, n)
+    women = rng.integers(0, actors // 2 + 1)
+    men = rng.integers(0, actors - women + 1)
+    df.insert(10, "actorsAmount", actors)
+    df.insert(11, "castWomenAmount", women)
+    df.insert(12, "castMenAmount", men)
+    df = df.astype({"runtime": object, "releaseDate": object, "actorsPopularity": object, "budget": object})
+
+    # Casos borde en posiciones fijas
+    df.loc[5, "releaseDate"] = "no es una fecha"
+    df.loc[6, "releaseDate"] = "2099-06-01"
+    df.loc[7, "releaseDate"] = np.nan
+    df.loc[10, "runtime"] = "noventa"
+    df.loc[11, "budget"] = -5_000
+    df.loc[12, "voteAvg"] = 11.5
+    df.loc[13, "actorsPopularity"] = "1.5|abc|3"
+    df.loc[14, "actorsPopularity"] = np.nan
+    df.loc[15, "genres"] = "Drama||Comedy"
+    df.loc[16, "originalLanguage"] = np.nan
+    df.loc[17, "castWomenAmount"] = df.loc[17, "actorsAmount"] + 1
+    # Filas duplicadas (mismo id y contenido)
+    df = pd.concat([df, df.iloc[[20, 21]]], ignore_index=True)
+    return df
+
+
+def write(path, n=600, seed=2024):
+    generate(n, seed).to_csv(path, index=False, encoding="ISO-8859-1")
+    return path
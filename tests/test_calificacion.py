@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from calificacion import RatingModel, bayesian_average, wilson_lower_bound
+
+# -----------------------------------------------------------
+# Calificación ponderada: actualización incremental y casos sin dato
+# -----------------------------------------------------------
+
+
+@pytest.mark.parametrize("method", ["bayes", "wilson"])
+def test_add_votes_equals_full_fit(method):
+    rng = np.random.default_rng(7)
+    n = 200
+    df = pd.DataFrame({"voteAvg": rng.uniform(1, 10, n).round(1), "voteCount": rng.integers(0, 500, n)})
+    df.loc[[3, 4], "voteAvg"] = np.nan
+    df["voteAvg"] = df["voteAvg"].astype(float)
+    model = RatingModel(method).fit(df)
+    df["weightedRating"] = model.rating_column(df)
+
+    positions = np.array([0, 3, 10, 57, 199])
+    new_votes = rng.integers(1, 50, len(positions))
+    new_points = new_votes * rng.uniform(1, 10, len(positions))
+    model.add_votes(df, positions, new_points, new_votes)
+
+    full = RatingModel(method).fit(df)
+    assert model.total_votes == pytest.approx(full.total_votes)
+    assert model.total_points == pytest.approx(full.total_points)
+    pd.testing.assert_series_equal(model.rating_column(df), full.rating_column(df))
+    np.testing.assert_allclose(df["weightedRating"].iloc[positions], full.rating_column(df).iloc[positions])
+    # La fila sin promedio solo tiene los votos nuevos
+    assert df.loc[3, "voteCount"] == new_votes[1]
+
+
+def test_missing_average_counts_as_no_votes():
+    avg, count = np.array([np.nan, np.nan]), np.array([50.0, 0.0])
+    assert bayesian_average(avg, count, 6.0, 100).tolist() == [6.0, 6.0]
+    assert wilson_lower_bound(avg, count).tolist() == [0.0, 0.0]
@@ -0,0 +1,24 @@
+import consultas
+from preparacion import clean_data_path, load_data
+
+# -----------------------------------------------------------
+# Consultas: los rankings del REPL coinciden con las secciones
+# -----------------------------------------------------------
+
+
+def test_top_matches_sections(pipeline):
+    # (a) y (b) rankean solo montos reportados; top del REPL debe dar lo mismo
+    queries = consultas.MovieQueries(load_data(clean_data_path(pipeline["data_dir"])))
+    for column, table in (("budget_millions", "top_budget_movies"), ("revenue", "top_revenue_movies")):
+        expected = pipeline["tables"][table]
+        top = queries.top(len(expected), column, {})
+        assert top["title"].tolist() == expected["title"].tolist(), column
+
+
+def test_top_skips_imputed_amounts(pipeline):
+    df = load_data(clean_data_path(pipeline["data_dir"])).copy()
+    imputed = df.index[df["revenue_imputed"]][0]
+    df.loc[imputed, ["revenue", "revenue_millions"]] = [1e15, 1e9]
+    queries = consultas.MovieQueries(df)
+    for column in ("revenue", "revenue_millions"):
+        assert df.loc[imputed, "title"] not in queries.top(10, column, {})["title"].tolist()
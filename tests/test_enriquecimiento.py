@@ -0,0 +1,188 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import ejercicios
+import enriquecimiento
+import exportar
+from conftest import PIPELINE_ENV
+from fechas import release_dates
+from ingesta import write_metadata
+from preparacion import clean_data_path, enriched_path, join_enrichment, load_data
+from puntos_control import file_signature
+
+# -----------------------------------------------------------
+# Enriquecimiento: taquilla semanal e historial de calificaciones
+# -----------------------------------------------------------
+
+
+@pytest.fixture
+def external(pipeline, tmp_path):
+    # Copia del CSV limpio + archivos externos con filas por id, por título+año,
+    # sin película y con valores inválidos; devuelve también la película esperada de cada fila
+    for name in ("movies_clean.csv", "movies_clean.meta.json"):
+        shutil.copy(os.path.join(pipeline["data_dir"], name), tmp_path / name)
+    clean = pd.read_csv(tmp_path / "movies_clean.csv")
+    clean["year"] = release_dates(clean).dt.year
+    keys = enriquecimiento.title_keys(clean["title"], clean["year"])
+    unique_title = keys.notna() & ~keys.duplicated(keep=False)
+    by_id = clean[clean["year"].notna()].iloc[:30]
+    by_title = clean[unique_title & ~clean["id"].isin(by_id["id"])].iloc[:15]
+
+    rng = np.random.default_rng(11)
+    weekly, history = [], []
+    for movies, use_id in ((by_id, True), (by_title, False)):
+        for _, movie in movies.iterrows():
+            start = pd.Timestamp(int(movie["year"]), 1, 1) + pd.Timedelta(days=int(rng.integers(0, 300)))
+            ref = {"id": movie["id"] if use_id else pd.NA, "title": movie["title"].upper() if not use_id else "",
+                   "year": int(movie["year"]) if not use_id else pd.NA, "movie": movie["id"]}
+            for week in rng.permutation(int(rng.integers(1, 8))):
+                weekly.append(dict(ref, week=(start + pd.Timedelta(weeks=int(week))).strftime("%Y-%m-%d"),
+                                   gross=float(rng.uniform(1e4, 5e6))))
+            for _ in range(int(rng.integers(1, 12))):
+                history.append(dict(ref, date=(start + pd.Timedelta(days=int(rng.integers(0, 3000)))).strftime("%Y-%m-%d"),
+                                    rating=round(float(rng.uniform(0, 10)), 1), votes=int(rng.integers(1, 500))))
+
+    unmatched = {"id": 10**9, "title": "", "year": pd.NA, "movie": pd.NA}
+    lost = {"id": pd.NA, "title": "Película inexistente", "year": 1900, "movie": pd.NA}
+    weekly += [dict(unmatched, week="2001-01-05", gross=1e6), dict(lost, week="1900-02-02", gross=5.0),
+               dict(weekly[0], gross="n/a", movie=pd.NA)]
+    history += [dict(unmatched, date="2001-01-05", rating=5.0, votes=3),
+                dict(history[0], rating=11.5, movie=pd.NA)]
+
+    paths = {}
+    for name, rows in (("taquilla.csv", weekly), ("calificaciones.csv", history)):
+        frame = pd.DataFrame(rows)
+        frame["id"] = frame["id"].astype("Int64")
+        frame["year"] = frame["year"].astype("Int64")
+        frame.drop(columns="movie").to_csv(tmp_path / name, index=False)
+        paths[name] = (str(tmp_path / name), frame.dropna(subset=["movie"]))
+    return str(tmp_path), paths
+
+
+def test_enrichment_matches_naive_groupby(external):
+    data_dir, paths = external
+    box_path, weekly = paths["taquilla.csv"]
+    ratings_path, history = paths["calificaciones.csv"]
+    enriched, summary = enriquecimiento.enrich(data_dir, box_path, ratings_path)
+    enriched = enriched.set_index("id")
+
+    weekly = weekly.assign(gross=weekly["gross"].astype(float)).sort_values(["movie", "week"])
+    grouped = weekly.groupby("movie")
+    expected = pd.DataFrame({"boxOfficeGross": grouped["gross"].sum(), "boxOfficeWeeks": grouped.size(),
+                             "boxOfficePeakWeek": grouped["gross"].max(),
+                             "boxOfficeOpeningWeek": grouped["week"].first(),
+                             "boxOfficeOpeningGross": grouped["gross"].first()})
+    actual = enriched.loc[expected.index, expected.columns]
+    pd.testing.assert_frame_equal(actual, expected, check_names=False, check_dtype=False)
+
+    for movie, rows in history.groupby("movie"):
+        t = (pd.to_datetime(rows["date"]) - pd.Timestamp("2000-01-01")).dt.days / 365.25
+        w, r = rows["votes"].to_numpy(float), rows["rating"].to_numpy(float)
+        row = enriched.loc[movie]
+        assert row["externalRatingCount"] == w.sum()
+        assert row["externalRatingMean"] == pytest.approx(np.average(r, weights=w))
+        assert row["externalRatingLast"] == rows["date"].max()
+        if t.nunique() > 1:
+            assert row["externalRatingTrend"] == pytest.approx(np.polyfit(t, r, 1, w=np.sqrt(w))[0], rel=1e-6)
+        else:
+            assert np.isnan(row["externalRatingTrend"])
+
+    summary = summary.set_index("source")
+    assert summary.loc["taquilla.csv", ["matched_id", "matched_title", "unmatched", "invalid"]].tolist() == [
+        (weekly["id"].notna()).sum(), (weekly["id"].isna()).sum(), 2, 1]
+    assert summary.loc["calificaciones.csv", ["unmatched", "invalid"]].tolist() == [1, 1]
+
+
+def test_chunked_enrichment_equals_single_pass(external):
+    data_dir, paths = external
+    sources = (paths["taquilla.csv"][0], paths["calificaciones.csv"][0])
+    whole, _ = enriquecimiento.enrich(data_dir, *sources)
+    chunked, _ = enriquecimiento.enrich(data_dir, *sources, chunk_rows=7)
+    pd.testing.assert_frame_equal(chunked.reset_index(drop=True), whole.reset_index(drop=True))
+
+
+def test_ambiguous_title_keys_are_dropped():
+    keys = enriquecimiento.title_keys(pd.Series(["Solaris", "SOLARIS", "Ándale", "Stalker"]),
+                                      pd.Series([1972, 1972, 2001, 1979]))
+    movies = enriquecimiento.MovieKeys([1, 2, 3, 4], pd.DataFrame({"key": keys, "position": range(4)}))
+    assert movies.n_ambiguous == 1
+    chunk = pd.DataFrame({"title": ["solaris", "andale!", "Stalker"], "year": [1972, 2001, 1980]})
+    positions, by_id = movies.lookup(chunk)
+    assert positions.tolist() == [-1, 2, -1] and not by_id.any()
+
+
+def test_sections_use_enriched_columns(external, monkeypatch):
+    data_dir, paths = external
+    enriquecimiento.enrich(data_dir, paths["taquilla.csv"][0], paths["calificaciones.csv"][0])
+    for key, value in PIPELINE_ENV.items():
+        monkeypatch.setenv(key, value)
+    monkeypatch.setattr(exportar, "_tables", {})
+    monkeypatch.setattr(exportar, "_values", [])
+    ejercicios.run(data_dir)
+
+    results_path = os.path.join(data_dir, "resultados.sqlite")
+    assert "boxOfficeGross" in exportar.read_table(results_path, "top_revenue_movies").columns
+    assert "externalRatingMean" in exportar.read_table(results_path, "top_voted_movies").columns
+    assert len(exportar.read_table(results_path, "opening_gross_by_month")) > 0
+    names = {value["name"] for value in exportar._values}
+    assert {"corr_revenue_box_office", "corr_voteavg_external_rating"} <= names
+
+
+def test_stale_enrichment_is_ignored(external):
+    data_dir, paths = external
+    enriquecimiento.enrich(data_dir, paths["taquilla.csv"][0])
+    clean_path = clean_data_path(data_dir)
+    assert "boxOfficeGross" in load_data(clean_path).columns
+
+    st = os.stat(clean_path)
+    os.utime(clean_path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    df = load_data(clean_path, use_snapshot=False)
+    assert "boxOfficeGross" not in df.columns
+    assert "boxOfficeGross" not in join_enrichment(df.copy(), clean_path).columns
+
+
+def test_date_format_detected_once_per_file():
+    # El primer bloque fija %m/%d/%Y; el segundo, ambiguo, no se reinterpreta como %d/%m/%Y
+    formats = {}
+    first = enriquecimiento._days(pd.Series(["12/25/2001", "01/31/2002"], name="week"), formats)
+    second = enriquecimiento._days(pd.Series(["03/04/2001"], name="week"), formats)
+    as_dates = pd.to_datetime(np.concatenate([first, second]), unit="D")
+    assert list(as_dates.strftime("%Y-%m-%d")) == ["2001-12-25", "2002-01-31", "2001-03-04"]
+
+
+def test_join_keeps_large_ids_and_skips_bad_ones(tmp_path):
+    # Un id no numérico no convierte los ids a float (2**53 + 1 no se redondea)
+    clean_path = str(tmp_path / "movies_clean.csv")
+    open(clean_path, "w").close()
+    big = 2**53 + 1
+    pd.DataFrame({"id": [big - 1, big, 5], "boxOfficeWeeks": [1, 2, 3],
+                  "boxOfficeOpeningWeek": ["1999-01-01", "2001-03-04", ""]}).to_csv(enriched_path(clean_path),
+                                                                                  index=False)
+    write_metadata(enriched_path(clean_path), encoding="utf-8", clean=file_signature(clean_path))
+
+    df = pd.DataFrame({"id": pd.Series([str(big), str(big - 1), "x", "5"], dtype=object)})
+    joined = join_enrichment(df, clean_path)
+    assert joined["boxOfficeWeeks"].tolist() == [2, 1, 0, 3]
+    assert joined["boxOfficeOpeningWeek"].dt.strftime("%Y-%m-%d").fillna("").tolist() == [
+        "2001-03-04", "1999-01-01", "", ""]
+
+
+def test_undated_ratings_count_for_mean_but_not_trend():
+    # Fila 0: tres fechas + dos sin fecha; fila 1: una fecha + una sin fecha
+    days = np.array([11_000, 11_400, 12_100, enriquecimiento.NO_DAY, enriquecimiento.NO_DAY,
+                     12_000, enriquecimiento.NO_DAY], dtype=np.int64)
+    ratings = np.array([6.0, 7.0, 8.5, 2.0, 9.0, 5.0, 7.0])
+    votes = np.array([10.0, 20.0, 5.0, 40.0, 3.0, 8.0, 8.0])
+    history = enriquecimiento.RatingHistory(2)
+    history.update(np.array([0, 0, 0, 0, 0, 1, 1]), days, ratings, votes)
+    frame = history.frame()
+
+    t = (days[:3] - enriquecimiento.TREND_ORIGIN_DAY) / enriquecimiento.DAYS_PER_YEAR
+    assert frame["externalRatingMean"].tolist() == pytest.approx(
+        [np.average(ratings[:5], weights=votes[:5]), 6.0])
+    assert frame["externalRatingTrend"][0] == pytest.approx(np.polyfit(t, ratings[:3], 1, w=np.sqrt(votes[:3]))[0])
+    assert np.isnan(frame["externalRatingTrend"][1])
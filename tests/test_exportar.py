@@ -0,0 +1,53 @@
+import sqlite3
+
+import pandas as pd
+
+import exportar
+import perfilado
+
+# -----------------------------------------------------------
+# Exportación a SQLite: cada fuente reemplaza todo lo suyo
+# -----------------------------------------------------------
+
+
+def test_write_drops_stale_tables_of_the_same_source(tmp_path, monkeypatch):
+    monkeypatch.setattr(exportar, "_tables", {})
+    monkeypatch.setattr(exportar, "_values", [])
+    path = str(tmp_path / "resultados.sqlite")
+    frame = pd.DataFrame({"x": [1, 2]})
+
+    exportar.register_table("otra", "other_table", frame)
+    exportar.write_sqlite(path, source="otra")
+
+    mark = exportar.registry_mark()
+    exportar.register_table("a", "kept", frame)
+    exportar.register_table("a", "sampling_annotations_ejercicios", frame)
+    exportar.register_value("a", "old_value", 1.0)
+    exportar.write_sqlite(path, source="ejercicios", mark=mark)
+
+    mark = exportar.registry_mark()
+    exportar.register_table("a", "kept", frame)
+    exportar.write_sqlite(path, source="ejercicios", mark=mark)
+
+    with sqlite3.connect(path) as conn:
+        catalog = dict(conn.execute("SELECT table_name, source FROM _catalog").fetchall())
+        tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        values = conn.execute("SELECT name FROM _values WHERE source = 'ejercicios'").fetchall()
+    assert catalog == {"other_table": "otra", "kept": "ejercicios"}
+    assert "sampling_annotations_ejercicios" not in tables and {"other_table", "kept"} <= tables
+    assert values == []
+
+
+# -----------------------------------------------------------
+# Reportes de perfilado: junto a los datos de cada corrida
+# -----------------------------------------------------------
+
+
+def test_report_follows_the_run_data_dir(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(perfilado, "report_dir", None)
+    perfilado.write_report("corrida", str(tmp_path / "a"))
+    assert (tmp_path / "a" / "perfil" / "corrida.json").exists()
+
+    monkeypatch.setattr(perfilado, "report_dir", str(tmp_path / "fijo"))
+    perfilado.write_report("corrida", str(tmp_path / "b"))
+    assert (tmp_path / "fijo" / "corrida.json").exists() and not (tmp_path / "b").exists()
@@ -0,0 +1,87 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import ejercicios
+import exportar
+import muestreo
+from conftest import PIPELINE_ENV
+from preparacion import clean_data_path, load_data
+from test_secciones import assert_frames_close
+
+# -----------------------------------------------------------
+# Modo muestra: rankings exactos y muestras reproducibles
+# -----------------------------------------------------------
+
+
+@pytest.fixture
+def sampled_run(pipeline, tmp_path, monkeypatch):
+    # Corre ejercicios.py con MUESTRA sobre una copia del CSV limpio de la corrida de referencia
+    for name in ("movies_clean.csv", "movies_clean.meta.json"):
+        shutil.copy(os.path.join(pipeline["data_dir"], name), tmp_path / name)
+    for key, value in PIPELINE_ENV.items():
+        monkeypatch.setenv(key, value)
+    monkeypatch.setattr(exportar, "_tables", {})
+    monkeypatch.setattr(exportar, "_values", [])
+
+    def run(spec):
+        monkeypatch.setenv("MUESTRA", spec)
+        ejercicios.run(str(tmp_path))
+        return {name: exportar.read_table(str(tmp_path / "resultados.sqlite"), name)
+                for name in exportar.registered_tables()}
+    return run
+
+
+@pytest.mark.parametrize("spec", ["uniforme:0.2", "estratificada:0.2", "reservorio:100"])
+def test_rankings_exact_under_sampling(pipeline, sampled_run, spec):
+    tables = sampled_run(spec)
+    for name in sorted(ejercicios.EXACT_TABLES):
+        assert_frames_close(tables[name], pipeline["tables"][name], label=f"{spec}:{name}")
+
+    annotations = tables["sampling_annotations_ejercicios"].set_index("table_name")["basis"]
+    assert set(annotations[annotations == "exacta"].index) == ejercicios.EXACT_TABLES
+    errors = tables["sampling_errors_ejercicios"]
+    assert (errors["std_error"] > 0).all() and (errors["ci_low"] < errors["ci_high"]).all()
+
+
+def test_streaming_reservoir_matches_in_memory(pipeline):
+    clean_path = clean_data_path(pipeline["data_dir"])
+    plan = muestreo.SamplingPlan("reservorio", 120, seed=3)
+    in_memory = muestreo.draw_sample(load_data(clean_path), plan)
+    streamed, _ = muestreo.stream_sample(clean_path, plan, chunk_rows=97)
+    assert streamed.population == in_memory.population
+    assert list(streamed.frame.index) == list(in_memory.frame.index)
+
+
+def test_stratified_sample_covers_every_stratum(pipeline):
+    df = load_data(clean_data_path(pipeline["data_dir"]))
+    sample = muestreo.draw_sample(df, muestreo.SamplingPlan("estratificada", 0.1, seed=5))
+    codes = muestreo.strata_codes(df)
+    assert set(np.unique(sample.strata)) == set(np.unique(codes))
+    expected = np.minimum(sample.strata_sizes, np.maximum(1, np.round(0.1 * sample.strata_sizes)))
+    np.testing.assert_array_equal(np.bincount(sample.strata, minlength=len(expected)), expected)
+
+
+def test_sampling_errors_cover_population_mean(pipeline):
+    # Con muchas semillas, el IC 95% contiene la media del catálogo ~95% de las veces
+    df = load_data(clean_data_path(pipeline["data_dir"]))
+    truth = pd.to_numeric(df["popularity"]).mean()
+    for method in ("uniforme", "estratificada"):
+        hits = []
+        for seed in range(200):
+            sample = muestreo.draw_sample(df, muestreo.SamplingPlan(method, 0.2, seed))
+            row = muestreo.sampling_errors(sample, ["popularity"]).iloc[0]
+            hits.append(row["ci_low"] <= truth <= row["ci_high"])
+        assert 0.88 <= np.mean(hits) <= 0.99, f"{method}: cobertura {np.mean(hits):.2f}"
+
+
+def test_plan_from_env_rejects_bad_specs(monkeypatch):
+    for spec in ("uniforme", "uniforme:1.5", "reservorio:0", "sistematica:0.1"):
+        monkeypatch.setenv("MUESTRA", spec)
+        with pytest.raises(ValueError):
+            muestreo.SamplingPlan.from_env()
+    monkeypatch.delenv("MUESTRA")
+    assert muestreo.SamplingPlan.from_env() is None
@@ -0,0 +1,204 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import fechas
+import rangos
+import sintetico
+from modelo import actor_popularity_stats, build_features, feature_names, fill_means, genre_matrix
+from preparacion import parse_and_average
+from resumen import RELATIVE_ACCURACY, SummaryCube
+from validacion import failure_labels, validate
+
+# -----------------------------------------------------------
+# Propiedades de los parsers vectorizados
+# -----------------------------------------------------------
+# Cada versión vectorizada se compara con una implementación directa
+# (fila por fila o la de pandas) sobre entradas aleatorias con semilla fija:
+# ROUNDS casos por propiedad, con valores faltantes y basura mezclados.
+
+ROUNDS = 25
+GARBAGE = ["", "abc", "nan", "1|", "|", "1..2", "N/A"]
+
+
+def _rounds():
+    return [np.random.default_rng(seed) for seed in range(ROUNDS)]
+
+
+def _random_dates(rng, n):
+    days = rng.integers(-20_000, 25_000, n)
+    return pd.Series(pd.Timestamp("1970-01-01") + pd.to_timedelta(days, unit="D"))
+
+
+def _with_garbage(rng, texts):
+    texts = texts.astype(object)
+    positions = rng.random(len(texts))
+    texts[positions < 0.05] = np.nan
+    junk = (positions >= 0.05) & (positions < 0.1)
+    texts[junk] = rng.choice(GARBAGE, int(junk.sum()))
+    return texts
+
+
+# ---------------- fechas ----------------
+@pytest.mark.parametrize("fmt", ["%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%d.%m.%Y", "%Y%m%d"])
+def test_parse_dates_matches_pandas(fmt):
+    for rng in _rounds():
+        dates = _random_dates(rng, int(rng.integers(1, 300)))
+        texts = _with_garbage(rng, dates.dt.strftime(fmt))
+        expected = pd.to_datetime(texts, format=fmt, errors="coerce")
+        parsed = fechas.parse_dates(texts, fmt=fmt)
+        pd.testing.assert_series_equal(parsed, expected, check_names=False, check_dtype=False)
+
+        # Sin formato explícito: se detecta y da lo mismo que con el correcto
+        detected = fechas.parse_dates(texts)
+        pd.testing.assert_series_equal(detected, expected, check_names=False, check_dtype=False)
+
+
+def test_parse_dates_cache_is_transparent():
+    rng = np.random.default_rng(7)
+    texts = _with_garbage(rng, _random_dates(rng, 500).dt.strftime("%Y-%m-%d"))
+    first = fechas.parse_dates(texts)
+    second = fechas.parse_dates(texts.sample(frac=1, random_state=1))
+    pd.testing.assert_series_equal(second.sort_index(), first, check_names=False)
+
+
+def test_parse_dates_cache_is_per_format():
+    # Una fecha ambigua no se sirve desde la caché de otro formato
+    ambiguous = pd.Series(["03/04/2001", "12/05/1999"])
+    for _ in range(2):
+        day_first = fechas.parse_dates(ambiguous, fmt="%d/%m/%Y")
+        month_first = fechas.parse_dates(ambiguous, fmt="%m/%d/%Y")
+        assert list(day_first.dt.month) == [4, 5] and list(month_first.dt.month) == [3, 12]
+
+    # Sin fmt, el formato sale de todos los valores de la llamada, no solo de los no cacheados
+    texts = pd.Series(["03/04/2001", "25/12/2001"])
+    assert list(fechas.parse_dates(texts).dt.month) == [4, 12]
+
+
+def test_epoch_days_round_trip():
+    for rng in _rounds():
+        dates = _random_dates(rng, int(rng.integers(1, 300)))
+        dates[rng.random(len(dates)) < 0.1] = pd.NaT
+        days = fechas.to_epoch_days(dates)
+        assert str(days.dtype) == "Int64"
+        assert days.isna().equals(dates.isna())
+        pd.testing.assert_series_equal(fechas.from_epoch_days(days), dates, check_names=False)
+
+
+# ---------------- actorsPopularity ----------------
+def _popularity_lists(rng, n):
+    lists = []
+    for _ in range(n):
+        items = [f"{x:.3f}" for x in rng.random(rng.integers(1, 7)) * 30]
+        if rng.random() < 0.15:
+            items[rng.integers(len(items))] = str(rng.choice(GARBAGE))
+        lists.append("|".join(items))
+    values = pd.Series(lists, dtype=object)
+    values[rng.random(n) < 0.05] = np.nan
+    return values
+
+
+def test_actor_popularity_stats_matches_parse_and_average():
+    for rng in _rounds():
+        values = _popularity_lists(rng, int(rng.integers(1, 200)))
+        stats = actor_popularity_stats(values)
+        reference = values.astype(str).apply(parse_and_average)
+        items = values.astype(str).str.split("|")
+        well_formed = reference.notna()
+
+        # Listas bien formadas: misma media, y todas sus entradas cuentan
+        np.testing.assert_allclose(stats["mean"][well_formed], reference[well_formed], rtol=1e-12)
+        assert (stats["count"][well_formed] == items[well_formed].str.len()).all()
+        # Listas con basura: parse_and_average da NaN; la versión vectorizada ignora solo la basura
+        assert (stats["count"][~well_formed] < items[~well_formed].str.len()).all()
+
+
+# ---------------- géneros ----------------
+def test_genre_matrix_matches_row_by_row():
+    genres = sorted(sintetico.GENRES)
+    for rng in _rounds():
+        n = int(rng.integers(1, 200))
+        values = pd.Series([sintetico._genre_list(rng) for _ in range(n)], dtype=object,
+                           index=rng.permutation(n) + 1000)
+        values[rng.random(n) < 0.05] = "Drama||Unknown"
+        matrix = genre_matrix(values, genres)
+        expected = np.array([[float(g in str(v).split("|")) for g in genres] for v in values])
+        np.testing.assert_array_equal(matrix, expected)
+
+
+# ---------------- rangos ----------------
+def test_assign_bins_matches_pd_cut():
+    for rng in _rounds():
+        edges = np.unique(rng.integers(0, 60, rng.integers(2, 8))).astype(float)
+        if len(edges) < 2:
+            continue
+        values = rng.integers(-5, 80, 300).astype(float)
+        values[rng.random(300) < 0.05] = np.nan
+        expected = pd.cut(values, list(edges) + [np.inf], right=True, include_lowest=True).codes
+        np.testing.assert_array_equal(rangos.assign_bins(values, edges), expected)
+
+
+# ---------------- cubo de resumen ----------------
+def test_summary_cube_merge_equals_whole():
+    df = sintetico.generate(400, seed=11)
+    whole = SummaryCube().update(df).table()
+    for rng in _rounds()[:5]:
+        cuts = np.sort(rng.choice(np.arange(1, len(df)), 3, replace=False))
+        cube = SummaryCube()
+        for start, stop in zip(np.r_[0, cuts], np.r_[cuts, len(df)]):
+            cube.merge(SummaryCube().update(df.iloc[start:stop]))
+        merged = cube.table()
+        pd.testing.assert_frame_equal(merged[["dimension", "group", "column", "count"]],
+                                      whole[["dimension", "group", "column", "count"]])
+        numeric = ["mean", "std", "min", "25%", "50%", "75%", "max"]
+        np.testing.assert_allclose(merged[numeric], whole[numeric], rtol=1e-9)
+
+
+def test_summary_cube_quantiles_within_accuracy():
+    for rng in _rounds()[:10]:
+        n = int(rng.integers(20, 2000))
+        x = rng.lognormal(10, 2, n) * rng.choice([-1, 1], n, p=[0.1, 0.9])
+        frame = pd.DataFrame({"budget": x})
+        table = SummaryCube(columns=["budget"], dimensions=["all"]).update(frame).table()
+        for q in (0.25, 0.5, 0.75):
+            exact = np.quantile(x, q, method="lower")
+            approx = table[f"{q:.0%}"].iloc[0]
+            assert abs(approx - exact) <= RELATIVE_ACCURACY * abs(exact) * (1 + 1e-9)
+
+
+def test_failure_labels_match_row_by_row():
+    names = [f"rule_{i}" for i in range(11)]
+    for rng in _rounds():
+        failures = rng.random((len(names), int(rng.integers(0, 300)))) < 0.2
+        expected = ["|".join(n for n, failed in zip(names, column) if failed) for column in failures.T]
+        assert failure_labels(failures, names).tolist() == expected
+
+
+def test_quarantine_holds_only_rejected_rows():
+    df = pd.DataFrame({"id": [1, 2, 3, 4], "title": ["a", "b", "c", "d"], "budget": [0, -5, 10, 0],
+                       "revenue": [0, 1, 2, "x"], "releaseDate": ["2001-01-01"] * 4})
+    for col in ("runtime", "popularity", "voteAvg", "voteCount", "actorsAmount", "castWomenAmount", "castMenAmount"):
+        df[col] = 1
+    df["actorsAmount"] = 2
+    clean, quarantine, _, n_nullified = validate(df, today="2020-01-01")
+    assert quarantine["id"].tolist() == [2, 4]
+    assert quarantine["failed_rules"].tolist() == ["budget_negative", "revenue_not_numeric|budget_zero"]
+    assert clean["id"].tolist() == [1, 3] and n_nullified == 1
+
+
+def test_missing_year_and_cast_use_training_means(tmp_path):
+    chunk = pd.DataFrame({"budget": [1e6, np.nan, 5e5], "genres": ["Drama", np.nan, "Comedy"],
+                          "releaseDate": ["1990-05-01", np.nan, "2010-01-02"],
+                          "actorsAmount": [3, 8, np.nan], "castWomenAmount": [1, np.nan, 2],
+                          "castMenAmount": [2, 4, np.nan], "actorsPopularity": ["1|2", np.nan, "3"],
+                          "homePage": [np.nan] * 3, "video": [False] * 3})
+    csv_path = str(tmp_path / "movies_clean.csv")
+    chunk.to_csv(csv_path, index=False)
+    fill = fill_means(csv_path)
+    assert fill["year"] == 2000 and fill["log_actorsAmount"] == pytest.approx(np.log1p([3, 8]).mean())
+
+    names = feature_names(["Comedy", "Drama"], with_text=False)
+    x = pd.DataFrame(build_features(chunk, ["Comedy", "Drama"], fill), columns=names)
+    assert x["year"].tolist() == [1990, 2000, 2010] and x["year_missing"].tolist() == [0, 1, 0]
+    assert x["log_castWomenAmount"][1] == pytest.approx(fill["log_castWomenAmount"])
+    assert x["actorsAmount_missing"].tolist() == [0, 0, 1]
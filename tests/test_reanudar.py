@@ -0,0 +1,79 @@
+import ast
+import os
+import shutil
+
+import pytest
+
+import ejercicios
+import exportar
+from conftest import PIPELINE_ENV, SRC_DIR
+from puntos_control import EJERCICIOS_CODE, ENRIQUECIMIENTO_CODE, SCRIPT_CODE
+from test_secciones import assert_frames_close
+
+# -----------------------------------------------------------
+# Puntos de control por sección de ejercicios.py
+# -----------------------------------------------------------
+
+
+@pytest.fixture
+def resumable(pipeline, tmp_path, monkeypatch):
+    # Copia del CSV limpio con puntos de control activos y remuestreo corto
+    for name in ("movies_clean.csv", "movies_clean.meta.json"):
+        shutil.copy(os.path.join(pipeline["data_dir"], name), tmp_path / name)
+    for key, value in PIPELINE_ENV.items():
+        monkeypatch.setenv(key, value)
+    monkeypatch.setenv("REANUDAR", "si")
+    monkeypatch.setenv("SIGNIFICANCIA", "50")
+    monkeypatch.setattr(exportar, "_tables", {})
+    monkeypatch.setattr(exportar, "_values", [])
+
+    def run():
+        ejercicios.run(str(tmp_path))
+        return {name: exportar.read_table(str(tmp_path / "resultados.sqlite"), name)
+                for name in exportar.registered_tables()}
+    return run
+
+
+def test_restored_sections_match_fresh_run(resumable, capsys):
+    fresh = resumable()
+    resumed = resumable()
+    assert capsys.readouterr().out.count("reutilizada del punto de control") == len(ejercicios.SECTIONS)
+    assert sorted(resumed) == sorted(fresh)
+    for name in fresh:
+        if name != "significance_tests":
+            assert_frames_close(resumed[name], fresh[name], label=name)
+    # (p) restaurada no convierte actorsPopularity: la preparación lo hace siempre
+    assert list(resumed["significance_tests"]["test"]) == list(fresh["significance_tests"]["test"])
+    assert "p: actorsPopularity vs revenue" in set(resumed["significance_tests"]["test"])
+
+
+def test_shared_code_signature_tracks_helper_modules(tmp_path, monkeypatch):
+    helper = tmp_path / "agregaciones.py"
+    helper.write_text("MIN = 1\n", encoding="utf-8")
+    monkeypatch.setattr(ejercicios, "src_paths", lambda names: [str(helper)])
+    before = ejercicios.shared_code_signature()
+    helper.write_text("MIN = 2\n", encoding="utf-8")
+    assert ejercicios.shared_code_signature() != before
+
+
+def _local_imports(path):
+    tree = ast.parse(open(path, encoding="utf-8").read())
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            names.add(node.module.split(".")[0])
+    return {f"{name}.py" for name in names if os.path.isfile(os.path.join(SRC_DIR, f"{name}.py"))}
+
+
+@pytest.mark.parametrize("code", [SCRIPT_CODE, EJERCICIOS_CODE, ENRIQUECIMIENTO_CODE])
+def test_code_lists_cover_imports(code):
+    # Editar cualquier módulo que la etapa importa debe invalidar su punto de control
+    seen, pending = set(), [code[0]]
+    while pending:
+        name = pending.pop()
+        if name not in seen:
+            seen.add(name)
+            pending.extend(_local_imports(os.path.join(SRC_DIR, name)))
+    assert sorted(seen - set(code) - {"puntos_control.py"}) == []
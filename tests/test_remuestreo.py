@@ -0,0 +1,29 @@
+import time
+
+import numpy as np
+
+import remuestreo
+
+# -----------------------------------------------------------
+# Remuestreo: presupuesto de tiempo
+# -----------------------------------------------------------
+
+
+def test_time_budget_stops_running_batches():
+    # Lotes lentos (n grande): el reporte vuelve cerca del presupuesto, con menos iteraciones
+    rng = np.random.default_rng(0)
+    n = 200_000
+    tests = {f"t{i}": ("corr", rng.normal(size=n), rng.normal(size=n)) for i in range(3)}
+    start = time.perf_counter()
+    report = remuestreo.significance_report(tests, n_iter=20_000, time_budget=1.0, workers=2)
+    assert time.perf_counter() - start < 1.0 + 2.5
+    assert (report["iterations"] < 20_000).all()
+
+
+def test_full_run_within_budget():
+    rng = np.random.default_rng(1)
+    x = rng.normal(size=300)
+    tests = {"corr": ("corr", x, x + rng.normal(size=300)), "diff": ("diff", x, x > 0)}
+    report = remuestreo.significance_report(tests, n_iter=600, time_budget=60, workers=2)
+    assert (report["iterations"] == 600).all()
+    assert (report["ci_low"] < report["statistic"]).all() and (report["statistic"] < report["ci_high"]).all()
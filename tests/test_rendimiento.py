@@ -0,0 +1,96 @@
+import json
+import os
+
+import pytest
+
+from conftest import GOLDEN_DIR, pipeline_env
+
+# -----------------------------------------------------------
+# Compuerta de rendimiento contra una línea base registrada
+# -----------------------------------------------------------
+# Corrida propia, más grande que la de referencia: REGRESION_FILAS filas
+# sintéticas procesadas REGRESION_REPETICIONES veces (script.run +
+# ejercicios.run, cada vez en una carpeta nueva y sin figuras previas).
+# Las figuras se renderizan todas en render_figures (FIGURAS_ESCRITOR=no):
+# con un escritor en segundo plano, cada etapa compartiría la CPU con el
+# render de las anteriores y su tiempo dependería de esa competencia.
+# De cada etapa se toma el mejor tiempo de las repeticiones y se compara
+# con tests/golden/rendimiento.json: falla si tarda más de REGRESION_FACTOR
+# veces su tiempo base más REGRESION_HOLGURA segundos (unos milisegundos,
+# para el ruido de reloj de las etapas más cortas). La línea base se
+# regraba con --actualizar-golden; en una máquina más lenta que la que la
+# grabó se puede subir REGRESION_FACTOR.
+
+BASELINE_PATH = os.path.join(GOLDEN_DIR, "rendimiento.json")
+ROWS = int(os.environ.get("REGRESION_FILAS", 20_000))
+REPEATS = int(os.environ.get("REGRESION_REPETICIONES", 3))
+FACTOR = float(os.environ.get("REGRESION_FACTOR", 2.0))
+SLACK_S = float(os.environ.get("REGRESION_HOLGURA", 0.005))
+
+
+def stage_times(records):
+    # Segundos de pared por ruta de etapa (las etapas repetidas se suman)
+    times = {}
+    for r in records:
+        times[r["path"]] = times.get(r["path"], 0.0) + r["wall_s"]
+    return times
+
+
+@pytest.fixture(scope="module")
+def best_times(tmp_path_factory):
+    # Mejor tiempo por etapa entre las repeticiones
+    import ejercicios
+    import exportar
+    import graficos
+    import perfilado
+    import script
+    import sintetico
+
+    raw_path = sintetico.write(str(tmp_path_factory.mktemp("rendimiento") / "movies.csv"), n=ROWS)
+    best = {}
+    with pipeline_env(), pytest.MonkeyPatch.context() as patch:
+        patch.setattr(exportar, "_tables", {})
+        patch.setattr(exportar, "_values", [])
+        patch.setenv("FIGURAS_ESCRITOR", "no")
+        for _ in range(REPEATS):
+            data_dir = str(tmp_path_factory.mktemp("rendimiento"))
+            patch.setattr(graficos, "output_dir", os.path.join(data_dir, "figuras"))
+            mark = len(perfilado.records())
+            assert script.run(raw_path, data_dir)
+            ejercicios.run(data_dir)
+            for path, seconds in stage_times(perfilado.records()[mark:]).items():
+                best[path] = min(seconds, best.get(path, seconds))
+    return best
+
+
+def _baseline():
+    if not os.path.isfile(BASELINE_PATH):
+        pytest.skip("sin línea base: correr con --actualizar-golden")
+    with open(BASELINE_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_update_baseline(best_times, update_golden):
+    if not update_golden:
+        pytest.skip("solo con --actualizar-golden")
+    os.makedirs(GOLDEN_DIR, exist_ok=True)
+    times = {path: round(seconds, 4) for path, seconds in sorted(best_times.items())}
+    with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+        json.dump(times, f, indent=2, ensure_ascii=False)
+
+
+def test_no_stage_slower_than_baseline(best_times, update_golden):
+    if update_golden:
+        pytest.skip("línea base en actualización")
+    slower = [f"{path}: {best_times[path]:.3f}s (base {base:.3f}s, límite {base * FACTOR + SLACK_S:.3f}s)"
+              for path, base in _baseline().items()
+              if path in best_times and best_times[path] > base * FACTOR + SLACK_S]
+    assert not slower, "Etapas más lentas que la línea base:\n" + "\n".join(slower)
+
+
+def test_stages_still_measured(best_times, update_golden):
+    # Una etapa que deja de medirse no puede pasar la compuerta por omisión
+    if update_golden:
+        pytest.skip("línea base en actualización")
+    missing = sorted(set(_baseline()) - set(best_times))
+    assert not missing, f"Etapas de la línea base que ya no se miden: {missing}"
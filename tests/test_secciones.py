@@ -0,0 +1,145 @@
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import GOLDEN_DIR
+
+# -----------------------------------------------------------
+# Resultados de cada sección contra los archivos golden
+# -----------------------------------------------------------
+# Cada tabla de resultados.sqlite se compara con tests/golden/<tabla>.csv y
+# los valores sueltos con tests/golden/_values.csv. Las columnas numéricas
+# se comparan con tolerancia (rtol/atol), el resto como texto. Ambos lados
+# pasan por CSV para que los tipos se infieran igual.
+
+RTOL = 1e-7
+ATOL = 1e-9
+
+# Tolerancias más holgadas donde un cambio de algoritmo equivalente mueve
+# los últimos decimales (p. ej. p-valores de las pruebas de normalidad)
+TOLERANCES = {
+    "normality_tests": (1e-5, 1e-12),
+}
+
+VALUES_FILE = "_values.csv"
+
+
+def _golden_names():
+    if not os.path.isdir(GOLDEN_DIR):
+        return []
+    return sorted(name[:-len(".csv")] for name in os.listdir(GOLDEN_DIR)
+                  if name.endswith(".csv") and name != VALUES_FILE)
+
+
+def _round_trip(frame):
+    buffer = io.StringIO()
+    frame.to_csv(buffer, index=False)
+    buffer.seek(0)
+    return pd.read_csv(buffer)
+
+
+def _golden_path(name):
+    return os.path.join(GOLDEN_DIR, f"{name}.csv")
+
+
+def assert_frames_close(actual, expected, rtol=RTOL, atol=ATOL, label=""):
+    actual = _round_trip(actual)
+    assert list(actual.columns) == list(expected.columns), f"{label}: columnas distintas"
+    assert len(actual) == len(expected), f"{label}: {len(actual)} filas, se esperaban {len(expected)}"
+    for col in expected.columns:
+        a, e = actual[col], expected[col]
+        if pd.api.types.is_numeric_dtype(e) and pd.api.types.is_numeric_dtype(a):
+            close = np.isclose(a.to_numpy(dtype=float), e.to_numpy(dtype=float), rtol=rtol, atol=atol, equal_nan=True)
+            bad = np.flatnonzero(~close)
+            assert not len(bad), (f"{label}.{col}: {len(bad)} valores fuera de tolerancia, p. ej. fila {bad[0]}: "
+                                  f"{a.iloc[bad[0]]!r} != {e.iloc[bad[0]]!r}")
+        else:
+            differs = a.fillna("").astype(str) != e.fillna("").astype(str)
+            assert not differs.any(), (f"{label}.{col}: {int(differs.sum())} valores distintos, p. ej. "
+                                       f"{a[differs].iloc[0]!r} != {e[differs].iloc[0]!r}")
+
+
+def test_update_golden(pipeline, update_golden):
+    if not update_golden:
+        pytest.skip("solo con --actualizar-golden")
+    os.makedirs(GOLDEN_DIR, exist_ok=True)
+    for name in _golden_names():
+        os.remove(_golden_path(name))
+    for name, frame in pipeline["tables"].items():
+        frame.to_csv(_golden_path(name), index=False)
+    pipeline["values"].to_csv(os.path.join(GOLDEN_DIR, VALUES_FILE), index=False)
+
+
+def test_same_tables(pipeline, update_golden):
+    # Una tabla nueva o desaparecida también es un cambio de resultados
+    if update_golden:
+        pytest.skip("golden en actualización")
+    assert sorted(pipeline["tables"]) == _golden_names()
+
+
+@pytest.mark.parametrize("name", _golden_names())
+def test_table_matches_golden(pipeline, update_golden, name):
+    if update_golden:
+        pytest.skip("golden en actualización")
+    assert name in pipeline["tables"], f"la corrida no produjo la tabla {name}"
+    rtol, atol = TOLERANCES.get(name, (RTOL, ATOL))
+    assert_frames_close(pipeline["tables"][name], pd.read_csv(_golden_path(name)), rtol, atol, label=name)
+
+
+def test_values_match_golden(pipeline, update_golden):
+    if update_golden:
+        pytest.skip("golden en actualización")
+    expected = pd.read_csv(os.path.join(GOLDEN_DIR, VALUES_FILE))
+    key = ["source", "name"]
+    actual = pipeline["values"].sort_values(key).reset_index(drop=True)
+    assert_frames_close(actual, expected.sort_values(key).reset_index(drop=True), label="_values")
+
+
+def test_sources_not_mixed(pipeline):
+    # script y ejercicios corren en el mismo proceso: cada uno escribe solo lo suyo
+    values = pipeline["values"]
+    assert not values["name"].duplicated().any(), sorted(values.loc[values["name"].duplicated(), "name"])
+    assert set(values.loc[values["section"] == "script", "source"]) == {"script"}
+    catalog = pipeline["catalog"]
+    assert set(catalog.loc[catalog["section"] == "script", "source"]) == {"script"}
+
+
+def test_sql_engine_parity(pipeline):
+    # MOTOR=sql debe dar lo mismo que pandas en las agregaciones que reemplaza
+    import motor_sql
+    from preparacion import clean_data_path, load_data
+
+    clean_path = clean_data_path(pipeline["data_dir"])
+    store_path = os.path.join(pipeline["data_dir"], "paridad.sqlite")
+    motor_sql.build_store(clean_path, store_path)
+    results = motor_sql.check_parity(load_data(clean_path), motor_sql.SqlBackend(store_path))
+    assert results and all(results.values()), [name for name, ok in results.items() if not ok]
+
+
+@pytest.mark.parametrize("mode", ["default", "quantile", "data"])
+def test_cast_ranges_share_edges(pipeline, mode):
+    # RANGOS_REPARTO aplica a los promedios 1-D y a la tabla cruzada de (i), en ambos motores
+    import agregaciones
+    import motor_sql
+    import rangos
+    from preparacion import clean_data_path, load_data
+
+    clean_path = clean_data_path(pipeline["data_dir"])
+    df = load_data(clean_path)
+    women, men = df["castWomenAmount"].to_numpy(dtype=float), df["castMenAmount"].to_numpy(dtype=float)
+    women_edges, men_edges = rangos.resolve_edges(women, mode), rangos.resolve_edges(men, mode)
+    means = agregaciones.cast_range_means(df, women_edges, men_edges)
+    contingency = rangos.cast_contingency(women, men, df["popularity"].to_numpy(dtype=float),
+                                          df["revenue_millions"].to_numpy(dtype=float), women_edges, men_edges)
+    assert list(means["women_popularity_mean"].index) == list(contingency["count"].index)
+    assert list(means["men_popularity_mean"].index) == list(contingency["count"].columns)
+
+    store_path = os.path.join(pipeline["data_dir"], f"rangos_{mode}.sqlite")
+    motor_sql.build_store(clean_path, store_path)
+    sql_means = motor_sql.SqlBackend(store_path).cast_range_means(women_edges, men_edges)
+    for name, series in means.items():
+        np.testing.assert_allclose(sql_means[name].to_numpy(dtype=float), series.to_numpy(dtype=float),
+                                   rtol=1e-9, equal_nan=True, err_msg=f"{mode}:{name}")